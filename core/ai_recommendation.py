@@ -4,67 +4,69 @@ AI驱动内容推荐系统
 集成sentence-transformers实现智能推荐
 """
 
+import itertools
 import logging
+import os
 from typing import List, Dict, Any, Optional, Union
 import numpy as np  # type: ignore
 import json
 import time
 from datetime import datetime
 
-# 这些导入已经在上面的代码块中定义
+from collections import defaultdict
+from threading import Lock
+import sqlite3
+from pathlib import Path
 
-# 尝试导入sentence-transformers，如果失败则设置为None
-# 预定义SentenceTransformer类型
-try:
-    from typing import Any
+from .embedding_store import EmbeddingStore, content_key
+from .interaction_writer import InteractionWriter
+from .lazy_imports import LazyModule, import_module, preload
+from .media_catalog import (
+    FEATURE_DIRECTOR,
+    FEATURE_KIND_NAMES,
+    MediaCatalog,
+    PreferenceVectors,
+)
+from .vector_index import VectorIndexManager
+
+logger = logging.getLogger(__name__)
 
-    SentenceTransformer: Any = None
-    # 添加兼容性处理
-    import torch  # type: ignore
 
-    # 安全地处理PyTorch版本兼容性
+def _patch_torch_pytree():
+    """兼容旧版 PyTorch：为 sentence-transformers 补上 register_pytree_node 别名"""
     try:
-        # 应用PyTorch兼容性补丁
+        torch = import_module("torch")
         if hasattr(torch.utils._pytree, "_register_pytree_node") and not hasattr(
             torch.utils._pytree, "register_pytree_node"
         ):
-            # 创建兼容性别名
             torch.utils._pytree.register_pytree_node = (
                 torch.utils._pytree._register_pytree_node
             )
-    except AttributeError:
-        pass  # 忽略任何属性错误
-    from sentence_transformers import SentenceTransformer
-
-    SENTENCE_TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    SENTENCE_TRANSFORMERS_AVAILABLE = False
+    except (ImportError, AttributeError):
+        pass  # 忽略任何导入或属性错误
 
-try:
-    import faiss  # type: ignore
 
-    FAISS_AVAILABLE = True
-except ImportError:
-    faiss = None  # type: ignore
-    FAISS_AVAILABLE = False
+# 重量级依赖在首次使用时才导入，避免拖慢 API 启动
+sentence_transformers = LazyModule(
+    "sentence_transformers", before_import=_patch_torch_pytree
+)
+faiss = LazyModule("faiss")
+sklearn_pairwise = LazyModule("sklearn.metrics.pairwise")
 
-try:
-    from sklearn.metrics.pairwise import cosine_similarity  # type: ignore
+SENTENCE_TRANSFORMERS_AVAILABLE = sentence_transformers.available
+FAISS_AVAILABLE = faiss.available
+COSINE_SIMILARITY_AVAILABLE = sklearn_pairwise.available
 
-    COSINE_SIMILARITY_AVAILABLE = True
-except ImportError:
-    cosine_similarity = None  # type: ignore
-    COSINE_SIMILARITY_AVAILABLE = False
 
-from collections import defaultdict
-from threading import Lock
-import sqlite3
-from pathlib import Path
-
-logger = logging.getLogger(__name__)
+def preload_dependencies(background: bool = True):
+    """预加载推荐系统的重量级依赖（默认在后台线程中进行）"""
+    return preload([faiss, sklearn_pairwise, sentence_transformers], background)
 
 
 class AIRecommendationSystem:
+    # 与向量索引一同持久化的媒体元数据，行号与索引ID映射一致
+    ITEMS_FILE = "items.json"
+
     def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
         """
         初始化AI推荐系统
@@ -84,15 +86,29 @@ class AIRecommendationSystem:
             "similarity_threshold": 0.5,  # 相似度阈值
             "cache_ttl": 3600,  # 缓存时间(秒)
             "batch_size": 32,  # 批量处理大小
-            "faiss_index_type": "IVF100,Flat",  # FAISS索引类型
+            "encode_workers": 1,  # 并行编码线程数
+            "encode_processes": 0,  # 大批量编码时使用的进程数（0 表示不使用多进程）
+            "multi_process_threshold": 10000,  # 未命中数超过该值时才启用多进程
+            "index_dir": "data/ai_index",  # 向量索引持久化目录（None 表示不持久化）
+            "index_save_interval": 60.0,  # 添加媒体后两次保存索引的最短间隔(秒)，其余在关闭时保存
+            "flat_threshold": 10000,  # 少于该数量使用精确 Flat 索引
+            "ivf_threshold": 1000000,  # 少于该数量使用 HNSW，否则使用 IVF
+            "retrain_growth": 2.0,  # IVF 语料增长到训练时的倍数后重新训练
             "nprobe": 10,  # FAISS搜索参数
             "enable_cache": True,  # 启用缓存
             "cache_size": 1000,  # 缓存大小
+            "embedding_store_dir": "data/embeddings",  # 持久化嵌入存储目录（None 表示不持久化）
+            "embedding_dtype": "float32",  # 持久化嵌入的数据类型（float32/float16）
+            "interaction_batch_size": 256,  # 交互写回：每批最多写入的记录数
+            "interaction_flush_ms": 200,  # 交互写回：最长等待时间(毫秒)
         }
 
         # 性能优化相关
-        self.faiss_index = None  # type: ignore
-        self.embedding_cache: Dict[Any, np.ndarray] = {}
+        self.index_manager: Optional[VectorIndexManager] = None
+        self._index_dirty = False
+        self._last_index_save: Optional[float] = None
+        self.embedding_cache: Dict[bytes, np.ndarray] = {}
+        self.embedding_store: Optional[EmbeddingStore] = None
         self.query_cache: Dict[str, Dict[str, Any]] = {}
         self.media_cache: Dict[str, Dict[str, Any]] = {}
         self.cache_lock = Lock()
@@ -105,7 +121,11 @@ class AIRecommendationSystem:
         self.user_interactions: defaultdict[str, List[Dict[str, Any]]] = defaultdict(
             list
         )
-        self.user_preferences: defaultdict[str, Dict[str, Any]] = defaultdict(dict)
+
+        # 媒体ID->行号索引与列式特征，行号与 media_items、向量索引一致
+        self.catalog = MediaCatalog()
+        self.user_preferences = PreferenceVectors(self.catalog.vocabulary)
+        self.interaction_writer: Optional[InteractionWriter] = None
         self._init_user_database()
 
     def record_user_interaction(
@@ -127,23 +147,19 @@ class AIRecommendationSystem:
             metadata: 额外元数据
         """
         try:
-            if self.conn:
+            if self.interaction_writer is not None:
+                # 写回队列按批提交，时间戳在入队时确定
                 metadata_str = json.dumps(metadata) if metadata else None
-                self.cursor.execute(
-                    """
-                    INSERT INTO user_interactions 
-                    (user_id, media_id, interaction_type, interaction_value, metadata)
-                    VALUES (?, ?, ?, ?, ?)
-                """,
+                self.interaction_writer.add_interaction(
                     (
                         user_id,
                         media_id,
                         interaction_type,
                         interaction_value,
                         metadata_str,
-                    ),
+                        datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+                    )
                 )
-                self.conn.commit()
 
             # 更新内存中的用户交互记录
             interaction = {
@@ -170,14 +186,9 @@ class AIRecommendationSystem:
     ) -> None:
         """根据用户交互更新用户偏好"""
         try:
-            # 查找媒体信息
-            media_item = None
-            for item in self.media_items:
-                if item.get("id") == media_id:
-                    media_item = item
-                    break
-
-            if not media_item:
+            # 通过ID索引查找媒体行
+            row = self.catalog.get_row(media_id)
+            if row is None:
                 return
 
             # 根据交互类型更新偏好权重
@@ -191,23 +202,37 @@ class AIRecommendationSystem:
             elif interaction_type == "view":
                 weight_multiplier = 0.5
 
-            # 更新分类偏好
-            if media_item.get("genres"):
-                for genre in media_item["genres"]:
-                    self._update_preference_weight(
-                        user_id, "genre", genre, value * weight_multiplier
-                    )
-
-            # 更新导演偏好
-            if media_item.get("directors"):
-                for director in media_item["directors"]:
-                    self._update_preference_weight(
-                        user_id, "director", director, value * weight_multiplier
-                    )
+            # 一次性更新分类和导演偏好
+            feature_ids, counts = self.catalog.learned_counts(row)
+            self._update_preference_vector(
+                user_id, feature_ids, value * weight_multiplier, counts
+            )
 
         except Exception as e:
             logger.error(f"更新用户偏好失败: {e}")
 
+    def _update_preference_vector(
+        self,
+        user_id: str,
+        feature_ids: np.ndarray,
+        weight_delta: float,
+        counts: Optional[np.ndarray] = None,
+    ):
+        """增量更新稀疏偏好向量，并把新权重排入写回队列"""
+        updated_ids, weights = self.user_preferences.update(
+            user_id, feature_ids, weight_delta, counts
+        )
+        if self.interaction_writer is not None:
+            split = self.catalog.vocabulary.split
+            self.interaction_writer.add_preferences(
+                [
+                    (user_id, *split(feature_id), weight)
+                    for feature_id, weight in zip(
+                        updated_ids.tolist(), weights.tolist()
+                    )
+                ]
+            )
+
     def get_personalized_recommendations(
         self,
         user_id: str,
@@ -270,99 +295,138 @@ class AIRecommendationSystem:
             logger.error(f"获取个性化推荐失败: {e}")
             return []
 
+    def batch_personalized_recommendations(
+        self, user_queries: Dict[str, str], top_k: Optional[int] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        批量个性化推荐（用于为全部用户离线生成推荐）
+
+        所有用户的查询一次编码、一次 FAISS 搜索，再逐用户向量化计算个性化得分。
+
+        Args:
+            user_queries: 用户ID -> 查询文本
+            top_k: 每个用户的推荐数量
+
+        Returns:
+            用户ID -> 个性化推荐结果
+        """
+        top_k = int(top_k or self.config.get("top_k", 10) or 10)
+        user_ids = list(user_queries)
+        try:
+            candidates = self.search_many(
+                [user_queries[user_id] or "" for user_id in user_ids], top_k * 2
+            )
+        except Exception as e:
+            logger.error(f"批量个性化推荐失败: {e}")
+            return {user_id: [] for user_id in user_ids}
+
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        for user_id, base_results in zip(user_ids, candidates):
+            if not user_queries[user_id] or not base_results:
+                results[user_id] = []
+                continue
+            personalized = self._apply_personalization_weights(user_id, base_results)
+            personalized.sort(
+                key=lambda x: x.get("personalized_score", 0), reverse=True
+            )
+            results[user_id] = personalized[:top_k]
+        return results
+
     def _apply_personalization_weights(
         self, user_id: str, recommendations: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
-        """应用个性化权重到推荐结果"""
+        """应用个性化权重到推荐结果（基于候选特征矩阵的向量化计算）"""
         try:
-            personalized_results: List[Dict[str, Any]] = []
-
-            for item in recommendations:
-                personalized_item = item.copy()
-                base_score = item.get("similarity_score", 0)
-                personalization_score = 0.0
-                diversity_bonus = 0.0
-
-                # 计算个性化得分
-                if item.get("genres"):
-                    for genre in item["genres"]:
-                        pref_key = f"genre:{genre}"
-                        personalization_score += self.user_preferences[user_id].get(
-                            pref_key, 0.1
-                        )
+            count = len(recommendations)
+            if count == 0:
+                return []
 
-                if item.get("directors"):
-                    for director in item["directors"]:
-                        pref_key = f"director:{director}"
-                        personalization_score += self.user_preferences[user_id].get(
-                            pref_key, 0.1
-                        )
+            # 候选特征以稀疏 (候选行, 特征编号) 对表示：分类、导演、前三位演员和媒体类型；
+            # 已在目录中的媒体直接复用编码好的特征
+            feature_rows: List[int] = []
+            feature_chunks: List[np.ndarray] = []
+            type_codes = np.full(count, -1, dtype=np.int64)
+            for row, item in enumerate(recommendations):
+                catalog_row = self.catalog.get_row(item.get("id"))
+                if catalog_row is not None and catalog_row < len(self.media_items):
+                    features = self.catalog.features(catalog_row)
+                    type_codes[row] = self.catalog.type_codes[catalog_row]
+                else:
+                    features, _, type_codes[row] = self.catalog.encode(item)
+                feature_chunks.append(features)
+                feature_rows.extend([row] * len(features))
+            feature_ids = (
+                np.concatenate(feature_chunks)
+                if feature_chunks
+                else np.zeros(0, dtype=np.int32)
+            )
 
-                if item.get("actors"):
-                    for actor in item["actors"][:3]:
-                        pref_key = f"actor:{actor}"
-                        personalization_score += self.user_preferences[user_id].get(
-                            pref_key, 0.1
-                        )
+            personalization = np.bincount(
+                np.asarray(feature_rows, dtype=np.int64),
+                weights=self.user_preferences.weights(user_id, feature_ids),
+                minlength=count,
+            )
 
-                if item.get("type"):
-                    pref_key = f"media_type:{item['type']}"
-                    personalization_score += self.user_preferences[user_id].get(
-                        pref_key, 0.1
-                    )
+            # 多样性奖励：类型或导演在前面的结果中首次出现
+            not_first = np.arange(count) > 0
+            _, first_type, type_ids = np.unique(
+                type_codes, return_index=True, return_inverse=True
+            )
+            new_type = first_type[type_ids] == np.arange(count)
+            new_director = np.zeros(count, dtype=bool)
+            is_director = self.catalog.vocabulary.kinds(feature_ids) == FEATURE_DIRECTOR
+            if is_director.any():
+                director_rows = np.asarray(feature_rows)[is_director]
+                _, director_ids = np.unique(
+                    feature_ids[is_director], return_inverse=True
+                )
+                first_row = np.full(director_ids.max() + 1, count)
+                np.minimum.at(first_row, director_ids, director_rows)
+                new_director[
+                    director_rows[first_row[director_ids] == director_rows]
+                ] = True
+            diversity = not_first * (0.2 * new_type + 0.1 * new_director)
+
+            # 评分奖励：高评分内容获得额外加分
+            ratings = self._numeric_column(recommendations, "rating")
+            with np.errstate(invalid="ignore"):
+                rating_bonus = np.select(
+                    [ratings >= 9.0, ratings >= 8.0, ratings >= 7.0],
+                    [0.3, 0.2, 0.1],
+                    0.0,
+                )
 
-                # 多样性奖励：鼓励不同类型的推荐
-                if len(personalized_results) > 0:
-                    # 检查当前结果中是否已经有相似类型
-                    existing_types = [r.get("type") for r in personalized_results]
-                    if item.get("type") not in existing_types:
-                        diversity_bonus += 0.2
-
-                    # 检查是否有相似导演
-                    existing_directors = []
-                    for r in personalized_results:
-                        if r.get("directors"):
-                            existing_directors.extend(r["directors"])
-
-                    if item.get("directors"):
-                        new_directors = set(item["directors"]) - set(existing_directors)
-                        if new_directors:
-                            diversity_bonus += 0.1
-
-                # 评分奖励：高评分内容获得额外加分
-                rating_bonus = 0.0
-                if item.get("rating"):
-                    if item["rating"] >= 9.0:
-                        rating_bonus += 0.3
-                    elif item["rating"] >= 8.0:
-                        rating_bonus += 0.2
-                    elif item["rating"] >= 7.0:
-                        rating_bonus += 0.1
-
-                # 新鲜度奖励：较新的内容获得加分
-                recency_bonus = 0.0
-                if item.get("year"):
-                    current_year = datetime.now().year
-                    if item["year"] >= current_year - 2:  # 近两年的内容
-                        recency_bonus += 0.2
-                    elif item["year"] >= current_year - 5:  # 近五年的内容
-                        recency_bonus += 0.1
-
-                # 计算综合得分
-                personalized_score = (
-                    base_score
-                    + (personalization_score * 0.1)
-                    + diversity_bonus
-                    + rating_bonus
-                    + recency_bonus
+            # 新鲜度奖励：近两年 / 近五年的内容获得加分
+            years = self._numeric_column(recommendations, "year")
+            current_year = datetime.now().year
+            with np.errstate(invalid="ignore"):
+                recency_bonus = np.select(
+                    [years >= current_year - 2, years >= current_year - 5],
+                    [0.2, 0.1],
+                    0.0,
                 )
-                personalized_item["personalized_score"] = personalized_score
-                personalized_item["base_similarity"] = base_score
-                personalized_item["personalization_bonus"] = personalization_score
-                personalized_item["diversity_bonus"] = diversity_bonus
-                personalized_item["rating_bonus"] = rating_bonus
-                personalized_item["recency_bonus"] = recency_bonus
 
+            base_scores = np.array(
+                [item.get("similarity_score", 0) for item in recommendations],
+                dtype=float,
+            )
+            scores = (
+                base_scores
+                + personalization * 0.1
+                + diversity
+                + rating_bonus
+                + recency_bonus
+            )
+
+            personalized_results: List[Dict[str, Any]] = []
+            for row, item in enumerate(recommendations):
+                personalized_item = item.copy()
+                personalized_item["personalized_score"] = float(scores[row])
+                personalized_item["base_similarity"] = item.get("similarity_score", 0)
+                personalized_item["personalization_bonus"] = float(personalization[row])
+                personalized_item["diversity_bonus"] = float(diversity[row])
+                personalized_item["rating_bonus"] = float(rating_bonus[row])
+                personalized_item["recency_bonus"] = float(recency_bonus[row])
                 personalized_results.append(personalized_item)
 
             return personalized_results
@@ -370,7 +434,19 @@ class AIRecommendationSystem:
         except Exception as e:
             logger.error(f"应用个性化权重失败: {e}")
             return recommendations
-            logger.error(f"更新用户偏好失败: {e}")
+
+    @staticmethod
+    def _numeric_column(items: List[Dict[str, Any]], key: str) -> np.ndarray:
+        """提取数值字段为浮点数组，缺失或无法转换的值为 NaN"""
+        column = np.full(len(items), np.nan)
+        for row, item in enumerate(items):
+            value = item.get(key)
+            if value:
+                try:
+                    column[row] = float(value)
+                except (TypeError, ValueError):
+                    pass
+        return column
 
     def _init_user_database(self):
         """初始化用户行为数据库"""
@@ -378,6 +454,8 @@ class AIRecommendationSystem:
             db_path = Path("user_recommendations.db")
             self.conn = sqlite3.connect(db_path, check_same_thread=False)
             self.cursor = self.conn.cursor()
+            # WAL 模式下后台写入不阻塞读取
+            self.cursor.execute("PRAGMA journal_mode=WAL").fetchone()
 
             # 创建用户行为表
             self.cursor.execute(
@@ -419,7 +497,35 @@ class AIRecommendationSystem:
             """
             )
 
+            # 偏好按 (用户, 类型, 值) 唯一，写回时直接覆盖权重
+            self.cursor.execute(
+                """
+                DELETE FROM user_preferences WHERE id NOT IN (
+                    SELECT MAX(id) FROM user_preferences
+                    GROUP BY user_id, preference_type, preference_value
+                )
+            """
+            )
+            self.cursor.execute(
+                """
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_user_preferences_key
+                ON user_preferences (user_id, preference_type, preference_value)
+            """
+            )
+            self.cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_user_interactions_user "
+                "ON user_interactions (user_id)"
+            )
+
             self.conn.commit()
+            self._load_user_preferences()
+
+            self.interaction_writer = InteractionWriter(
+                db_path,
+                batch_size=int(self.config.get("interaction_batch_size", 256)),
+                flush_interval=float(self.config.get("interaction_flush_ms", 200))
+                / 1000,
+            )
             logger.info("用户推荐数据库初始化成功")
 
         except Exception as e:
@@ -427,114 +533,60 @@ class AIRecommendationSystem:
             # 如果数据库初始化失败，使用内存存储
             self.conn = None
             self.cursor = None
+            self.interaction_writer = None
 
-            # 更新分类偏好
-            if media_item.get("genres"):
-                for genre in media_item["genres"]:
-                    self._update_preference_weight(
-                        user_id, "genre", genre, value * weight_multiplier
-                    )
-
-            # 更新导演偏好
-            if media_item.get("directors"):
-                for director in media_item["directors"]:
-                    self._update_preference_weight(
-                        user_id, "director", director, value * weight_multiplier
+    def _load_user_preferences(self):
+        """从数据库加载用户偏好到稀疏偏好向量"""
+        self.cursor.execute(
+            """
+            SELECT user_id, preference_type, preference_value, preference_weight
+            FROM user_preferences ORDER BY user_id
+        """
+        )
+        vocabulary = self.catalog.vocabulary
+        for user_id, rows in itertools.groupby(
+            self.cursor.fetchall(), key=lambda r: r[0]
+        ):
+            feature_ids: List[int] = []
+            weights: List[float] = []
+            for _, pref_type, pref_value, weight in rows:
+                if pref_type in FEATURE_KIND_NAMES:
+                    feature_ids.append(
+                        vocabulary.add(FEATURE_KIND_NAMES.index(pref_type), pref_value)
                     )
-
-            # 更新音乐特定偏好
-            if media_item.get("album"):
-                self._update_preference_weight(
-                    user_id,
-                    "music_album",
-                    media_item["album"],
-                    value * weight_multiplier,
+                    weights.append(weight)
+            if feature_ids:
+                self.user_preferences.set_weights(
+                    user_id, np.array(feature_ids), np.array(weights)
                 )
-                if media_item.get("genre"):
-                    self._update_preference_weight(
-                        user_id,
-                        "music_genre",
-                        media_item["genre"],
-                        value * weight_multiplier,
-                    )
-
-        except Exception as e:
-            logger.error(f"更新用户偏好失败: {e}")
 
-            # 更新分类偏好
-            if media_item.get("genres"):
-                for genre in media_item["genres"]:
-                    self._update_preference_weight(
-                        user_id, "genre", genre, value * weight_multiplier
-                    )
-
-            # 更新导演偏好
-            if media_item.get("directors"):
-                for director in media_item["directors"]:
-                    self._update_preference_weight(
-                        user_id, "director", director, value * weight_multiplier
-                    )
-
-            # 更新演员偏好
-            if media_item.get("actors"):
-                for actor in media_item["actors"][:3]:  # 只取前3个主要演员
-                    pass  # 暂时不更新演员偏好
-                if media_item.get("genre"):
-                    self._update_preference_weight(
-                        user_id,
-                        "music_genre",
-                        media_item["genre"],
-                        value * weight_multiplier,
-                    )
-
-        except Exception as e:
-            logger.error(f"更新用户偏好失败: {e}")
+    def flush_interactions(self, timeout: Optional[float] = None) -> bool:
+        """等待排队中的交互和偏好写入数据库"""
+        if self.interaction_writer is None:
+            return True
+        return self.interaction_writer.flush(timeout)
+
+    def close(self):
+        """保存未持久化的索引，写入剩余交互并关闭数据库连接"""
+        if self._index_dirty:
+            self.save_index()
+        if self.interaction_writer is not None:
+            self.interaction_writer.close()
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+            self.cursor = None
 
     def _update_preference_weight(
         self, user_id: str, pref_type: str, pref_value: str, weight_delta: float
     ):
         """更新偏好权重"""
         try:
-            if self.conn:
-                # 检查是否已存在偏好
-                self.cursor.execute(
-                    """
-                    SELECT preference_weight FROM user_preferences 
-                    WHERE user_id = ? AND preference_type = ? AND preference_value = ?
-                """,
-                    (user_id, pref_type, pref_value),
-                )
-
-                result = self.cursor.fetchone()
-                if result:
-                    # 更新现有偏好
-                    new_weight = max(0.1, result[0] + weight_delta)
-                    self.cursor.execute(
-                        """
-                        UPDATE user_preferences 
-                        SET preference_weight = ?, last_updated = CURRENT_TIMESTAMP
-                        WHERE user_id = ? AND preference_type = ? AND preference_value = ?
-                    """,
-                        (new_weight, user_id, pref_type, pref_value),
-                    )
-                else:
-                    # 插入新偏好
-                    self.cursor.execute(
-                        """
-                        INSERT INTO user_preferences 
-                        (user_id, preference_type, preference_value, preference_weight)
-                        VALUES (?, ?, ?, ?)
-                    """,
-                        (user_id, pref_type, pref_value, max(0.1, weight_delta)),
-                    )
-
-                self.conn.commit()
-
-            # 更新内存中的偏好
-            pref_key = f"{pref_type}:{pref_value}"
-            current_weight = self.user_preferences[user_id].get(pref_key, 0.1)
-            self.user_preferences[user_id][pref_key] = max(
-                0.1, current_weight + weight_delta
+            feature_id = self.catalog.vocabulary.add(
+                FEATURE_KIND_NAMES.index(pref_type), pref_value
+            )
+            self._update_preference_vector(
+                user_id, np.array([feature_id], dtype=np.int32), weight_delta
             )
 
         except Exception as e:
@@ -544,7 +596,7 @@ class AIRecommendationSystem:
         """初始化模型和索引"""
         try:
             logger.info(f"正在加载sentence-transformers模型: {self.model_name}")
-            self.model = SentenceTransformer(self.model_name)
+            self.model = sentence_transformers.SentenceTransformer(self.model_name)
 
             # 初始化FAISS索引
             self._init_faiss_index()
@@ -559,29 +611,85 @@ class AIRecommendationSystem:
             logger.error(f"AI推荐系统初始化失败: {e}")
             raise
 
+    @property
+    def faiss_index(self):
+        """当前的 FAISS 索引对象"""
+        return self.index_manager.index if self.index_manager is not None else None
+
     def _init_faiss_index(self):
-        """初始化FAISS索引"""
-        if len(self.embeddings) > 0:
-            # 如果有现有嵌入，构建索引
-            embeddings_array = np.array(self.embeddings).astype("float32")
-            dimension = embeddings_array.shape[1]
-
-            # 创建IVF索引以提高搜索性能
-            quantizer = faiss.IndexFlatIP(dimension)
-            self.faiss_index = faiss.IndexIVFFlat(quantizer, dimension, 100)
-            if self.faiss_index:
-                self.faiss_index.train(embeddings_array)
-                self.faiss_index.add(embeddings_array)
-            self.faiss_index.nprobe = self.config["nprobe"]
+        """初始化向量索引：存在持久化索引时以内存映射方式加载"""
+        dimension = 384  # all-MiniLM-L6-v2的维度
+        if self.model is not None and hasattr(
+            self.model, "get_sentence_embedding_dimension"
+        ):
+            dimension = self.model.get_sentence_embedding_dimension() or dimension
+
+        self.index_manager = VectorIndexManager(
+            dimension,
+            index_dir=self.config.get("index_dir"),
+            flat_threshold=int(self.config.get("flat_threshold", 10000)),
+            ivf_threshold=int(self.config.get("ivf_threshold", 1000000)),
+            retrain_growth=float(self.config.get("retrain_growth", 2.0)),
+            nprobe=int(self.config.get("nprobe", 10)),
+        )
 
+        if self.index_manager.load():
+            # 恢复持久化的媒体元数据；缺失或与ID映射不一致时只保留ID，
+            # 元数据在重新添加媒体时补全（无需重新编码）
+            self.media_items = self._load_media_items(self.index_manager.ids)
+            self.embeddings = []
+            self.catalog = MediaCatalog(self.catalog.vocabulary)
+            self.catalog.add(self.media_items)
+            logger.info(
+                f"FAISS索引已从磁盘加载，包含 {self.index_manager.ntotal} 个向量"
+            )
+        elif len(self.embeddings) > 0:
+            self.index_manager.add(
+                np.array(self.embeddings),
+                [item.get("id", "") for item in self.media_items],
+            )
             logger.info(f"FAISS索引初始化完成，包含 {len(self.embeddings)} 个向量")
         else:
-            # 初始化空索引
-            dimension = 384  # all-MiniLM-L6-v2的维度
-            quantizer = faiss.IndexFlatIP(dimension)
-            self.faiss_index = faiss.IndexIVFFlat(quantizer, dimension, 100)
             logger.info("FAISS索引初始化完成（空索引）")
 
+    def _load_media_items(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """读取与向量索引一同保存的媒体元数据"""
+        path = Path(self.config["index_dir"]) / self.ITEMS_FILE
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                items = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取媒体元数据失败，仅恢复ID: {e}")
+            items = None
+
+        if isinstance(items, list) and [item.get("id") for item in items] == ids:
+            return items
+        return [{"id": media_id} for media_id in ids]
+
+    def save_index(self):
+        """持久化向量索引、ID映射与媒体元数据"""
+        index_dir = self.config.get("index_dir")
+        if self.index_manager is not None and index_dir:
+            self.index_manager.save()
+            if self.index_manager.index is not None:
+                path = Path(index_dir) / self.ITEMS_FILE
+                tmp_path = path.with_name(f"{self.ITEMS_FILE}.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.media_items, f, ensure_ascii=False, default=str)
+                os.replace(tmp_path, path)
+        self._index_dirty = False
+        self._last_index_save = time.monotonic()
+
+    def _index_changed(self):
+        """记录索引已变化；距上次保存超过间隔时才重写索引文件，避免每次添加都全量写盘"""
+        self._index_dirty = True
+        interval = float(self.config.get("index_save_interval", 60.0))
+        if (
+            self._last_index_save is None
+            or time.monotonic() - self._last_index_save >= interval
+        ):
+            self.save_index()
+
     def generate_embedding(self, text: str) -> np.ndarray:
         """
         生成文本的向量嵌入（带缓存）
@@ -597,7 +705,7 @@ class AIRecommendationSystem:
 
         # 检查缓存
         if self.config["enable_cache"]:
-            cache_key = hash(text)
+            cache_key = content_key(self.model_name, text)
             if cache_key in self.embedding_cache:
                 return self.embedding_cache[cache_key]
 
@@ -637,17 +745,160 @@ class AIRecommendationSystem:
             logger.error(f"生成嵌入失败: {e}")
             raise
 
-    def generate_media_embedding(self, media_data: Dict[str, Any]) -> np.ndarray:
+    def _get_embedding_store(self) -> Optional[EmbeddingStore]:
+        """按配置懒加载持久化嵌入存储"""
+        store_dir = self.config.get("embedding_store_dir")
+        if not store_dir:
+            return None
+        if self.embedding_store is None:
+            self.embedding_store = EmbeddingStore(
+                store_dir,
+                self.model_name,
+                dtype=self.config.get("embedding_dtype", "float32"),
+            )
+        return self.embedding_store
+
+    def _get_cache_size(self) -> int:
+        try:
+            cache_size_value = self.config.get("cache_size", 1000)
+            if isinstance(cache_size_value, (int, float, str)):
+                return int(cache_size_value)
+        except (ValueError, TypeError):
+            pass
+        return 1000
+
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        """按 batch_size 分块编码文本，可选多线程或多进程"""
+        batch_size = max(1, int(self.config.get("batch_size", 32)))
+        processes = int(self.config.get("encode_processes", 0) or 0)
+        workers = max(1, int(self.config.get("encode_workers", 1) or 1))
+
+        if (
+            processes > 1
+            and len(texts) >= int(self.config.get("multi_process_threshold", 10000))
+            and hasattr(self.model, "start_multi_process_pool")
+        ):
+            # 大批量导入：使用 sentence-transformers 的多进程编码池
+            pool = self.model.start_multi_process_pool(["cpu"] * processes)
+            try:
+                return np.asarray(
+                    self.model.encode_multi_process(texts, pool, batch_size=batch_size),
+                    dtype="float32",
+                )
+            finally:
+                self.model.stop_multi_process_pool(pool)
+
+        chunks = [
+            texts[start : start + batch_size]
+            for start in range(0, len(texts), batch_size)
+        ]
+
+        def encode(chunk: List[str]) -> np.ndarray:
+            return self.model.encode(
+                chunk,
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+
+        if workers > 1 and len(chunks) > 1:
+            # 模型推理会释放 GIL，多个分块可以在线程中并行编码
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                encoded = list(executor.map(encode, chunks))
+        else:
+            encoded = [encode(chunk) for chunk in chunks]
+
+        return np.vstack(encoded).astype("float32", copy=False)
+
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
         """
-        为媒体内容生成综合向量嵌入
+        批量生成文本的向量嵌入（带缓存）
+
+        依次批量查询内存缓存和持久化嵌入存储，只对未命中且去重后的文本编码，
+        新结果写回持久化存储供其他进程和重启后复用。
+
+        Args:
+            texts: 输入文本列表
+
+        Returns:
+            形状为 (len(texts), dimension) 的 float32 矩阵
+        """
+        if not self.is_initialized:
+            self.initialize()
+
+        if not texts:
+            return np.zeros((0, 0), dtype="float32")
+
+        use_cache = self.config["enable_cache"]
+        found: Dict[str, np.ndarray] = {}
+        missing: List[str] = []
+        seen = set()
+        for text in texts:
+            if text in seen:
+                continue
+            seen.add(text)
+            cached = (
+                self.embedding_cache.get(content_key(self.model_name, text))
+                if use_cache
+                else None
+            )
+            if cached is not None:
+                found[text] = cached
+            else:
+                missing.append(text)
+
+        store = self._get_embedding_store() if use_cache else None
+        if missing and store is not None:
+            stored, still_missing = store.get_many(missing)
+            for position, embedding in stored.items():
+                found[missing[position]] = embedding
+            missing = [missing[position] for position in still_missing]
+
+        if missing:
+            if not self.model:
+                raise RuntimeError("嵌入模型未加载")
+
+            encoded = self._encode_texts(missing)
+            for text, embedding in zip(missing, encoded):
+                found[text] = embedding
+
+            if store is not None:
+                try:
+                    store.put_many(missing, encoded)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"写入持久化嵌入存储失败: {e}")
+
+            if use_cache:
+                cache_size = self._get_cache_size()
+                with self.cache_lock:
+                    # 只缓存最后 cache_size 个新结果，并按插入顺序淘汰最旧项
+                    for text, embedding in zip(
+                        missing[-cache_size:], encoded[-cache_size:]
+                    ):
+                        self.embedding_cache[content_key(self.model_name, text)] = (
+                            embedding
+                        )
+                    overflow = len(self.embedding_cache) - cache_size
+                    if overflow > 0:
+                        for key in list(
+                            itertools.islice(self.embedding_cache, overflow)
+                        ):
+                            del self.embedding_cache[key]
+
+        return np.vstack([found[text] for text in texts]).astype("float32", copy=False)
+
+    def build_media_text(self, media_data: Dict[str, Any]) -> str:
+        """
+        构建媒体内容的综合文本描述（用于生成嵌入）
 
         Args:
             media_data: 媒体数据字典
 
         Returns:
-            综合向量嵌入
+            综合文本描述
         """
-        # 构建综合文本描述
         text_parts = []
 
         # 标题和描述
@@ -690,9 +941,19 @@ class AIRecommendationSystem:
             text_parts.append(f"演员: {actors}")
 
         # 组合所有文本部分
-        combined_text = ". ".join(text_parts)
+        return ". ".join(text_parts)
 
-        return self.generate_embedding(combined_text)
+    def generate_media_embedding(self, media_data: Dict[str, Any]) -> np.ndarray:
+        """
+        为媒体内容生成综合向量嵌入
+
+        Args:
+            media_data: 媒体数据字典
+
+        Returns:
+            综合向量嵌入
+        """
+        return self.generate_embedding(self.build_media_text(media_data))
 
     def add_media_items(self, media_items: List[Dict[str, Any]]):
         """
@@ -705,27 +966,41 @@ class AIRecommendationSystem:
             self.initialize()
 
         try:
-            # 批量生成嵌入以提高性能
-            embeddings_batch = []
-
-            for item in media_items:
-                embedding = self.generate_media_embedding(item)
-                embeddings_batch.append(embedding)
-
-            # 添加到FAISS索引
-            if len(embeddings_batch) > 0:
-                embeddings_array = np.array(embeddings_batch).astype("float32")
-
-                if self.faiss_index:
-                    if self.faiss_index.ntotal == 0:
-                        # 首次添加，需要训练索引
-                        self.faiss_index.train(embeddings_array)
-
-                    self.faiss_index.add(embeddings_array)
+            # 已在索引中的媒体（例如从磁盘加载）只更新元数据，不重新编码
+            new_items: Dict[Any, Dict[str, Any]] = {}
+            updated = False
+            for position, item in enumerate(media_items):
+                media_id = item.get("id")
+                row = self.catalog.get_row(media_id)
+                if row is not None and row < len(self.media_items):
+                    self.media_items[row] = item
+                    self.catalog.update(row, item)
+                    updated = True
+                else:
+                    # 同一批次内重复的ID以最后一个为准
+                    new_items[media_id if media_id is not None else -position] = item
+            items_to_add = list(new_items.values())
+
+            # 批量生成嵌入：批量查缓存，只按 batch_size 分块编码未命中的文本
+            texts = [self.build_media_text(item) for item in items_to_add]
+            embeddings_array = self.generate_embeddings(texts)
+
+            # 一次性添加到FAISS索引
+            if len(items_to_add) > 0:
+                if self.index_manager is not None:
+                    self.index_manager.add(
+                        embeddings_array,
+                        [item.get("id", "") for item in items_to_add],
+                    )
 
                 # 添加到本地存储
-                self.embeddings.extend(embeddings_batch)
-                self.media_items.extend(media_items)
+                self.embeddings.extend(embeddings_array)
+                self.media_items.extend(items_to_add)
+                self.catalog.add(items_to_add)
+
+            # 媒体元数据随索引一起持久化，仅更新元数据时也需要保存
+            if self.index_manager is not None and (items_to_add or updated):
+                self._index_changed()
 
             logger.info(f"成功添加 {len(media_items)} 个媒体内容到推荐系统")
 
@@ -780,48 +1055,18 @@ class AIRecommendationSystem:
             query_embedding = self.generate_embedding(query_text)
             query_embedding = query_embedding.astype("float32").reshape(1, -1)
 
-            # 使用FAISS进行高效搜索
-            if self.faiss_index:
-                distances, indices = self.faiss_index.search(
+            # 使用FAISS进行高效搜索（向量已归一化，内积即余弦相似度）
+            if self.index_manager is not None:
+                distances, indices = self.index_manager.search(
                     query_embedding, top_k * 2
                 )  # 搜索更多结果用于过滤
             else:
-                # 如果faiss_index为None，返回空结果
+                # 如果索引未初始化，返回空结果
                 distances = np.array([[]])
                 indices = np.array([[]])
 
             # 构建结果
-            results: List[Dict[str, Any]] = []
-            for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
-                if idx < len(self.media_items):  # 确保索引有效
-                    similarity = float(distance)  # FAISS返回的是距离，需要转换为相似度
-
-                    # 安全地获取和转换similarity_threshold
-                    try:
-                        threshold_value = self.config.get("similarity_threshold", 0.7)
-                        # 检查值是否可以转换为浮点数
-                        if isinstance(threshold_value, (int, float, str)):
-                            similarity_threshold = float(threshold_value)
-                        else:
-                            similarity_threshold = 0.7  # 默认阈值
-                    except (ValueError, TypeError):
-                        similarity_threshold = 0.7  # 默认阈值
-
-                    # 过滤低相似度结果
-                    if similarity >= similarity_threshold or len(results) < top_k:
-                        media_item = self.media_items[idx].copy()
-                        media_item["similarity_score"] = similarity
-                        media_item["rank"] = len(results) + 1
-                        media_item["confidence"] = (
-                            "high" if similarity >= similarity_threshold else "low"
-                        )
-                        results.append(media_item)
-
-                    # 达到所需数量时停止
-                    # 确保top_k不为None
-                    safe_top_k = top_k or 10
-                    if len(results) >= safe_top_k:
-                        break
+            results = self._collect_results(distances[0], indices[0], top_k)
 
             # 缓存结果
             if self.config["enable_cache"]:
@@ -856,6 +1101,83 @@ class AIRecommendationSystem:
                 return []
             return self._fallback_similar_items(query_text, safe_top_k)
 
+    def _get_similarity_threshold(self) -> float:
+        try:
+            threshold_value = self.config.get("similarity_threshold", 0.7)
+            # 检查值是否可以转换为浮点数
+            if isinstance(threshold_value, (int, float, str)):
+                return float(threshold_value)
+        except (ValueError, TypeError):
+            pass
+        return 0.7  # 默认阈值
+
+    def _collect_results(
+        self,
+        scores: np.ndarray,
+        rows: np.ndarray,
+        top_k: int,
+        exclude_id: Optional[Any] = None,
+    ) -> List[Dict[str, Any]]:
+        """把一行 FAISS 搜索结果转换为推荐结果（按相似度阈值过滤）"""
+        similarity_threshold = self._get_similarity_threshold()
+        results: List[Dict[str, Any]] = []
+        for distance, idx in zip(scores, rows):
+            if not 0 <= idx < len(self.media_items):  # -1 表示无结果
+                continue
+            if exclude_id is not None and self.media_items[idx].get("id") == exclude_id:
+                continue
+
+            similarity = float(distance)  # 向量已归一化，内积即余弦相似度
+            # 过滤低相似度结果
+            if similarity >= similarity_threshold or len(results) < top_k:
+                media_item = self.media_items[idx].copy()
+                media_item["similarity_score"] = similarity
+                media_item["rank"] = len(results) + 1
+                media_item["confidence"] = (
+                    "high" if similarity >= similarity_threshold else "low"
+                )
+                results.append(media_item)
+
+            # 达到所需数量时停止
+            if len(results) >= top_k:
+                break
+        return results
+
+    def search_many(
+        self,
+        query_texts: List[str],
+        top_k: int = 10,
+        exclude_ids: Optional[List[Any]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        批量相似搜索：一次模型调用编码全部查询，一次 FAISS 搜索 N×d 查询矩阵
+
+        Args:
+            query_texts: 查询文本列表
+            top_k: 每个查询返回的推荐数量
+            exclude_ids: 与查询一一对应、需要从结果中排除的媒体ID（如查询媒体自身）
+
+        Returns:
+            与查询一一对应的相似媒体内容列表
+        """
+        if (
+            not query_texts
+            or not self.is_initialized
+            or len(self.media_items) == 0
+            or self.index_manager is None
+        ):
+            return [[] for _ in query_texts]
+
+        exclusions = exclude_ids or [None] * len(query_texts)
+        query_embeddings = self.generate_embeddings(query_texts)
+        # 多取一些结果用于阈值过滤和排除自身
+        scores, rows = self.index_manager.search(query_embeddings, top_k * 2 + 1)
+
+        return [
+            self._collect_results(scores[i], rows[i], top_k, exclusions[i])
+            for i in range(len(query_texts))
+        ]
+
     def _fallback_similar_items(
         self, query_text: str, top_k: int
     ) -> List[Dict[str, Any]]:
@@ -864,8 +1186,14 @@ class AIRecommendationSystem:
             query_embedding = self.generate_embedding(query_text)
             query_embedding = query_embedding.reshape(1, -1)
 
-            # 计算余弦相似度
-            similarities = cosine_similarity(query_embedding, self.embeddings)[0]
+            # 计算余弦相似度（从磁盘加载时向量只存在于索引中）
+            vectors: Any = self.embeddings
+            if self.index_manager is not None and self.index_manager.ntotal == len(
+                self.media_items
+            ):
+                vectors = self.index_manager.reconstruct_all()
+            similarities = sklearn_pairwise.cosine_similarity(query_embedding, vectors)
+            similarities = similarities[0]
 
             # 获取相似度最高的项目
             similar_indices = np.argsort(similarities)[::-1]
@@ -876,16 +1204,7 @@ class AIRecommendationSystem:
                 media_item = self.media_items[idx].copy()
                 media_item["similarity_score"] = float(similarity)
                 media_item["rank"] = i + 1
-                # 安全地获取和转换similarity_threshold
-                try:
-                    threshold_value = self.config.get("similarity_threshold", 0.7)
-                    # 检查值是否可以转换为浮点数
-                    if isinstance(threshold_value, (int, float, str)):
-                        threshold = float(threshold_value)
-                    else:
-                        threshold = 0.7  # 默认阈值
-                except (ValueError, TypeError):
-                    threshold = 0.7  # 默认阈值
+                threshold = self._get_similarity_threshold()
                 media_item["confidence"] = "high" if similarity >= threshold else "low"
                 results.append(media_item)
 
@@ -908,19 +1227,12 @@ class AIRecommendationSystem:
         Returns:
             相似媒体内容列表
         """
-        # 查找媒体内容
-        target_media = None
-        target_idx = -1
-
-        for idx, item in enumerate(self.media_items):
-            if item.get("id") == media_id:
-                target_media = item
-                target_idx = idx
-                break
-
-        if target_media is None:
+        # 通过ID索引查找媒体内容
+        row = self.catalog.get_row(media_id)
+        if row is None or row >= len(self.media_items):
             logger.warning(f"未找到媒体内容: {media_id}")
             return []
+        target_media = self.media_items[row]
 
         # 构建查询文本
         query_text = self._build_query_from_media(target_media)
@@ -969,19 +1281,57 @@ class AIRecommendationSystem:
         Returns:
             批量推荐结果
         """
-        results = {}
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        if self.index_manager is None:
+            for media_id in media_ids:
+                results[media_id] = self.get_similar_to_media(media_id, top_k)
+            return results
 
+        queries: List[str] = []
+        query_ids: List[str] = []
         for media_id in media_ids:
-            similar_items = self.get_similar_to_media(media_id, top_k)
+            row = self.catalog.get_row(media_id)
+            if row is None or row >= len(self.media_items):
+                logger.warning(f"未找到媒体内容: {media_id}")
+                results[media_id] = []
+                continue
+            queries.append(self._build_query_from_media(self.media_items[row]))
+            query_ids.append(media_id)
+
+        # 全部查询一次编码、一次搜索
+        for media_id, similar_items in zip(
+            query_ids, self.search_many(queries, top_k, exclude_ids=query_ids)
+        ):
             results[media_id] = similar_items
 
-        return results
+        return {media_id: results[media_id] for media_id in media_ids}
 
     def get_recommendation_stats(self) -> Dict[str, Any]:
         """获取推荐系统统计信息"""
         return {
             "total_media_items": len(self.media_items),
-            "embeddings_count": len(self.embeddings),
+            "embeddings_count": (
+                self.index_manager.ntotal
+                if self.index_manager is not None
+                else len(self.embeddings)
+            ),
+            "index": (
+                self.index_manager.get_stats()
+                if self.index_manager is not None
+                else None
+            ),
+            "catalog": self.catalog.get_stats(),
+            "users_with_preferences": len(self.user_preferences),
+            "interaction_writer": (
+                self.interaction_writer.get_stats()
+                if self.interaction_writer is not None
+                else None
+            ),
+            "embedding_store": (
+                self.embedding_store.get_stats()
+                if self.embedding_store is not None
+                else None
+            ),
             "is_initialized": self.is_initialized,
             "model_name": self.model_name,
             "config": self.config,
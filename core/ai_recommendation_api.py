@@ -566,5 +566,12 @@ async def startup_event():
         logger.error(f"AI推荐系统启动失败: {e}")
 
 
+@router.on_event("shutdown")
+async def shutdown_event():
+    """应用关闭时保存向量索引并写入剩余交互"""
+    if recommender is not None:
+        recommender.close()
+
+
 # 导出路由
 __all__ = ["router"]
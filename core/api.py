@@ -27,6 +27,7 @@ from .api_plugins import router as plugins_router
 from .api_performance import router as performance_router
 from .api_websocket import router as websocket_router
 from .ai_recommendation_api import router as ai_recommendation_router
+from .ai_recommendation import preload_dependencies
 from .api_subscription import router as subscription_router
 from .api_file_organizer import router as file_organizer_router
 
@@ -163,6 +164,9 @@ class VabHubAPI:
         # 记录API启动信息
         self.app.add_event_handler("startup", self._log_startup_info)
 
+        # 按配置在后台预加载AI依赖
+        self.app.add_event_handler("startup", self._preload_ai_dependencies)
+
     async def _log_startup_info(self):
         """记录API启动信息"""
         self.logger.info(
@@ -173,6 +177,14 @@ class VabHubAPI:
             },
         )
 
+    async def _preload_ai_dependencies(self):
+        """启动后在后台线程导入推荐系统的重量级依赖，首个请求不再等待导入
+
+        各模块的导入耗时在预加载完成时记录到日志
+        """
+        if getattr(self.config, "AI_PRELOAD", False):
+            preload_dependencies(background=True)
+
     def _setup_routes(self):
         """Setup API routes"""
 
@@ -8,6 +8,7 @@ from pathlib import Path
 
 from .file_organizer import FileOrganizer, OrganizationRule, FileAction, MediaType
 from .auth import get_current_user
+from .config import Config
 
 router = APIRouter(prefix="/file-organizer", tags=["File Organizer"])
 
@@ -21,7 +22,9 @@ def get_file_organizer():
     if file_organizer is None:
         # 使用当前工作目录作为基础路径
         base_path = Path.cwd()
-        file_organizer = FileOrganizer(str(base_path))
+        file_organizer = FileOrganizer(
+            str(base_path), index_path=Config().LIBRARY_INDEX_PATH or None
+        )
     return file_organizer
 
 
@@ -66,6 +66,7 @@ class FindDuplicatesRequest(BaseModel):
 
 class FindDuplicatesResponse(BaseModel):
     duplicates: List[Tuple[str, str]]
+    clusters: List[Dict[str, Any]] = []
 
 
 class CleanupRequest(BaseModel):
@@ -142,8 +143,13 @@ async def batch_rename(request: BatchRenameRequest):
 @router.post("/find-duplicates", response_model=FindDuplicatesResponse)
 async def find_duplicates(request: FindDuplicatesRequest):
     """查找重复文件"""
-    duplicates = path_manager.find_duplicates(request.directory)
-    return FindDuplicatesResponse(duplicates=duplicates)
+    clusters = path_manager.find_duplicate_clusters(request.directory)
+    duplicates = [
+        (cluster.paths[0], other) for cluster in clusters for other in cluster.paths[1:]
+    ]
+    return FindDuplicatesResponse(
+        duplicates=duplicates, clusters=[cluster.to_dict() for cluster in clusters]
+    )
 
 
 @router.post("/cleanup", response_model=CleanupResponse)
@@ -32,6 +32,28 @@ class PerformanceAnalysisResponse(BaseModel):
     metrics_summary: Dict[str, Dict[str, float]]
 
 
+class LatencyHistogramResponse(BaseModel):
+    """操作延迟直方图响应模型"""
+
+    count: int
+    avg_ms: float
+    max_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    buckets: Dict[str, int]
+
+
+class NamespaceStatsResponse(BaseModel):
+    """缓存命名空间统计响应模型"""
+
+    hits: int
+    misses: int
+    sets: int
+    deletes: int
+    evictions: int
+
+
 class CacheStatsResponse(BaseModel):
     """缓存统计响应模型"""
 
@@ -41,6 +63,9 @@ class CacheStatsResponse(BaseModel):
     size: int
     max_size: int
     hit_rate: float
+    evictions: Dict[str, int] = {}
+    latency: Dict[str, LatencyHistogramResponse] = {}
+    namespaces: Dict[str, NamespaceStatsResponse] = {}
 
 
 router = APIRouter(prefix="/api/performance", tags=["performance"])
@@ -94,12 +119,7 @@ async def get_cache_stats():
         response = {}
         for level, stats in cache_stats.items():
             response[level.value] = CacheStatsResponse(
-                level=level.value,
-                hits=stats.hits,
-                misses=stats.misses,
-                size=stats.size,
-                max_size=stats.max_size,
-                hit_rate=stats.hit_rate,
+                level=level.value, **stats.to_dict()
             )
 
         return response
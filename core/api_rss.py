@@ -36,6 +36,12 @@ async def get_feeds():
     return [{"name": name, **info} for name, info in rss_manager.feeds.items()]
 
 
+@router.get("/feeds/schedule", response_model=Dict[str, Dict[str, Any]])
+async def get_feed_schedule():
+    """获取RSS源调度状态"""
+    return rss_manager.scheduler.get_status()
+
+
 @router.post("/rules", response_model=Dict[str, Any])
 async def add_rule(
     rule: RSSRule,
@@ -0,0 +1,620 @@
+"""
+批量文件操作执行器
+先规划全部操作并一次性检测目标冲突，再并行执行：同一文件系统内的重命名、链接在有界
+线程池中执行，跨设备复制按 (源设备, 目标设备) 分组、按路径顺序流式执行；
+配置日志后每个操作的进度都会记录到 SQLite，中断的任务可以继续执行或回滚
+"""
+
+import errno
+import logging
+import os
+import queue
+import shutil
+import sqlite3
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import zip_longest
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+ACTION_MOVE = "move"
+ACTION_RENAME = "rename"
+ACTION_COPY = "copy"
+ACTION_HARDLINK = "hardlink"
+ACTION_SYMLINK = "symlink"
+ACTIONS = frozenset(
+    {ACTION_MOVE, ACTION_RENAME, ACTION_COPY, ACTION_HARDLINK, ACTION_SYMLINK}
+)
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
+STATUS_ROLLED_BACK = "rolled_back"
+
+# 目标冲突处理：追加序号、跳过、覆盖已存在的文件（批次内的重复目标总是跳过后者）
+CONFLICT_RENAME = "rename"
+CONFLICT_SKIP = "skip"
+CONFLICT_OVERWRITE = "overwrite"
+
+# 每个线程池任务处理的操作数
+_FAST_CHUNK = 64
+_COPY_CHUNK = 16
+
+# 日志至少每隔这么多操作或秒数提交一次
+_JOURNAL_COMMIT_EVERY = 256
+_JOURNAL_COMMIT_INTERVAL = 1.0
+
+# 进度回调：(已完成数, 总数)
+ProgressCallback = Callable[[int, int], None]
+
+
+@dataclass
+class FileOperation:
+    """单个文件操作"""
+
+    source: str
+    target: str
+    action: str = ACTION_MOVE
+    status: str = STATUS_PENDING
+    error: Optional[str] = None
+    op_id: Optional[int] = None
+
+    def __post_init__(self):
+        if self.action not in ACTIONS:
+            raise ValueError(f"Unsupported file action: {self.action}")
+        self.source = os.fspath(self.source)
+        self.target = os.fspath(self.target)
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == STATUS_DONE
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        return {
+            "source": self.source,
+            "target": self.target,
+            "action": self.action,
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+def _path_key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def plan_operations(
+    operations: Iterable[FileOperation],
+    on_conflict: str = CONFLICT_RENAME,
+    suffix_format: str = "_{:02d}",
+) -> List[FileOperation]:
+    """
+    规划批量操作，一次遍历检测所有目标冲突
+
+    每个目标目录只列出一次，与批次内已占用的目标一起判断冲突，不再逐个文件检查存在性。
+
+    Args:
+        operations: 待执行的操作
+        on_conflict: 冲突处理方式（rename / skip / overwrite）
+        suffix_format: rename 时追加在文件名主干后的序号格式
+
+    Returns:
+        规划后的操作列表（冲突的操作被改写目标或标记为 skipped）
+    """
+    if on_conflict not in (CONFLICT_RENAME, CONFLICT_SKIP, CONFLICT_OVERWRITE):
+        raise ValueError(f"Unsupported conflict policy: {on_conflict}")
+
+    planned = list(operations)
+    listings: Dict[str, Set[str]] = {}
+    claimed: Set[str] = set()
+
+    def exists(path: str) -> bool:
+        directory, name = os.path.split(os.path.abspath(path))
+        names = listings.get(directory)
+        if names is None:
+            try:
+                names = {os.path.normcase(n) for n in os.listdir(directory)}
+            except OSError:
+                names = set()
+            listings[directory] = names
+        return os.path.normcase(name) in names
+
+    def taken(path: str) -> bool:
+        if _path_key(path) in claimed:
+            return True
+        return on_conflict != CONFLICT_OVERWRITE and exists(path)
+
+    for op in planned:
+        if op.status != STATUS_PENDING:
+            continue
+        if _path_key(op.source) == _path_key(op.target):
+            # 移动到原位置视为已完成，复制或链接到自身无法执行
+            if op.action in (ACTION_MOVE, ACTION_RENAME):
+                op.status = STATUS_DONE
+                claimed.add(_path_key(op.target))
+            else:
+                op.status = STATUS_SKIPPED
+                op.error = "源路径与目标路径相同"
+            continue
+
+        if taken(op.target):
+            if on_conflict == CONFLICT_RENAME:
+                stem, ext = os.path.splitext(op.target)
+                counter = 1
+                candidate = f"{stem}{suffix_format.format(counter)}{ext}"
+                while taken(candidate):
+                    counter += 1
+                    candidate = f"{stem}{suffix_format.format(counter)}{ext}"
+                op.target = candidate
+            else:
+                op.status = STATUS_SKIPPED
+                op.error = f"目标已存在: {op.target}"
+                continue
+
+        claimed.add(_path_key(op.target))
+
+    return planned
+
+
+def _part_path(target: str) -> str:
+    """跨设备复制时的临时文件，完成后原子替换为目标文件"""
+    directory, name = os.path.split(target)
+    return os.path.join(directory, f".{name}.vabhub-part")
+
+
+def _copy_then_replace(source: str, target: str):
+    part = _part_path(target)
+    try:
+        shutil.copy2(source, part)
+        os.replace(part, target)
+    except BaseException:
+        if os.path.lexists(part):
+            os.unlink(part)
+        raise
+
+
+def _apply(op: FileOperation, cross_device: bool):
+    """执行单个操作，结果写回 op.status / op.error"""
+    try:
+        if op.action == ACTION_COPY:
+            _copy_then_replace(op.source, op.target)
+        elif op.action == ACTION_MOVE and cross_device:
+            _copy_then_replace(op.source, op.target)
+            os.unlink(op.source)
+        elif op.action in (ACTION_MOVE, ACTION_RENAME):
+            try:
+                os.rename(op.source, op.target)
+            except OSError as e:
+                # 同一文件系统的不同挂载点（如 bind mount）之间设备号相同也无法重命名
+                if e.errno != errno.EXDEV:
+                    raise
+                _copy_then_replace(op.source, op.target)
+                os.unlink(op.source)
+        else:
+            # 规划阶段允许覆盖时目标可能已存在，链接不能直接覆盖
+            if os.path.lexists(op.target):
+                os.unlink(op.target)
+            if op.action == ACTION_HARDLINK:
+                os.link(op.source, op.target)
+            else:
+                os.symlink(op.source, op.target)
+        op.status = STATUS_DONE
+        op.error = None
+    except Exception as e:
+        op.status = STATUS_FAILED
+        op.error = str(e)
+        logger.error(
+            f"Error performing {op.action} from {op.source} to {op.target}: {e}"
+        )
+
+
+def _already_applied(op: FileOperation) -> bool:
+    """判断日志中未完成的操作在中断前是否其实已经执行"""
+    try:
+        if op.action in (ACTION_MOVE, ACTION_RENAME):
+            return not os.path.lexists(op.source) and os.path.lexists(op.target)
+        if op.action == ACTION_HARDLINK:
+            return os.path.exists(op.target) and os.path.samefile(op.source, op.target)
+        if op.action == ACTION_SYMLINK:
+            return os.path.islink(op.target) and os.readlink(op.target) == op.source
+    except OSError:
+        pass
+    # 复制通过临时文件原子替换，重新执行即可
+    return False
+
+
+class BatchJournal:
+    """批量操作日志（SQLite），只在协调线程中访问"""
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL").fetchone()
+        with self.conn:
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS operations (
+                    id INTEGER PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    error TEXT
+                );
+                CREATE TABLE IF NOT EXISTS created_dirs (path TEXT PRIMARY KEY);
+            """
+            )
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+    def unfinished(self) -> int:
+        """尚未执行的操作数（任务被中断）"""
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM operations WHERE status = ?", (STATUS_PENDING,)
+        ).fetchone()
+        return row[0]
+
+    def start(self, operations: List[FileOperation]):
+        """开始新任务：清空旧日志并写入全部操作"""
+        if self.unfinished():
+            raise RuntimeError(
+                f"Journal {self.path} has unfinished operations; resume or roll back first"
+            )
+        with self.conn:
+            self.conn.execute("DELETE FROM operations")
+            self.conn.execute("DELETE FROM created_dirs")
+            for op_id, op in enumerate(operations):
+                op.op_id = op_id
+            self.conn.executemany(
+                "INSERT INTO operations (id, source, target, action, status, error) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (op.op_id, op.source, op.target, op.action, op.status, op.error)
+                    for op in operations
+                ],
+            )
+
+    def load(self) -> List[FileOperation]:
+        rows = self.conn.execute(
+            "SELECT id, source, target, action, status, error FROM operations "
+            "ORDER BY id"
+        ).fetchall()
+        return [
+            FileOperation(source, target, action, status, error, op_id)
+            for op_id, source, target, action, status, error in rows
+        ]
+
+    def record_dirs(self, paths: Iterable[str]):
+        """在创建目录之前记录，回滚时删除"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO created_dirs (path) VALUES (?)",
+                [(path,) for path in paths],
+            )
+
+    def created_dirs(self) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT path FROM created_dirs")]
+
+    def update(self, op: FileOperation):
+        """记录操作状态，按数量或时间批量提交"""
+        if op.op_id is None:
+            return
+        self.conn.execute(
+            "UPDATE operations SET target = ?, status = ?, error = ? WHERE id = ?",
+            (op.target, op.status, op.error, op.op_id),
+        )
+        self._uncommitted += 1
+        if (
+            self._uncommitted >= _JOURNAL_COMMIT_EVERY
+            or time.monotonic() - self._last_commit >= _JOURNAL_COMMIT_INTERVAL
+        ):
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+    def close(self):
+        try:
+            self.commit()
+            self.conn.close()
+        except Exception as e:
+            logger.error(f"Error closing batch journal {self.path}: {e}")
+
+
+class BatchExecutor:
+    """
+    并行批量文件操作执行器
+
+    同一设备内的移动/重命名（os.rename）和链接在 ``workers`` 个线程中分块执行；
+    复制和跨设备移动按 (源设备, 目标设备) 分组、组内按源路径排序，由 ``copy_workers``
+    个线程流式执行，不同设备组交替推进。中断后日志中已执行但未记录的操作在继续执行时
+    会被识别出来，不会重复执行。
+    """
+
+    def __init__(self, workers: int = 8, copy_workers: int = 4):
+        self.workers = max(1, workers)
+        self.copy_workers = max(1, copy_workers)
+
+    def execute(
+        self,
+        operations: Iterable[FileOperation],
+        journal_path: Optional[Union[str, os.PathLike]] = None,
+        progress: Optional[ProgressCallback] = None,
+    ) -> List[FileOperation]:
+        """
+        执行已规划的操作（见 ``plan_operations``）
+
+        Args:
+            operations: 操作列表，只执行状态为 pending 的操作
+            journal_path: 日志路径，配置后可在中断后 ``resume`` 或 ``rollback``
+            progress: 进度回调
+
+        Returns:
+            操作列表（状态已更新）
+        """
+        operations = list(operations)
+        journal = BatchJournal(journal_path) if journal_path else None
+        try:
+            if journal is not None:
+                journal.start(operations)
+            pending = [op for op in operations if op.status == STATUS_PENDING]
+            self._run(pending, journal, progress)
+        finally:
+            if journal is not None:
+                journal.close()
+        return operations
+
+    def resume(
+        self,
+        journal_path: Union[str, os.PathLike],
+        progress: Optional[ProgressCallback] = None,
+    ) -> List[FileOperation]:
+        """继续执行日志中未完成或失败的操作"""
+        journal = BatchJournal(journal_path)
+        try:
+            operations = journal.load()
+            remaining = []
+            for op in operations:
+                if op.status not in (STATUS_PENDING, STATUS_FAILED):
+                    continue
+                if _already_applied(op):
+                    op.status, op.error = STATUS_DONE, None
+                    journal.update(op)
+                    continue
+                part = _part_path(op.target)
+                if os.path.lexists(part):
+                    os.unlink(part)
+                op.status, op.error = STATUS_PENDING, None
+                remaining.append(op)
+            journal.commit()
+            self._run(remaining, journal, progress)
+        finally:
+            journal.close()
+        return operations
+
+    def rollback(self, journal_path: Union[str, os.PathLike]) -> List[FileOperation]:
+        """
+        按相反顺序撤销日志中已完成的操作，并删除任务创建的空目录
+
+        移动/重命名移回原位置，复制和链接删除目标；覆盖掉的原有目标文件无法恢复。
+        """
+        journal = BatchJournal(journal_path)
+        try:
+            operations = journal.load()
+            for op in reversed(operations):
+                # 移动到原位置的操作规划时即记为完成，没有需要撤销的内容
+                if _path_key(op.source) == _path_key(op.target):
+                    continue
+                part = _part_path(op.target)
+                if os.path.lexists(part):
+                    os.unlink(part)
+                if op.status in (STATUS_PENDING, STATUS_FAILED) and _already_applied(
+                    op
+                ):
+                    op.status = STATUS_DONE
+                if op.status != STATUS_DONE:
+                    continue
+                try:
+                    if op.action in (ACTION_MOVE, ACTION_RENAME):
+                        if os.path.lexists(op.source):
+                            raise FileExistsError(f"源路径已被占用: {op.source}")
+                        shutil.move(op.target, op.source)
+                    elif os.path.lexists(op.target):
+                        os.unlink(op.target)
+                    op.status, op.error = STATUS_ROLLED_BACK, None
+                except Exception as e:
+                    op.error = str(e)
+                    logger.error(f"Error rolling back {op.action} to {op.target}: {e}")
+                journal.update(op)
+
+            # 由深到浅删除，非空目录保留
+            for directory in sorted(journal.created_dirs(), key=len, reverse=True):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    pass
+        finally:
+            journal.close()
+        return operations
+
+    # ------------------------------------------------------------------
+    # 执行
+    # ------------------------------------------------------------------
+
+    def _run(
+        self,
+        operations: List[FileOperation],
+        journal: Optional[BatchJournal],
+        progress: Optional[ProgressCallback],
+    ):
+        total = len(operations)
+        if not total:
+            return
+
+        runnable = self._prepare_dirs(operations, journal)
+        finished: "queue.SimpleQueue[FileOperation]" = queue.SimpleQueue()
+        fast, copy_groups = self._classify(runnable)
+
+        # 目标目录创建失败的操作已经完成（失败）
+        done = 0
+        for op in operations:
+            if op.status == STATUS_FAILED:
+                done += 1
+                if journal is not None:
+                    journal.update(op)
+        if progress and done:
+            progress(done, total)
+
+        def run_chunk(chunk: List[Tuple[FileOperation, bool]]):
+            for op, cross_device in chunk:
+                _apply(op, cross_device)
+                finished.put(op)
+
+        if self.workers == 1 and self.copy_workers == 1:
+            run_chunk([(op, False) for op in fast])
+            for group in copy_groups:
+                run_chunk(group)
+            futures: List[Future] = []
+            pools: List[ThreadPoolExecutor] = []
+        else:
+            fast_pool = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="batch-op"
+            )
+            copy_pool = ThreadPoolExecutor(
+                max_workers=self.copy_workers, thread_name_prefix="batch-copy"
+            )
+            pools = [fast_pool, copy_pool]
+            futures = [
+                fast_pool.submit(
+                    run_chunk, [(op, False) for op in fast[i : i + _FAST_CHUNK]]
+                )
+                for i in range(0, len(fast), _FAST_CHUNK)
+            ]
+            # 各设备组切成按路径连续的小块，交替提交，不同设备组同时推进
+            chunked = [
+                [group[i : i + _COPY_CHUNK] for i in range(0, len(group), _COPY_CHUNK)]
+                for group in copy_groups
+            ]
+            for round_chunks in zip_longest(*chunked):
+                for chunk in round_chunks:
+                    if chunk:
+                        futures.append(copy_pool.submit(run_chunk, chunk))
+
+        try:
+            while done < total:
+                try:
+                    op = finished.get(timeout=0.5)
+                except queue.Empty:
+                    if all(future.done() for future in futures) and finished.empty():
+                        break
+                    continue
+                done += 1
+                if journal is not None:
+                    journal.update(op)
+                if progress:
+                    progress(done, total)
+            for future in futures:
+                future.result()
+        finally:
+            for pool in pools:
+                pool.shutdown(wait=True)
+            if journal is not None:
+                journal.commit()
+
+    def _prepare_dirs(
+        self, operations: List[FileOperation], journal: Optional[BatchJournal]
+    ) -> List[FileOperation]:
+        """创建全部目标目录（每个目录一次），返回目录就绪的操作"""
+        parents = {os.path.dirname(os.path.abspath(op.target)) for op in operations}
+
+        if journal is not None:
+            # 先记录将要新建的目录，回滚时删除
+            missing: Set[str] = set()
+            existing: Set[str] = set()
+            for parent in parents:
+                path = parent
+                chain = []
+                while path not in existing and not os.path.isdir(path):
+                    chain.append(path)
+                    head = os.path.dirname(path)
+                    if head == path:
+                        break
+                    path = head
+                existing.add(path)
+                missing.update(chain)
+            if missing:
+                journal.record_dirs(missing)
+
+        failed_dirs: Dict[str, str] = {}
+        for parent in sorted(parents):
+            try:
+                os.makedirs(parent, exist_ok=True)
+            except OSError as e:
+                failed_dirs[parent] = str(e)
+                logger.error(f"Error creating directory {parent}: {e}")
+
+        runnable = []
+        for op in operations:
+            error = failed_dirs.get(os.path.dirname(os.path.abspath(op.target)))
+            if error is None:
+                runnable.append(op)
+            else:
+                op.status, op.error = STATUS_FAILED, error
+        return runnable
+
+    def _classify(
+        self, operations: List[FileOperation]
+    ) -> Tuple[List[FileOperation], List[List[Tuple[FileOperation, bool]]]]:
+        """分成同设备的快速操作和按设备对分组的复制操作"""
+        devices: Dict[str, Optional[int]] = {}
+
+        def device(path: str) -> Optional[int]:
+            directory = os.path.dirname(os.path.abspath(path))
+            if directory not in devices:
+                try:
+                    devices[directory] = os.stat(directory).st_dev
+                except OSError:
+                    devices[directory] = None
+            return devices[directory]
+
+        fast: List[FileOperation] = []
+        groups: Dict[Tuple[Optional[int], Optional[int]], List[FileOperation]] = {}
+        for op in operations:
+            if op.action in (ACTION_RENAME, ACTION_HARDLINK, ACTION_SYMLINK):
+                fast.append(op)
+                continue
+            source_dev, target_dev = device(op.source), device(op.target)
+            if op.action == ACTION_MOVE and (
+                source_dev == target_dev or source_dev is None
+            ):
+                # 源目录不可读时直接 rename，由其报告真实错误
+                fast.append(op)
+            else:
+                groups.setdefault((source_dev, target_dev), []).append(op)
+
+        copy_groups = []
+        for ops in groups.values():
+            ops.sort(key=lambda op: op.source)
+            copy_groups.append([(op, op.action == ACTION_MOVE) for op in ops])
+        return fast, copy_groups
+
+
+def run_batch(
+    operations: Iterable[FileOperation],
+    on_conflict: str = CONFLICT_RENAME,
+    suffix_format: str = "_{:02d}",
+    journal_path: Optional[Union[str, os.PathLike]] = None,
+    workers: int = 8,
+    copy_workers: int = 4,
+    progress: Optional[ProgressCallback] = None,
+) -> List[FileOperation]:
+    """规划并执行一批操作"""
+    planned = plan_operations(operations, on_conflict, suffix_format)
+    return BatchExecutor(workers, copy_workers).execute(planned, journal_path, progress)
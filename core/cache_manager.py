@@ -5,14 +5,24 @@ VabHub 缓存管理器
 """
 
 import asyncio
+import bisect
+import functools
+import heapq
 import json
 import logging
+import math
+import pickle
+import random
+import sqlite3
+import sys
 import time
+import zlib
 from abc import ABC, abstractmethod
 from collections import OrderedDict
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional, Callable
+from typing import Any, Dict, List, Optional, Callable, Tuple
 from pathlib import Path
 
 from typing import TYPE_CHECKING
@@ -25,6 +35,26 @@ else:
     except ImportError:
         redis = None
 
+# 可选依赖：msgpack 序列化与 zstd/lz4 压缩
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+
+# 带刷新元数据的缓存值标记（用于 stale-while-revalidate 与提前刷新）
+ENVELOPE_MARKER = "__vabhub_cache_envelope__"
+
 
 class CacheLevel(Enum):
     """缓存级别"""
@@ -42,6 +72,76 @@ class CachePolicy(Enum):
     FIFO = "fifo"  # 先进先出
 
 
+class TierPolicy(Enum):
+    """多级缓存层间策略"""
+
+    INCLUSIVE = "inclusive"  # 包含式：提升到上层后下层保留副本
+    EXCLUSIVE = "exclusive"  # 独占式：提升到最上层后从来源层删除
+
+
+class LatencyHistogram:
+    """操作延迟直方图（毫秒，按对数间隔分桶）"""
+
+    BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self):
+        # 最后一个桶统计超过最大边界的样本
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float):
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, percent: float) -> float:
+        """返回分位数所在桶的上界（毫秒）"""
+        if not self.count:
+            return 0.0
+        threshold = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= threshold and count:
+                if index < len(self.BOUNDS_MS):
+                    return min(float(self.BOUNDS_MS[index]), self.max_ms)
+                break
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        buckets = {
+            f"le_{bound}": count for bound, count in zip(self.BOUNDS_MS, self.counts)
+        }
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "avg_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets": buckets,
+        }
+
+
+@dataclass
+class NamespaceStats:
+    """单个键命名空间（``:`` 之前的前缀）的统计"""
+
+    hits: int = 0
+    misses: int = 0
+    sets: int = 0
+    deletes: int = 0
+    evictions: int = 0
+
+
 @dataclass
 class CacheStats:
     """缓存统计信息"""
@@ -51,11 +151,58 @@ class CacheStats:
     size: int = 0
     max_size: int = 0
     hit_rate: float = 0.0
+    # 淘汰原因 -> 次数
+    evictions: Dict[str, int] = field(default_factory=dict)
+    # 操作 -> 延迟直方图
+    latency: Dict[str, LatencyHistogram] = field(default_factory=dict)
+    # 命名空间 -> 统计
+    namespaces: Dict[str, NamespaceStats] = field(default_factory=dict)
+
+    # 命名空间数量上限，超出后归入 "other"，避免键设计不当导致统计无限增长
+    MAX_NAMESPACES = 256
+
+    def record_latency(self, operation: str, seconds: float):
+        histogram = self.latency.get(operation)
+        if histogram is None:
+            histogram = self.latency[operation] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def namespace(self, key: str) -> NamespaceStats:
+        name = key.split(":", 1)[0] if ":" in key else "default"
+        stats = self.namespaces.get(name)
+        if stats is None:
+            if len(self.namespaces) >= self.MAX_NAMESPACES:
+                name = "other"
+                stats = self.namespaces.get(name)
+            if stats is None:
+                stats = self.namespaces[name] = NamespaceStats()
+        return stats
+
+    def record_eviction(self, key: str, reason: str):
+        self.evictions[reason] = self.evictions.get(reason, 0) + 1
+        self.namespace(key).evictions += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": self.size,
+            "max_size": self.max_size,
+            "hit_rate": self.hit_rate,
+            "evictions": dict(self.evictions),
+            "latency": {op: h.to_dict() for op, h in self.latency.items()},
+            "namespaces": {
+                name: asdict(stats) for name, stats in self.namespaces.items()
+            },
+        }
 
 
 class CacheBackend(ABC):
     """缓存后端抽象基类"""
 
+    # 淘汰回调 (键, 原因)，由 CacheManager 设置用于统计
+    on_evict: Optional[Callable[[str, str], None]] = None
+
     @abstractmethod
     async def get(self, key: str) -> Optional[Any]:
         """获取缓存值"""
@@ -119,125 +266,279 @@ class CacheBackend(ABC):
         """获取内存使用情况"""
         return {}
 
+    def entry_count(self) -> Optional[int]:
+        """当前条目数，无法低成本获得时返回 None"""
+        return None
+
     async def close(self) -> None:
         """关闭连接"""
         pass
 
 
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """估算值占用的字节数（对常见容器递归统计，深度有限）"""
+    size = sys.getsizeof(value)
+    if _depth >= 4:
+        return size
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for v in value:
+            size += estimate_size(v, _depth + 1)
+    return size
+
+
+class CacheEntry:
+    """内存缓存条目"""
+
+    __slots__ = ("value", "created", "accessed", "hits", "expires", "size")
+
+    def __init__(self, value: Any, created: float, expires: Optional[float], size: int):
+        self.value = value
+        self.created = created
+        self.accessed = created
+        self.hits = 0
+        self.expires = expires
+        self.size = size
+
+
 class MemoryCacheBackend(CacheBackend):
-    """内存缓存后端"""
+    """内存缓存后端
 
-    def __init__(self, max_size: int = 1000, policy: CachePolicy = CachePolicy.LRU):
+    每个键只对应一个 ``__slots__`` 条目对象，值与元数据存放在一起。
+    所有淘汰策略均为 O(1)：LRU/FIFO 使用有序字典，LFU 使用按访问次数分桶的有序字典。
+    TTL 采用惰性过期：读取时检查过期时间，写入时从过期堆顶批量清理，不为每个键创建任务。
+    除条目数上限 ``max_size`` 外，可选按估算字节数限制容量（``max_bytes``）。
+    """
+
+    # 每次写入最多顺带清理的过期键数量
+    EXPIRE_BATCH = 16
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        policy: CachePolicy = CachePolicy.LRU,
+        max_bytes: Optional[int] = None,
+        size_estimator: Callable[[Any], int] = estimate_size,
+    ):
         self.max_size = max_size
         self.policy = policy
-        self._cache: Dict[str, Any] = {}
-        self._access_times: Dict[str, float] = {}
-        self._access_counts: Dict[str, int] = {}
-        self._creation_times: Dict[str, float] = {}
+        self.max_bytes = max_bytes
+        self.size_estimator = size_estimator
+        self.current_bytes = 0
+
+        # LRU：按最近访问排序；FIFO：按创建排序；LFU：顺序由频率桶维护
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+
+        # LFU：访问次数 -> 该次数下的键（按进入顺序）
+        self._freq_buckets: Dict[int, OrderedDict[str, None]] = {}
+        self._min_freq = 0
+
+        # TTL：(过期时间, 键) 最小堆，过时项在弹出时与条目比对丢弃
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._ttl_count = 0
+
+    def _purge_expired(self, now: float, limit: Optional[int] = None):
+        """从过期堆顶清理已过期的键"""
+        heap = self._expiry_heap
+        purged = 0
+        while heap and heap[0][0] <= now:
+            expires, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires == expires:
+                self._remove(key, "expired")
+            purged += 1
+            if limit is not None and purged >= limit:
+                break
+
+    def _bucket_add(self, key: str, freq: int):
+        bucket = self._freq_buckets.get(freq)
+        if bucket is None:
+            bucket = self._freq_buckets[freq] = OrderedDict()
+        bucket[key] = None
+
+    def _bucket_remove(self, key: str, freq: int):
+        bucket = self._freq_buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._freq_buckets[freq]
+
+    def _remove(self, key: str, reason: Optional[str] = None) -> bool:
+        """删除键及其元数据，reason 不为空时视为淘汰并通知回调"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+
+        if reason is not None and self.on_evict is not None:
+            self.on_evict(key, reason)
+        self.current_bytes -= entry.size
+        if entry.expires is not None:
+            self._ttl_count -= 1
+        if self.policy == CachePolicy.LFU:
+            self._bucket_remove(key, entry.hits)
+        return True
+
+    def _evict_one(self, reason: str):
+        """按策略淘汰一个键"""
+        if not self._entries:
+            return
+
+        if self.policy == CachePolicy.LFU:
+            # LFU策略：淘汰使用频率最低的键中最早进入该频率的
+            bucket = self._freq_buckets.get(self._min_freq)
+            if bucket is None:
+                # 显式删除或过期可能清空最低频率桶，此时重新定位
+                self._min_freq = min(self._freq_buckets)
+                bucket = self._freq_buckets[self._min_freq]
+            victim = next(iter(bucket))
+        else:
+            # LRU：最久未使用；FIFO：最早创建
+            victim = next(iter(self._entries))
+        self._remove(victim, reason)
 
-        if policy == CachePolicy.LRU:
-            self._order: OrderedDict[str, float] = OrderedDict()
+    def _over_capacity(self, extra_bytes: int) -> bool:
+        if len(self._entries) >= self.max_size:
+            return True
+        return (
+            self.max_bytes is not None
+            and self.current_bytes + extra_bytes > self.max_bytes
+        )
 
     async def get(self, key: str) -> Optional[Any]:
-        if key not in self._cache:
+        entry = self._entries.get(key)
+        if entry is None:
             return None
 
-        # 更新访问信息
         current_time = time.time()
-        self._access_times[key] = current_time
-        self._access_counts[key] = self._access_counts.get(key, 0) + 1
+        if entry.expires is not None and entry.expires <= current_time:
+            self._remove(key, "expired")
+            return None
+
+        # 更新访问信息
+        entry.accessed = current_time
+        count = entry.hits
+        entry.hits = count + 1
 
         if self.policy == CachePolicy.LRU:
-            self._order.move_to_end(key)
+            self._entries.move_to_end(key)
+        elif self.policy == CachePolicy.LFU:
+            self._bucket_remove(key, count)
+            self._bucket_add(key, count + 1)
+            if self._min_freq == count and count not in self._freq_buckets:
+                self._min_freq = count + 1
 
-        return self._cache[key]
+        return entry.value
 
     async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
-        # 检查是否需要淘汰
-        if len(self._cache) >= self.max_size:
-            await self._evict()
-
         current_time = time.time()
-        self._cache[key] = value
-        self._access_times[key] = current_time
-        self._access_counts[key] = 0
-        self._creation_times[key] = current_time
+        self._purge_expired(current_time, self.EXPIRE_BATCH)
 
-        if self.policy == CachePolicy.LRU:
-            self._order[key] = current_time
+        size = 0
+        if self.max_bytes is not None:
+            size = self.size_estimator(key) + self.size_estimator(value)
+            if size > self.max_bytes:
+                return False
 
-        # 设置TTL
-        if ttl:
-            asyncio.create_task(self._set_ttl(key, ttl))
+        # 覆盖写入视为重新创建
+        self._remove(key)
 
-        return True
+        # 检查是否需要淘汰
+        if self._over_capacity(size):
+            self._purge_expired(current_time)
+            while self._entries and self._over_capacity(size):
+                self._evict_one(
+                    "max_size" if len(self._entries) >= self.max_size else "max_bytes"
+                )
 
-    async def _set_ttl(self, key: str, ttl: int):
-        """设置TTL过期"""
-        await asyncio.sleep(ttl)
-        if key in self._cache:
-            await self.delete(key)
+        expires = current_time + ttl if ttl else None
+        self._entries[key] = CacheEntry(value, current_time, expires, size)
+        self.current_bytes += size
 
-    async def _evict(self):
-        """淘汰缓存"""
-        if not self._cache:
-            return
+        if self.policy == CachePolicy.LFU:
+            self._bucket_add(key, 0)
+            self._min_freq = 0
 
-        if self.policy == CachePolicy.LRU:
-            # LRU策略：淘汰最久未使用的
-            oldest_key = next(iter(self._order))
-            await self.delete(oldest_key)
-        elif self.policy == CachePolicy.LFU:
-            # LFU策略：淘汰使用频率最低的
-            min_count = min(self._access_counts.values())
-            candidates = [k for k, v in self._access_counts.items() if v == min_count]
-            if candidates:
-                await self.delete(candidates[0])
-        else:  # FIFO
-            # FIFO策略：淘汰最早创建的
-            oldest_time = min(self._creation_times.values())
-            candidates = [
-                k for k, v in self._creation_times.items() if v == oldest_time
-            ]
-            if candidates:
-                await self.delete(candidates[0])
-
-    async def delete(self, key: str) -> bool:
-        if key in self._cache:
-            del self._cache[key]
-            del self._access_times[key]
-            del self._access_counts[key]
-            del self._creation_times[key]
+        # 设置TTL
+        if expires is not None:
+            self._ttl_count += 1
+            heapq.heappush(self._expiry_heap, (expires, key))
+
+            # 覆盖写入和删除会在堆中留下过时项，过多时重建
+            if len(self._expiry_heap) > 2 * self._ttl_count + self.EXPIRE_BATCH:
+                self._expiry_heap = [
+                    (entry.expires, k)
+                    for k, entry in self._entries.items()
+                    if entry.expires is not None
+                ]
+                heapq.heapify(self._expiry_heap)
 
-            if self.policy == CachePolicy.LRU and key in self._order:
-                del self._order[key]
+        return True
 
-            return True
-        return False
+    async def delete(self, key: str) -> bool:
+        return self._remove(key)
 
     async def clear(self) -> bool:
-        self._cache.clear()
-        self._access_times.clear()
-        self._access_counts.clear()
-        self._creation_times.clear()
-        self._order.clear()
+        self._entries.clear()
+        self._freq_buckets.clear()
+        self._min_freq = 0
+        self._expiry_heap.clear()
+        self._ttl_count = 0
+        self.current_bytes = 0
         return True
 
     async def exists(self, key: str) -> bool:
-        return key in self._cache
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        if entry.expires is not None and entry.expires <= time.time():
+            self._remove(key, "expired")
+            return False
+        return True
+
+    def entry_count(self) -> Optional[int]:
+        return len(self._entries)
 
     async def keys(self, pattern: str = "*") -> List[str]:
+        self._purge_expired(time.time())
+
         if pattern == "*":
-            return list(self._cache.keys())
+            return list(self._entries.keys())
 
         # 简单的模式匹配（支持*通配符）
         import fnmatch
 
-        return [k for k in self._cache.keys() if fnmatch.fnmatch(k, pattern)]
+        return [k for k in self._entries.keys() if fnmatch.fnmatch(k, pattern)]
+
+    async def get_memory_usage(self) -> Dict[str, Any]:
+        """获取内存使用情况"""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "bytes": self.current_bytes if self.max_bytes is not None else None,
+            "max_bytes": self.max_bytes,
+        }
 
 
 class RedisCacheBackend(CacheBackend):
-    """Redis缓存后端"""
+    """Redis缓存后端
+
+    值以二进制帧存储：首字节标记序列化方式（pickle 协议5 或 msgpack）与压缩方式，
+    超过 ``compress_threshold`` 字节的值可选用 zstd/lz4 压缩；无帧头的旧 JSON 值仍可读取。
+    ``keys``/``clear`` 使用 SCAN 增量遍历，批量写入使用非事务管道并支持逐键 TTL。
+
+    ``local_cache_size`` 大于0时启用客户端缓存：热点键保存在进程内，
+    本后端的写入/删除通过 Redis 发布订阅广播失效消息，各实例收到后丢弃本地副本；
+    本地副本的有效期不超过 ``local_cache_ttl`` 与键在 Redis 中的剩余 TTL。
+    注意 pickle 值只应写入受信任的 Redis 实例。
+    """
+
+    # 帧头：低2位为压缩方式，第3~4位为序列化方式；均小于0x20，不会与JSON开头冲突
+    _COMPRESS_NONE = 0x00
+    _COMPRESS_ZSTD = 0x01
+    _COMPRESS_LZ4 = 0x02
+    _SERIALIZER_PICKLE = 0x04
+    _SERIALIZER_MSGPACK = 0x08
 
     def __init__(
         self,
@@ -245,64 +546,244 @@ class RedisCacheBackend(CacheBackend):
         prefix: str = "vabhub:",
         max_connections: int = 10,
         health_check_interval: int = 30,
+        serializer: str = "pickle",
+        compression: Optional[str] = None,
+        compress_threshold: int = 1024,
+        scan_count: int = 1000,
+        local_cache_size: int = 0,
+        local_cache_ttl: float = 30.0,
+        client: Optional["redis.Redis"] = None,
     ):
-        if redis is None:
+        if redis is None and client is None:
             raise ImportError("redis package is required for RedisCacheBackend")
-
-        # 创建连接池
-        self.redis_pool: redis.ConnectionPool = redis.ConnectionPool.from_url(
-            redis_url,
-            max_connections=max_connections,
-            health_check_interval=health_check_interval,
-            retry_on_timeout=True,
-        )
-        self.redis = redis.Redis(connection_pool=self.redis_pool)
+        if serializer == "msgpack" and msgpack is None:
+            raise ImportError("msgpack package is required for msgpack serialization")
+        if serializer not in ("pickle", "msgpack"):
+            raise ValueError(f"Unsupported serializer: {serializer}")
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstandard package is required for zstd compression")
+        if compression == "lz4" and lz4_frame is None:
+            raise ImportError("lz4 package is required for lz4 compression")
+        if compression not in (None, "zstd", "lz4"):
+            raise ValueError(f"Unsupported compression: {compression}")
+
+        if client is not None:
+            # 外部传入的客户端（如测试用的 fakeredis）不能开启 decode_responses
+            self.redis_pool = None
+            self.redis = client
+        else:
+            # 创建连接池
+            self.redis_pool: redis.ConnectionPool = redis.ConnectionPool.from_url(
+                redis_url,
+                max_connections=max_connections,
+                health_check_interval=health_check_interval,
+                retry_on_timeout=True,
+            )
+            self.redis = redis.Redis(connection_pool=self.redis_pool)
         self.prefix = prefix
+        self.serializer = serializer
+        self.compression = compression
+        self.compress_threshold = compress_threshold
+        self.scan_count = scan_count
         self.logger = logging.getLogger(__name__)
         self._last_health_check = 0
         self._is_healthy = True
 
-    async def get(self, key: str) -> Optional[Any]:
-        full_key = f"{self.prefix}{key}"
+        if compression == "zstd":
+            self._zstd_compressor = zstandard.ZstdCompressor(level=3)
+            self._zstd_decompressor = zstandard.ZstdDecompressor()
+        elif zstandard is not None:
+            # 即使本实例不压缩，也要能读取其他实例写入的 zstd 值
+            self._zstd_compressor = None
+            self._zstd_decompressor = zstandard.ZstdDecompressor()
+        else:
+            self._zstd_compressor = None
+            self._zstd_decompressor = None
+
+        # 客户端缓存：键 -> (值, 本地过期时间)
+        self.local_cache_size = local_cache_size
+        self.local_cache_ttl = local_cache_ttl
+        self.local_hits = 0
+        self._local: OrderedDict[str, Tuple[Any, float]] = OrderedDict()
+        self._invalidation_channel = f"{prefix}__invalidate__"
+        self._invalidation_seq = 0
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # 序列化
+    # ------------------------------------------------------------------
+
+    def _encode(self, value: Any) -> bytes:
+        if self.serializer == "msgpack":
+            flag = self._SERIALIZER_MSGPACK
+            payload = msgpack.packb(value, use_bin_type=True)
+        else:
+            flag = self._SERIALIZER_PICKLE
+            payload = pickle.dumps(value, protocol=5)
+
+        if self.compression and len(payload) >= self.compress_threshold:
+            if self.compression == "zstd":
+                flag |= self._COMPRESS_ZSTD
+                payload = self._zstd_compressor.compress(payload)
+            else:
+                flag |= self._COMPRESS_LZ4
+                payload = lz4_frame.compress(payload)
+        return bytes((flag,)) + payload
+
+    def _decode(self, data: bytes) -> Any:
+        flag = data[0]
+        if flag >= 0x20:
+            # 旧版 JSON 值
+            try:
+                return json.loads(data)
+            except json.JSONDecodeError:
+                return data.decode()
+
+        payload = memoryview(data)[1:]
+        compression = flag & 0x03
+        if compression == self._COMPRESS_ZSTD:
+            payload = self._zstd_decompressor.decompress(payload)
+        elif compression == self._COMPRESS_LZ4:
+            payload = lz4_frame.decompress(payload)
+
+        if flag & self._SERIALIZER_MSGPACK:
+            return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        return pickle.loads(payload)
+
+    # ------------------------------------------------------------------
+    # 客户端缓存
+    # ------------------------------------------------------------------
+
+    async def _ensure_listener(self) -> bool:
+        """订阅失效频道，失败时关闭客户端缓存"""
+        if self.local_cache_size <= 0:
+            return False
+        if self._listener is not None:
+            return not self._listener.done()
+
         try:
-            value = await self.redis.get(full_key)
-            if value:
-                return json.loads(value)
-            return None
+            self._pubsub = self.redis.pubsub()
+            await self._pubsub.subscribe(self._invalidation_channel)
         except Exception as e:
-            self.logger.error(f"Failed to get Redis cache {full_key}: {e}")
-            return None
+            self.logger.warning(f"Redis client-side caching disabled: {e}")
+            self.local_cache_size = 0
+            return False
+        self._listener = asyncio.create_task(self._listen_invalidations())
+        return True
+
+    async def _listen_invalidations(self):
+        try:
+            async for message in self._pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                self._invalidation_seq += 1
+                data = message["data"]
+                if not data:
+                    self._local.clear()
+                    continue
+                for key in data.decode().split("\n"):
+                    self._local.pop(key, None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 连接中断后无法再收到失效消息，本地副本不再可信
+            self.logger.warning(f"Redis invalidation listener stopped: {e}")
+            self._local.clear()
+            self.local_cache_size = 0
+
+    def _local_get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._local.get(key)
+        if entry is None:
+            return False, None
+        if entry[1] <= time.time():
+            del self._local[key]
+            return False, None
+        self._local.move_to_end(key)
+        self.local_hits += 1
+        return True, entry[0]
+
+    def _local_put(self, key: str, value: Any, pttl: int):
+        ttl = self.local_cache_ttl
+        if pttl is not None and pttl >= 0:
+            ttl = min(ttl, pttl / 1000)
+        self._local[key] = (value, time.time() + ttl)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_cache_size:
+            self._local.popitem(last=False)
+
+    async def _invalidate(self, keys: Optional[List[str]]):
+        """丢弃本地副本并广播失效消息（keys 为 None 表示全部）
+
+        本进程没有客户端缓存时也要广播，其他进程可能缓存了这些键。
+        """
+        self._invalidation_seq += 1
+        if self._local:
+            if keys is None:
+                self._local.clear()
+            else:
+                for key in keys:
+                    self._local.pop(key, None)
+        payload = "" if keys is None else "\n".join(keys)
+        try:
+            await self.redis.publish(self._invalidation_channel, payload)
+        except Exception as e:
+            self.logger.error(f"Failed to publish Redis cache invalidation: {e}")
+
+    # ------------------------------------------------------------------
+    # 基本操作
+    # ------------------------------------------------------------------
+
+    async def get(self, key: str) -> Optional[Any]:
+        result = await self.batch_get([key])
+        return result.get(key)
 
     async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
         full_key = f"{self.prefix}{key}"
         try:
-            value_str = json.dumps(value, ensure_ascii=False)
-            await self.redis.set(full_key, value_str, ex=ttl)
-            return True
+            await self.redis.set(full_key, self._encode(value), ex=ttl)
         except Exception as e:
             self.logger.error(f"Failed to set Redis cache {full_key}: {e}")
             return False
+        await self._invalidate([key])
+        return True
 
     async def delete(self, key: str) -> bool:
         full_key = f"{self.prefix}{key}"
         try:
             result = await self.redis.delete(full_key)
-            return result > 0
         except Exception as e:
             self.logger.error(f"Failed to delete Redis cache {full_key}: {e}")
             return False
+        await self._invalidate([key])
+        return result > 0
+
+    async def _scan(self, pattern: str):
+        """使用 SCAN 增量遍历匹配的完整键，不阻塞 Redis"""
+        async for full_key in self.redis.scan_iter(
+            match=f"{self.prefix}{pattern}", count=self.scan_count
+        ):
+            yield full_key
 
     async def clear(self) -> bool:
         try:
-            keys = await self.redis.keys(f"{self.prefix}*")
-            if keys:
-                await self.redis.delete(*keys)
-            return True
+            batch = []
+            async for full_key in self._scan("*"):
+                batch.append(full_key)
+                if len(batch) >= self.scan_count:
+                    await self.redis.unlink(*batch)
+                    batch = []
+            if batch:
+                await self.redis.unlink(*batch)
         except Exception as e:
             self.logger.error(f"Failed to clear Redis cache: {e}")
             return False
+        await self._invalidate(None)
+        return True
 
     async def exists(self, key: str) -> bool:
+        if key in self._local and self._local_get(key)[0]:
+            return True
         full_key = f"{self.prefix}{key}"
         try:
             return await self.redis.exists(full_key) > 0
@@ -312,54 +793,93 @@ class RedisCacheBackend(CacheBackend):
 
     async def keys(self, pattern: str = "*") -> List[str]:
         try:
-            full_pattern = f"{self.prefix}{pattern}"
-            keys = await self.redis.keys(full_pattern)
+            prefix_len = len(self.prefix)
             # 移除前缀
-            return [key.decode().replace(self.prefix, "") for key in keys]
+            return [
+                full_key.decode()[prefix_len:] async for full_key in self._scan(pattern)
+            ]
         except Exception as e:
             self.logger.error(f"Failed to get Redis keys {pattern}: {e}")
             return []
 
     async def batch_get(self, keys: List[str]) -> Dict[str, Any]:
-        """批量获取缓存值"""
+        """批量获取缓存值（本地未命中的键一次往返读取）"""
         if not keys:
             return {}
 
-        try:
-            full_keys = [f"{self.prefix}{key}" for key in keys]
-            values = await self.redis.mget(full_keys)
-
-            result = {}
-            for key, value in zip(keys, values):
-                if value is not None:
-                    try:
-                        result[key] = json.loads(value)
-                    except json.JSONDecodeError:
-                        result[key] = value.decode()
-
+        result = {}
+        missing = []
+        for key in keys:
+            found, value = self._local_get(key)
+            if found:
+                result[key] = value
+            else:
+                missing.append(key)
+        if not missing:
             return result
+
+        use_local = await self._ensure_listener()
+        seq = self._invalidation_seq
+        try:
+            full_keys = [f"{self.prefix}{key}" for key in missing]
+            if use_local:
+                pipeline = self.redis.pipeline(transaction=False)
+                pipeline.mget(full_keys)
+                for full_key in full_keys:
+                    pipeline.pttl(full_key)
+                replies = await pipeline.execute()
+                values, pttls = replies[0], replies[1:]
+            else:
+                values = await self.redis.mget(full_keys)
+                pttls = None
         except Exception as e:
             self.logger.error(f"Failed to batch get Redis cache: {e}")
-            return {}
+            return result
 
-    async def batch_set(self, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
-        """批量设置缓存值"""
+        for index, (key, data) in enumerate(zip(missing, values)):
+            if data is None:
+                continue
+            try:
+                value = self._decode(data)
+            except Exception as e:
+                self.logger.error(f"Failed to decode Redis cache {key}: {e}")
+                continue
+            result[key] = value
+            # 读取期间收到过失效消息时不缓存，避免保存旧值
+            if pttls is not None and seq == self._invalidation_seq:
+                self._local_put(key, value, pttls[index])
+        return result
+
+    async def batch_set(
+        self,
+        items: Dict[str, Any],
+        ttl: Optional[int] = None,
+        ttls: Optional[Dict[str, int]] = None,
+    ) -> bool:
+        """批量设置缓存值
+
+        Args:
+            items: 键值对
+            ttl: 默认过期时间（秒）
+            ttls: 逐键过期时间（秒），覆盖默认值
+        """
         if not items:
             return True
 
         try:
-            pipeline = self.redis.pipeline()
+            pipeline = self.redis.pipeline(transaction=False)
 
             for key, value in items.items():
                 full_key = f"{self.prefix}{key}"
-                value_str = json.dumps(value, ensure_ascii=False)
-                pipeline.set(full_key, value_str, ex=ttl)
+                key_ttl = ttls.get(key, ttl) if ttls else ttl
+                pipeline.set(full_key, self._encode(value), ex=key_ttl)
 
             await pipeline.execute()
-            return True
         except Exception as e:
             self.logger.error(f"Failed to batch set Redis cache: {e}")
             return False
+        await self._invalidate(list(items))
+        return True
 
     async def batch_delete(self, keys: List[str]) -> bool:
         """批量删除缓存值"""
@@ -369,10 +889,11 @@ class RedisCacheBackend(CacheBackend):
         try:
             full_keys = [f"{self.prefix}{key}" for key in keys]
             result = await self.redis.delete(*full_keys)
-            return result > 0
         except Exception as e:
             self.logger.error(f"Failed to batch delete Redis cache: {e}")
             return False
+        await self._invalidate(list(keys))
+        return result > 0
 
     async def get_memory_usage(self) -> Dict[str, Any]:
         """获取内存使用情况"""
@@ -419,9 +940,20 @@ class RedisCacheBackend(CacheBackend):
 
     async def close(self):
         """关闭Redis连接"""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
         try:
-            await self.redis.close()  # type: ignore
-            self.redis_pool.disconnect()  # type: ignore
+            if self._pubsub is not None:
+                await self._pubsub.aclose()
+                self._pubsub = None
+            await self.redis.aclose()  # type: ignore
+            if self.redis_pool is not None:
+                await self.redis_pool.disconnect()  # type: ignore
         except Exception as e:
             self.logger.error(f"Failed to close Redis connection: {e}")
 
@@ -515,16 +1047,532 @@ class DiskCacheBackend(CacheBackend):
         return keys
 
 
+class _SQLiteCacheShard:
+    """磁盘缓存分片：一个 SQLite(WAL) 文件加一个专用 I/O 线程
+
+    连接只在分片线程中使用，同一分片的读写按提交顺序串行执行；
+    除 ``run`` 外的方法都在分片线程中调用。
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.conn: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """在分片线程中执行"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f"disk-cache-{self.path.stem}"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def open(self) -> List[Tuple[str, Optional[float], int, float]]:
+        """打开数据库并返回 (键, 过期时间, 字节数, 最近访问时间) 索引行"""
+        conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        # auto_vacuum 必须在建表前设置，之后才能做增量回收
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires REAL,
+                size INTEGER NOT NULL,
+                accessed REAL NOT NULL
+            )
+            """
+        )
+        conn.commit()
+        self.conn = conn
+        return conn.execute(
+            "SELECT key, expires, size, accessed FROM entries"
+        ).fetchall()
+
+    def load_many(self, keys: List[str]) -> Dict[str, Any]:
+        """读取并反序列化，损坏的条目视为不存在"""
+        result = {}
+        for key in keys:
+            row = self.conn.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                continue
+            try:
+                result[key] = pickle.loads(row[0])
+            except Exception:
+                continue
+        return result
+
+    def put_many(
+        self,
+        items: List[Tuple[str, Any]],
+        expires: Optional[float],
+        now: float,
+        max_bytes: Optional[int],
+    ) -> List[Tuple[str, int]]:
+        """序列化并写入，返回成功写入的 (键, 字节数)；超过 max_bytes 的值不写入"""
+        records = []
+        rejected = []
+        written = []
+        for key, value in items:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            size = len(key.encode("utf-8")) + len(blob)
+            if max_bytes is not None and size > max_bytes:
+                rejected.append((key,))
+                continue
+            records.append((key, blob, expires, size, now))
+            written.append((key, size))
+
+        with self.conn:
+            if rejected:
+                # 写入失败时不能留下旧值
+                self.conn.executemany("DELETE FROM entries WHERE key = ?", rejected)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, expires, size, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                records,
+            )
+        return written
+
+    def delete_many(self, keys: List[str]):
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM entries WHERE key = ?", [(key,) for key in keys]
+            )
+
+    def touch_many(self, touched: List[Tuple[float, str]]):
+        """批量回写最近访问时间，供重启后恢复 LRU 顺序"""
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE entries SET accessed = ? WHERE key = ?", touched
+            )
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM entries")
+        self.conn.execute("PRAGMA incremental_vacuum")
+
+    def compact(self, now: float) -> int:
+        """删除过期行、回收空闲页并截断 WAL，返回删除的行数"""
+        with self.conn:
+            removed = self.conn.execute(
+                "DELETE FROM entries WHERE expires IS NOT NULL AND expires <= ?",
+                (now,),
+            ).rowcount
+        self.conn.execute("PRAGMA incremental_vacuum")
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    def disk_bytes(self) -> int:
+        total = 0
+        for suffix in ("", "-wal", "-shm"):
+            path = Path(f"{self.path}{suffix}")
+            if path.exists():
+                total += path.stat().st_size
+        return total
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """SQLite磁盘缓存后端
+
+    按键的 CRC32 分散到若干个 SQLite(WAL) 文件中，每个分片一个专用 I/O 线程，
+    序列化、读写和压缩均不在事件循环中执行。
+    内存中保存 键 -> (过期时间, 字节数) 的有序索引：不存在的键、``exists`` 与 ``keys``
+    无需访问磁盘，并据此按 LRU 强制 ``max_size``/``max_bytes`` 上限。
+    值以 pickle 二进制格式存储；后台任务定期清理过期行、回收空闲页并截断 WAL。
+    """
+
+    # 累积多少次访问后回写访问时间
+    TOUCH_FLUSH_THRESHOLD = 1024
+
+    def __init__(
+        self,
+        cache_dir: Path = Path(".cache"),
+        max_size: int = 100000,
+        max_bytes: Optional[int] = None,
+        shards: int = 4,
+        compaction_interval: Optional[float] = 300.0,
+    ):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.compaction_interval = compaction_interval
+        self.current_bytes = 0
+        self.logger = logging.getLogger(__name__)
+
+        # 确保缓存目录存在
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._shards = [
+            _SQLiteCacheShard(self.cache_dir / f"cache-{i}.db")
+            for i in range(max(1, shards))
+        ]
+
+        # 按最近访问排序的键索引：键 -> (过期时间, 字节数)
+        self._index: OrderedDict[str, Tuple[Optional[float], int]] = OrderedDict()
+        self._touched: Dict[str, float] = {}
+        self._opened = False
+        self._open_lock: Optional[asyncio.Lock] = None
+        self._compaction_task: Optional[asyncio.Task] = None
+
+    def _shard_for(self, key: str) -> _SQLiteCacheShard:
+        # 使用稳定哈希，保证重启后键仍落在同一分片
+        return self._shards[zlib.crc32(key.encode("utf-8")) % len(self._shards)]
+
+    def _group(self, keys) -> Dict[_SQLiteCacheShard, List[Any]]:
+        """按分片分组（元素为键或以键开头的元组）"""
+        groups: Dict[_SQLiteCacheShard, List[Any]] = {}
+        for item in keys:
+            key = item[0] if isinstance(item, tuple) else item
+            groups.setdefault(self._shard_for(key), []).append(item)
+        return groups
+
+    async def _ensure_open(self):
+        """首次使用时在分片线程中打开数据库并加载键索引"""
+        if self._opened:
+            return
+        if self._open_lock is None:
+            self._open_lock = asyncio.Lock()
+
+        async with self._open_lock:
+            if self._opened:
+                return
+
+            results = await asyncio.gather(
+                *(shard.run(shard.open) for shard in self._shards)
+            )
+            now = time.time()
+            rows = []
+            stale = []
+            for shard, shard_rows in zip(self._shards, results):
+                for row in shard_rows:
+                    # 分片数变化后不属于本分片的行以及已过期的行直接丢弃
+                    if self._shard_for(row[0]) is not shard or (
+                        row[1] is not None and row[1] <= now
+                    ):
+                        stale.append((shard, row[0]))
+                    else:
+                        rows.append(row)
+
+            rows.sort(key=lambda row: row[3])
+            for key, expires, size, _ in rows:
+                self._index[key] = (expires, size)
+                self.current_bytes += size
+            self._opened = True
+
+            for shard in {shard for shard, _ in stale}:
+                await shard.run(
+                    shard.delete_many, [key for s, key in stale if s is shard]
+                )
+            await self._enforce_capacity()
+
+            if self.compaction_interval and self._compaction_task is None:
+                self._compaction_task = asyncio.create_task(self._compaction_loop())
+
+    def _drop(self, key: str, reason: Optional[str] = None) -> bool:
+        """从索引中移除键，reason 不为空时视为淘汰并通知回调"""
+        meta = self._index.pop(key, None)
+        if meta is None:
+            return False
+        if reason is not None and self.on_evict is not None:
+            self.on_evict(key, reason)
+        self.current_bytes -= meta[1]
+        self._touched.pop(key, None)
+        return True
+
+    def _is_live(self, key: str, now: float) -> bool:
+        meta = self._index.get(key)
+        if meta is None:
+            return False
+        if meta[0] is not None and meta[0] <= now:
+            self._drop(key, "expired")
+            return False
+        return True
+
+    async def _delete_rows(self, keys: List[str]):
+        groups = self._group(keys)
+        await asyncio.gather(
+            *(shard.run(shard.delete_many, rows) for shard, rows in groups.items())
+        )
+
+    async def _enforce_capacity(self):
+        """按 LRU 顺序淘汰，直到满足条目数与字节数上限"""
+        victims = []
+        while self._index and (
+            len(self._index) > self.max_size
+            or (self.max_bytes is not None and self.current_bytes > self.max_bytes)
+        ):
+            key = next(iter(self._index))
+            self._drop(
+                key, "max_size" if len(self._index) > self.max_size else "max_bytes"
+            )
+            victims.append(key)
+        if victims:
+            await self._delete_rows(victims)
+
+    async def _flush_touched(self):
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        groups = self._group([(key, accessed) for key, accessed in touched.items()])
+        await asyncio.gather(
+            *(
+                shard.run(shard.touch_many, [(accessed, key) for key, accessed in rows])
+                for shard, rows in groups.items()
+            )
+        )
+
+    async def _put(self, items: Dict[str, Any], ttl: Optional[int]) -> bool:
+        await self._ensure_open()
+        now = time.time()
+        expires = now + ttl if ttl else None
+        groups = self._group(list(items.items()))
+
+        try:
+            results = await asyncio.gather(
+                *(
+                    shard.run(shard.put_many, rows, expires, now, self.max_bytes)
+                    for shard, rows in groups.items()
+                )
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to write disk cache: {e}")
+            return False
+
+        written = 0
+        for shard_written in results:
+            for key, size in shard_written:
+                self._drop(key)
+                self._index[key] = (expires, size)
+                self.current_bytes += size
+                written += 1
+        # 被拒绝的超大值同样要从索引中移除旧值
+        if written < len(items):
+            for shard_rows, shard_written in zip(groups.values(), results):
+                accepted = {key for key, _ in shard_written}
+                for key, _ in shard_rows:
+                    if key not in accepted:
+                        self._drop(key)
+
+        await self._enforce_capacity()
+        return written == len(items)
+
+    async def get(self, key: str) -> Optional[Any]:
+        result = await self.batch_get([key])
+        return result.get(key)
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        return await self._put({key: value}, ttl)
+
+    async def delete(self, key: str) -> bool:
+        return await self.batch_delete([key])
+
+    async def clear(self) -> bool:
+        await self._ensure_open()
+        self._index.clear()
+        self._touched.clear()
+        self.current_bytes = 0
+        try:
+            await asyncio.gather(*(shard.run(shard.clear) for shard in self._shards))
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to clear disk cache: {e}")
+            return False
+
+    async def exists(self, key: str) -> bool:
+        await self._ensure_open()
+        return self._is_live(key, time.time())
+
+    async def keys(self, pattern: str = "*") -> List[str]:
+        import fnmatch
+
+        await self._ensure_open()
+        now = time.time()
+        return [
+            key
+            for key in list(self._index)
+            if self._is_live(key, now) and fnmatch.fnmatch(key, pattern)
+        ]
+
+    async def batch_get(self, keys: List[str]) -> Dict[str, Any]:
+        """批量获取缓存值（每个分片一次线程调用）"""
+        await self._ensure_open()
+        now = time.time()
+        live = [key for key in keys if self._is_live(key, now)]
+        if not live:
+            return {}
+
+        try:
+            results = await asyncio.gather(
+                *(
+                    shard.run(shard.load_many, rows)
+                    for shard, rows in self._group(live).items()
+                )
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to read disk cache: {e}")
+            return {}
+
+        found: Dict[str, Any] = {}
+        for shard_result in results:
+            found.update(shard_result)
+
+        for key in live:
+            if key in found:
+                if key in self._index:
+                    self._index.move_to_end(key)
+                    self._touched[key] = now
+            else:
+                # 文件中缺失或无法反序列化，与索引保持一致
+                self._drop(key)
+
+        if len(self._touched) >= self.TOUCH_FLUSH_THRESHOLD:
+            await self._flush_touched()
+        return {key: found[key] for key in keys if key in found}
+
+    async def batch_set(self, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """批量设置缓存值（每个分片一个事务）"""
+        if not items:
+            return True
+        return await self._put(items, ttl)
+
+    async def batch_delete(self, keys: List[str]) -> bool:
+        """批量删除缓存值"""
+        await self._ensure_open()
+        existing = [key for key in keys if self._drop(key)]
+        if not existing:
+            return False
+        try:
+            await self._delete_rows(existing)
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to delete disk cache: {e}")
+            return False
+
+    async def compact(self) -> int:
+        """清理过期条目、回写访问时间并压缩数据库文件，返回删除的行数"""
+        await self._ensure_open()
+        now = time.time()
+        for key in list(self._index):
+            self._is_live(key, now)
+        await self._flush_touched()
+        removed = await asyncio.gather(
+            *(shard.run(shard.compact, now) for shard in self._shards)
+        )
+        return sum(removed)
+
+    async def _compaction_loop(self):
+        while True:
+            await asyncio.sleep(self.compaction_interval)
+            try:
+                removed = await self.compact()
+                if removed:
+                    self.logger.debug(f"Disk cache compaction removed {removed} rows")
+            except Exception as e:
+                self.logger.error(f"Disk cache compaction failed: {e}")
+
+    def entry_count(self) -> Optional[int]:
+        return len(self._index) if self._opened else None
+
+    async def get_memory_usage(self) -> Dict[str, Any]:
+        """获取内存与磁盘使用情况"""
+        await self._ensure_open()
+        disk_bytes = await asyncio.gather(
+            *(shard.run(shard.disk_bytes) for shard in self._shards)
+        )
+        return {
+            "size": len(self._index),
+            "max_size": self.max_size,
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "shards": len(self._shards),
+            "disk_bytes": sum(disk_bytes),
+        }
+
+    async def close(self):
+        """停止后台压缩并关闭所有分片"""
+        if self._compaction_task is not None:
+            self._compaction_task.cancel()
+            try:
+                await self._compaction_task
+            except asyncio.CancelledError:
+                pass
+            self._compaction_task = None
+
+        if self._opened:
+            try:
+                await self._flush_touched()
+            except Exception as e:
+                self.logger.error(f"Failed to flush disk cache access times: {e}")
+            for shard in self._shards:
+                await shard.run(shard.close)
+                shard.shutdown()
+
+        self._index.clear()
+        self._touched.clear()
+        self.current_bytes = 0
+        self._opened = False
+
+
 class CacheManager:
-    """缓存管理器"""
+    """缓存管理器
 
-    def __init__(self):
+    按 ``enabled_levels`` 顺序（由快到慢）逐层读取。下层命中后只向上层提升，
+    提升写入进入队列，由后台任务按层批量执行，不阻塞本次读取。
+    所有层都未命中的键会被短暂记为不存在（负缓存），期间读取不再访问后端。
+    """
+
+    def __init__(
+        self,
+        tier_policy: TierPolicy = TierPolicy.INCLUSIVE,
+        negative_ttl: float = 5.0,
+        negative_max_size: int = 10000,
+        promotion_ttl: Optional[int] = None,
+    ):
         self.backends: Dict[CacheLevel, CacheBackend] = {}
         self.stats: Dict[CacheLevel, CacheStats] = {}
         self.logger = logging.getLogger(__name__)
 
         # 默认配置
         self.default_ttl = 3600  # 1小时
+
+        # 单飞：同一个键同时只有一个计算在进行
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refresh_tasks: set = set()
+
+        # 层间提升：目标层 -> {键: (值, 来源层)}
+        self.tier_policy = tier_policy
+        self.promotion_ttl = promotion_ttl
+        self._pending_promotions: Dict[
+            CacheLevel, Dict[str, Tuple[Any, CacheLevel]]
+        ] = {}
+        self._promotion_task: Optional[asyncio.Task] = None
+
+        # 负缓存：键 -> 过期时间
+        self.negative_ttl = negative_ttl
+        self.negative_max_size = negative_max_size
+        self.negative_hits = 0
+        self._negative: OrderedDict[str, float] = OrderedDict()
+
+        # 键的写入代数：读取期间键被写入或删除时不记负缓存。只保留最近写入的键，
+        # 被淘汰的键的代数计入下限，未记录的键按下限比较
+        self._generation = 0
+        self._generation_floor = 0
+        self._generations: OrderedDict[str, int] = OrderedDict()
+
         self.enabled_levels = [CacheLevel.MEMORY, CacheLevel.DISK]
 
         # 检查Redis可用性
@@ -534,33 +1582,62 @@ class CacheManager:
     def add_backend(self, level: CacheLevel, backend: CacheBackend):
         """添加缓存后端"""
         self.backends[level] = backend
-        self.stats[level] = CacheStats(max_size=getattr(backend, "max_size", 0))
+        stats = CacheStats(max_size=getattr(backend, "max_size", 0))
+        self.stats[level] = stats
+        if isinstance(backend, CacheBackend):
+            backend.on_evict = stats.record_eviction
+
+    def _adjust_size(self, level: CacheLevel, delta: int):
+        """更新条目数：后端能报告实际条目数时以其为准，避免覆盖写入造成偏差"""
+        backend = self.backends[level]
+        count = backend.entry_count() if hasattr(backend, "entry_count") else None
+        stats = self.stats[level]
+        if isinstance(count, int):
+            stats.size = count
+        else:
+            stats.size = max(0, stats.size + delta)
 
     async def get(self, key: str, level: Optional[CacheLevel] = None) -> Optional[Any]:
         """获取缓存值"""
+        if level is None and self._is_negative(key):
+            self.negative_hits += 1
+            return None
+
         levels_to_check = [level] if level else self.enabled_levels
+        checked: List[CacheLevel] = []
+        generation = self._key_generation(key)
 
         for cache_level in levels_to_check:
             if cache_level not in self.backends:
                 continue
 
             backend = self.backends[cache_level]
+            stats = self.stats[cache_level]
+            started = time.perf_counter()
             value = await backend.get(key)
+            stats.record_latency("get", time.perf_counter() - started)
 
             if value is not None:
                 # 缓存命中
-                self.stats[cache_level].hits += 1
+                stats.hits += 1
+                stats.namespace(key).hits += 1
                 self._update_hit_rate(cache_level)
 
-                # 更新其他级别的缓存（写回策略）
-                await self._update_other_levels(key, value, cache_level)
+                # 异步提升到更快的层
+                if level is None and checked:
+                    self._queue_promotion(key, value, cache_level, checked)
 
                 return value
             else:
                 # 缓存未命中
-                self.stats[cache_level].misses += 1
+                stats.misses += 1
+                stats.namespace(key).misses += 1
                 self._update_hit_rate(cache_level)
+                checked.append(cache_level)
 
+        # 读取期间键被写入或删除时，未命中结果已过时，不记负缓存
+        if level is None and self._key_generation(key) == generation:
+            self._remember_missing(key)
         return None
 
     async def set(
@@ -573,6 +1650,7 @@ class CacheManager:
         """设置缓存值"""
         if ttl is None:
             ttl = self.default_ttl
+        self._invalidate(key)
 
         levels_to_set = [level] if level else self.enabled_levels
         results = []
@@ -582,16 +1660,21 @@ class CacheManager:
                 continue
 
             backend = self.backends[cache_level]
+            stats = self.stats[cache_level]
+            started = time.perf_counter()
             success = await backend.set(key, value, ttl)
+            stats.record_latency("set", time.perf_counter() - started)
             results.append(success)
 
             if success:
-                self.stats[cache_level].size += 1
+                stats.namespace(key).sets += 1
+                self._adjust_size(cache_level, 1)
 
         return any(results)
 
     async def delete(self, key: str, level: Optional[CacheLevel] = None) -> bool:
         """删除缓存值"""
+        self._invalidate(key)
         levels_to_delete = [level] if level else self.enabled_levels
         results = []
 
@@ -600,16 +1683,26 @@ class CacheManager:
                 continue
 
             backend = self.backends[cache_level]
+            stats = self.stats[cache_level]
+            started = time.perf_counter()
             success = await backend.delete(key)
+            stats.record_latency("delete", time.perf_counter() - started)
             results.append(success)
 
             if success:
-                self.stats[cache_level].size = max(0, self.stats[cache_level].size - 1)
+                stats.namespace(key).deletes += 1
+                self._adjust_size(cache_level, -1)
 
         return any(results)
 
     async def clear(self, level: Optional[CacheLevel] = None) -> bool:
         """清空缓存"""
+        self._negative.clear()
+        self._generation += 1
+        self._generation_floor = self._generation
+        self._generations.clear()
+        for pending in self._pending_promotions.values():
+            pending.clear()
         levels_to_clear = [level] if level else self.enabled_levels
         results = []
 
@@ -644,6 +1737,8 @@ class CacheManager:
         self, level: Optional[CacheLevel] = None
     ) -> Dict[CacheLevel, CacheStats]:
         """获取缓存统计信息"""
+        for cache_level in self.stats:
+            self._adjust_size(cache_level, 0)
         if level:
             return {level: self.stats.get(level, CacheStats())}
         else:
@@ -661,14 +1756,19 @@ class CacheManager:
 
             backend = self.backends[cache_level]
             if hasattr(backend, "batch_get"):
+                stats = self.stats[cache_level]
+                started = time.perf_counter()
                 result = await backend.batch_get(keys)
+                stats.record_latency("batch_get", time.perf_counter() - started)
                 if result:
                     # 更新统计信息
                     for key in keys:
                         if key in result:
-                            self.stats[cache_level].hits += 1
+                            stats.hits += 1
+                            stats.namespace(key).hits += 1
                         else:
-                            self.stats[cache_level].misses += 1
+                            stats.misses += 1
+                            stats.namespace(key).misses += 1
                     self._update_hit_rate(cache_level)
                     return result
 
@@ -690,6 +1790,8 @@ class CacheManager:
         """批量设置缓存值"""
         if ttl is None:
             ttl = self.default_ttl
+        for key in items:
+            self._invalidate(key)
 
         levels_to_set = [level] if level else self.enabled_levels
         results = []
@@ -699,18 +1801,24 @@ class CacheManager:
                 continue
 
             backend = self.backends[cache_level]
+            stats = self.stats[cache_level]
             if hasattr(backend, "batch_set"):
+                started = time.perf_counter()
                 success = await backend.batch_set(items, ttl)
+                stats.record_latency("batch_set", time.perf_counter() - started)
                 results.append(success)
 
                 if success:
-                    self.stats[cache_level].size += len(items)
+                    for key in items:
+                        stats.namespace(key).sets += 1
+                    self._adjust_size(cache_level, len(items))
             else:
                 # 如果没有批量操作支持，回退到单个设置
                 for key, value in items.items():
                     success = await backend.set(key, value, ttl)
                     if success:
-                        self.stats[cache_level].size += 1
+                        stats.namespace(key).sets += 1
+                        self._adjust_size(cache_level, 1)
                 results.append(True)
 
         return any(results)
@@ -719,6 +1827,8 @@ class CacheManager:
         self, keys: List[str], level: Optional[CacheLevel] = None
     ) -> bool:
         """批量删除缓存值"""
+        for key in keys:
+            self._invalidate(key)
         levels_to_delete = [level] if level else self.enabled_levels
         results = []
 
@@ -727,22 +1837,24 @@ class CacheManager:
                 continue
 
             backend = self.backends[cache_level]
+            stats = self.stats[cache_level]
             if hasattr(backend, "batch_delete"):
+                started = time.perf_counter()
                 success = await backend.batch_delete(keys)
+                stats.record_latency("batch_delete", time.perf_counter() - started)
                 results.append(success)
 
                 if success:
-                    self.stats[cache_level].size = max(
-                        0, self.stats[cache_level].size - len(keys)
-                    )
+                    for key in keys:
+                        stats.namespace(key).deletes += 1
+                    self._adjust_size(cache_level, -len(keys))
             else:
                 # 如果没有批量操作支持，回退到单个删除
                 for key in keys:
                     success = await backend.delete(key)
                     if success:
-                        self.stats[cache_level].size = max(
-                            0, self.stats[cache_level].size - 1
-                        )
+                        stats.namespace(key).deletes += 1
+                        self._adjust_size(cache_level, -1)
                 results.append(True)
 
         return any(results)
@@ -816,10 +1928,116 @@ class CacheManager:
 
     async def close(self):
         """关闭所有缓存后端"""
+        await self.flush_promotions()
         for backend in self.backends.values():
             if hasattr(backend, "close"):
                 await backend.close()
 
+    async def _single_flight(self, key: str, compute: Callable[[], Any]) -> Any:
+        """合并同一个键的并发计算，所有调用方等待同一个结果
+
+        计算在独立的任务中执行，调用方都通过 shield 等待：任一调用方（包括发起者）
+        被取消只影响它自己，计算继续完成并供其他调用方使用。
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish_flight(key, done))
+        return await asyncio.shield(task)
+
+    def _finish_flight(self, key: str, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 所有调用方都已取消时，避免出现 "exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def _refresh_in_background(self, key: str, compute: Callable[[], Any]):
+        """后台刷新（已有计算在进行时不重复触发）"""
+        if key in self._inflight:
+            return
+
+        async def refresh():
+            try:
+                await self._single_flight(key, compute)
+            except Exception as e:
+                self.logger.warning(f"Background cache refresh failed for {key}: {e}")
+
+        task = asyncio.create_task(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def get_or_set(
+        self,
+        key: str,
+        factory: Callable[[], Any],
+        ttl: Optional[int] = None,
+        level: Optional[CacheLevel] = None,
+        stale_ttl: int = 0,
+        early_refresh_beta: float = 0.0,
+    ) -> Any:
+        """获取缓存值，未命中时调用 factory 计算并缓存
+
+        并发未命中同一个键时只执行一次 factory。
+
+        Args:
+            key: 缓存键
+            factory: 计算函数（同步或异步）
+            ttl: 缓存时间（秒）
+            level: 缓存级别
+            stale_ttl: 过期后仍可返回旧值的时间（秒），期间在后台刷新
+            early_refresh_beta: 提前刷新系数（XFetch），大于0时在过期前按概率提前后台刷新，
+                值越大越早刷新
+        """
+        if ttl is None:
+            ttl = self.default_ttl
+        use_envelope = stale_ttl > 0 or early_refresh_beta > 0
+
+        async def compute() -> Any:
+            started = time.time()
+            result = factory()
+            if asyncio.iscoroutine(result):
+                result = await result
+            if result is None:
+                return None
+
+            if use_envelope:
+                now = time.time()
+                envelope = {
+                    ENVELOPE_MARKER: True,
+                    "value": result,
+                    "expires": now + ttl,
+                    "delta": now - started,
+                }
+                await self.set(key, envelope, ttl + stale_ttl, level)
+            else:
+                await self.set(key, result, ttl, level)
+            return result
+
+        cached_value = await self.get(key, level)
+        if cached_value is not None:
+            if not (isinstance(cached_value, dict) and ENVELOPE_MARKER in cached_value):
+                return cached_value
+
+            now = time.time()
+            expires = cached_value["expires"]
+            if now >= expires:
+                # 已过期但仍在容忍窗口内：返回旧值并后台刷新
+                self._refresh_in_background(key, compute)
+            elif early_refresh_beta > 0:
+                # XFetch：越接近过期、计算越慢，越可能提前刷新
+                gap = (
+                    -cached_value["delta"]
+                    * early_refresh_beta
+                    * math.log(random.random() or 1e-12)
+                )
+                if now + gap >= expires:
+                    self._refresh_in_background(key, compute)
+            return cached_value["value"]
+
+        return await self._single_flight(key, compute)
+
     def _update_hit_rate(self, level: CacheLevel):
         """更新命中率"""
         stats = self.stats[level]
@@ -827,18 +2045,106 @@ class CacheManager:
         if total > 0:
             stats.hit_rate = stats.hits / total
 
-    async def _update_other_levels(
-        self, key: str, value: Any, source_level: CacheLevel
-    ):
-        """更新其他级别的缓存"""
-        for cache_level in self.enabled_levels:
-            if cache_level == source_level:
-                continue
+    def _is_negative(self, key: str) -> bool:
+        expires = self._negative.get(key)
+        if expires is None:
+            return False
+        if expires <= time.time():
+            del self._negative[key]
+            return False
+        return True
 
-            if cache_level in self.backends:
-                backend = self.backends[cache_level]
-                if not await backend.exists(key):
-                    await backend.set(key, value, self.default_ttl)
+    def _remember_missing(self, key: str):
+        """记录所有层都不存在的键"""
+        if self.negative_ttl <= 0:
+            return
+        self._negative.pop(key, None)
+        self._negative[key] = time.time() + self.negative_ttl
+        while len(self._negative) > self.negative_max_size:
+            self._negative.popitem(last=False)
+
+    def _key_generation(self, key: str) -> int:
+        return self._generations.get(key, self._generation_floor)
+
+    def _invalidate(self, key: str):
+        """写入或删除键时推进键的代数，清除负缓存和待执行的提升"""
+        self._generation += 1
+        self._generations.pop(key, None)
+        self._generations[key] = self._generation
+        while len(self._generations) > self.negative_max_size:
+            _, evicted = self._generations.popitem(last=False)
+            self._generation_floor = evicted
+        self._negative.pop(key, None)
+        for pending in self._pending_promotions.values():
+            pending.pop(key, None)
+
+    def _queue_promotion(
+        self,
+        key: str,
+        value: Any,
+        source_level: CacheLevel,
+        upper_levels: List[CacheLevel],
+    ):
+        """把下层命中的值加入向上提升队列（只提升，不向下写）"""
+        targets = (
+            upper_levels
+            if self.tier_policy == TierPolicy.INCLUSIVE
+            else upper_levels[:1]
+        )
+        for target in targets:
+            self._pending_promotions.setdefault(target, {})[key] = (value, source_level)
+
+        if self._promotion_task is None or self._promotion_task.done():
+            self._promotion_task = asyncio.create_task(self._promotion_worker())
+
+    async def _promotion_worker(self):
+        # 让出一次事件循环，使同一时刻的多次命中合并到同一批
+        await asyncio.sleep(0)
+        await self.flush_promotions()
+
+    async def flush_promotions(self):
+        """立即执行所有待提升的写入：每个目标层一次批量写入"""
+        while any(self._pending_promotions.values()):
+            pending, self._pending_promotions = self._pending_promotions, {}
+            ttl = self.promotion_ttl or self.default_ttl
+
+            for target, entries in pending.items():
+                backend = self.backends.get(target)
+                if backend is None or not entries:
+                    continue
+
+                stats = self.stats[target]
+                started = time.perf_counter()
+                try:
+                    success = await backend.batch_set(
+                        {key: value for key, (value, _) in entries.items()}, ttl
+                    )
+                    stats.record_latency("batch_set", time.perf_counter() - started)
+                    if success:
+                        self._adjust_size(target, len(entries))
+                except Exception as e:
+                    self.logger.warning(
+                        f"Cache promotion to {target.value} failed: {e}"
+                    )
+                    continue
+                if not success or self.tier_policy != TierPolicy.EXCLUSIVE:
+                    continue
+
+                # 独占式：提升成功后从来源层删除
+                by_source: Dict[CacheLevel, List[str]] = {}
+                for key, (_, source) in entries.items():
+                    by_source.setdefault(source, []).append(key)
+                for source, keys in by_source.items():
+                    source_backend = self.backends.get(source)
+                    if source_backend is None:
+                        continue
+                    try:
+                        if await source_backend.batch_delete(keys):
+                            self._adjust_size(source, -len(keys))
+                    except Exception as e:
+                        self.logger.warning(
+                            f"Exclusive cache cleanup on {source.value} failed: {e}"
+                        )
 
 
 # 全局缓存管理器实例
@@ -849,17 +2155,24 @@ def cached(
     ttl: int = 3600,
     key_func: Optional[Callable] = None,
     level: CacheLevel = CacheLevel.MEMORY,
+    stale_ttl: int = 0,
+    early_refresh_beta: float = 0.0,
 ):
     """
     缓存装饰器
 
+    并发未命中同一个键时只执行一次被装饰函数，其余调用等待同一结果。
+
     Args:
         ttl: 缓存时间（秒）
         key_func: 缓存键生成函数
         level: 缓存级别
+        stale_ttl: 过期后仍返回旧值并后台刷新的时间窗口（秒）
+        early_refresh_beta: 过期前按概率提前刷新的系数，0 表示关闭
     """
 
     def decorator(func):
+        @functools.wraps(func)
         async def wrapper(*args, **kwargs):
             # 生成缓存键
             if key_func:
@@ -872,20 +2185,15 @@ def cached(
                 param_hash = hashlib.md5(param_str.encode()).hexdigest()
                 cache_key = f"{func.__name__}:{param_hash}"
 
-            # 尝试从缓存获取
-            cached_value = await cache_manager.get(cache_key, level)
-            if cached_value is not None:
-                return cached_value
-
-            # 执行函数并缓存结果
-            result = (
-                await func(*args, **kwargs)
-                if asyncio.iscoroutinefunction(func)
-                else func(*args, **kwargs)
+            # 从缓存获取，未命中时执行函数并缓存结果
+            return await cache_manager.get_or_set(
+                cache_key,
+                lambda: func(*args, **kwargs),
+                ttl,
+                level,
+                stale_ttl=stale_ttl,
+                early_refresh_beta=early_refresh_beta,
             )
-            await cache_manager.set(cache_key, result, ttl, level)
-
-            return result
 
         return wrapper
 
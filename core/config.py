@@ -75,6 +75,16 @@ class Config:
         # Logging settings
         self.LOG_LEVEL = self._unified_config.logging.level
 
+        # AI settings: 启动后在后台线程预加载推荐系统依赖（torch/faiss 等）
+        self.AI_PRELOAD = os.getenv(
+            "AI_PRELOAD", env_vars.get("AI_PRELOAD", "false")
+        ).lower() in ("1", "true", "yes")
+
+        # 文件整理增量索引（SQLite 路径，留空则每次全量扫描）
+        self.LIBRARY_INDEX_PATH = os.getenv(
+            "LIBRARY_INDEX_PATH", env_vars.get("LIBRARY_INDEX_PATH", "")
+        )
+
         # JWT settings
         self.ALGORITHM = "HS256"
         access_token_expire_str = os.getenv(
@@ -0,0 +1,346 @@
+"""
+分阶段重复文件查找
+按文件大小分组 -> 头尾块哈希 -> 剩余候选全量哈希，哈希计算并行进行，
+(设备, inode, 大小, 修改时间) -> 哈希 的磁盘缓存使重复扫描只处理变化的文件
+"""
+
+import hashlib
+import logging
+import mmap
+import sqlite3
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .fs_scanner import scan_files
+
+try:
+    import xxhash  # type: ignore
+except ImportError:
+    xxhash = None  # type: ignore
+
+try:
+    import blake3  # type: ignore
+except ImportError:
+    blake3 = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+def _hash_factory() -> Tuple[str, Callable[[], object]]:
+    """选择可用的最快哈希算法：xxh3-128 > blake3 > blake2b"""
+    if xxhash is not None:
+        return "xxh3_128", xxhash.xxh3_128
+    if blake3 is not None:
+        return "blake3", blake3.blake3
+    return "blake2b", lambda: hashlib.blake2b(digest_size=16)
+
+
+@dataclass
+class FileEntry:
+    """参与比较的文件"""
+
+    path: str
+    size: int
+    device: int
+    inode: int
+    mtime_ns: int
+
+    @property
+    def key(self) -> Tuple[int, int]:
+        return (self.device, self.inode)
+
+
+@dataclass
+class DuplicateCluster:
+    """内容完全相同的一组文件
+
+    ``inodes`` 为簇内不同 (设备, inode) 的数量，指向同一 inode 的硬链接
+    不占用额外空间，不计入可节省空间；未指定时视每个路径为独立文件。
+    """
+
+    size: int
+    digest: str
+    paths: List[str] = field(default_factory=list)
+    inodes: int = 0
+
+    @property
+    def wasted_bytes(self) -> int:
+        return self.size * ((self.inodes or len(self.paths)) - 1)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "size": self.size,
+            "hash": self.digest,
+            "paths": self.paths,
+            "inodes": self.inodes or len(self.paths),
+            "wasted_bytes": self.wasted_bytes,
+        }
+
+
+class HashCache:
+    """文件哈希的磁盘缓存，以 (设备, inode) 为键，大小或修改时间变化即失效"""
+
+    def __init__(self, path: Union[str, Path], algorithm: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                device INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                partial TEXT,
+                full TEXT,
+                PRIMARY KEY (device, inode)
+            )
+        """
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'algorithm'"
+        ).fetchone()
+        if row is None or row[0] != algorithm:
+            # 哈希算法变化后旧缓存不可比较
+            self.conn.execute("DELETE FROM file_hashes")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('algorithm', ?)",
+                (algorithm,),
+            )
+        self.conn.commit()
+
+    def get(self, entries: Iterable[FileEntry]) -> Dict[Tuple[int, int], Tuple]:
+        """批量查询有效的缓存项：(设备, inode) -> (partial, full)"""
+        result: Dict[Tuple[int, int], Tuple] = {}
+        for entry in entries:
+            row = self.conn.execute(
+                """
+                SELECT partial, full FROM file_hashes
+                WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ?
+            """,
+                (entry.device, entry.inode, entry.size, entry.mtime_ns),
+            ).fetchone()
+            if row is not None:
+                result[entry.key] = row
+        return result
+
+    def put(self, entries: List[FileEntry], partial: Dict, full: Dict):
+        """批量写入（一个事务）"""
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO file_hashes (device, inode, size, mtime_ns, partial, full)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (device, inode) DO UPDATE SET
+                    size = excluded.size,
+                    mtime_ns = excluded.mtime_ns,
+                    partial = COALESCE(excluded.partial, file_hashes.partial),
+                    full = COALESCE(excluded.full, file_hashes.full)
+            """,
+                [
+                    (
+                        entry.device,
+                        entry.inode,
+                        entry.size,
+                        entry.mtime_ns,
+                        partial.get(entry.key),
+                        full.get(entry.key),
+                    )
+                    for entry in entries
+                ],
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+class DuplicateFinder:
+    """分阶段重复文件查找器
+
+    1. 按大小分组，大小唯一的文件直接排除（只需 stat）
+    2. 对同大小文件哈希头部和尾部各 ``block_size`` 字节
+    3. 头尾哈希仍相同的文件做全量哈希（大文件使用 mmap，否则大块缓冲读取）
+
+    同一 inode（硬链接）只哈希一次。所有哈希在线程池中并行计算。
+    """
+
+    def __init__(
+        self,
+        cache_path: Optional[Union[str, Path]] = None,
+        workers: int = 8,
+        block_size: int = 64 * 1024,
+        chunk_size: int = 4 * 1024 * 1024,
+        min_size: int = 0,
+    ):
+        self.algorithm, self._new_hasher = _hash_factory()
+        self.cache_path = cache_path
+        self.workers = max(1, workers)
+        self.block_size = block_size
+        self.chunk_size = chunk_size
+        self.min_size = min_size
+
+        self.stats: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # 哈希
+    # ------------------------------------------------------------------
+
+    def _partial_hash(self, entry: FileEntry) -> str:
+        hasher = self._new_hasher()
+        with open(entry.path, "rb") as f:
+            hasher.update(f.read(self.block_size))
+            if entry.size > self.block_size:
+                f.seek(max(self.block_size, entry.size - self.block_size))
+                hasher.update(f.read(self.block_size))
+        return hasher.hexdigest()
+
+    def _full_hash(self, entry: FileEntry) -> str:
+        hasher = self._new_hasher()
+        with open(entry.path, "rb") as f:
+            if entry.size >= self.chunk_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        for offset in range(0, len(view), self.chunk_size):
+                            hasher.update(view[offset : offset + self.chunk_size])
+                    finally:
+                        view.release()
+            else:
+                hasher.update(f.read())
+        return hasher.hexdigest()
+
+    def _hash_all(
+        self, entries: List[FileEntry], func: Callable[[FileEntry], str]
+    ) -> Dict[Tuple[int, int], str]:
+        """并行哈希（按 inode 去重），读取失败的文件被忽略"""
+        unique = list({entry.key: entry for entry in entries}.values())
+
+        def safe(entry: FileEntry) -> Optional[str]:
+            try:
+                return func(entry)
+            except OSError as e:
+                logger.warning(f"读取文件失败 {entry.path}: {e}")
+                return None
+
+        if self.workers > 1 and len(unique) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                digests = list(executor.map(safe, unique))
+        else:
+            digests = [safe(entry) for entry in unique]
+        return {
+            entry.key: digest
+            for entry, digest in zip(unique, digests)
+            if digest is not None
+        }
+
+    # ------------------------------------------------------------------
+    # 扫描与分组
+    # ------------------------------------------------------------------
+
+    def _scan(self, directory: Union[str, Path]) -> List[FileEntry]:
+        entries = [
+            FileEntry(entry.path, entry.size, entry.device, entry.inode, entry.mtime_ns)
+            for entry in scan_files(directory, workers=self.workers)
+            if entry.size >= self.min_size
+        ]
+        entries.sort(key=lambda entry: entry.path)
+        return entries
+
+    @staticmethod
+    def _distinct(group: Iterable[FileEntry]) -> int:
+        """组内不同 inode 的数量（硬链接只算一个）"""
+        return len({entry.key for entry in group})
+
+    @classmethod
+    def _regroup(
+        cls, groups: Iterable[List[FileEntry]], digests: Dict[Tuple[int, int], str]
+    ) -> List[List[FileEntry]]:
+        """按哈希细分分组，丢弃只剩一个 inode 的组"""
+        result: List[List[FileEntry]] = []
+        for group in groups:
+            buckets: Dict[str, List[FileEntry]] = defaultdict(list)
+            for entry in group:
+                digest = digests.get(entry.key)
+                if digest is not None:
+                    buckets[digest].append(entry)
+            result.extend(
+                bucket for bucket in buckets.values() if cls._distinct(bucket) > 1
+            )
+        return result
+
+    def find(self, directory: Union[str, Path]) -> List[DuplicateCluster]:
+        """
+        查找目录下内容相同的文件
+
+        Returns:
+            重复文件簇，按可节省空间降序排列
+        """
+        entries = self._scan(directory)
+        by_size: Dict[int, List[FileEntry]] = defaultdict(list)
+        for entry in entries:
+            by_size[entry.size].append(entry)
+        size_groups = [group for group in by_size.values() if self._distinct(group) > 1]
+        candidates = [entry for group in size_groups for entry in group]
+
+        cache = HashCache(self.cache_path, self.algorithm) if self.cache_path else None
+        try:
+            cached = cache.get(candidates) if cache else {}
+            partial = {key: row[0] for key, row in cached.items() if row[0]}
+            full = {key: row[1] for key, row in cached.items() if row[1]}
+
+            # 阶段二：头尾块哈希；不超过两个块的文件头尾哈希即全量内容
+            small = 2 * self.block_size
+            missing = [e for e in candidates if e.key not in partial and e.size > 0]
+            partial.update(self._hash_all(missing, self._partial_hash))
+            for entry in candidates:
+                if entry.size == 0:
+                    partial[entry.key] = full[entry.key] = ""
+                elif entry.size <= small and entry.key in partial:
+                    full.setdefault(entry.key, partial[entry.key])
+            partial_groups = self._regroup(size_groups, partial)
+
+            # 阶段三：剩余候选全量哈希
+            remaining = [
+                entry
+                for group in partial_groups
+                for entry in group
+                if entry.key not in full
+            ]
+            full.update(self._hash_all(remaining, self._full_hash))
+            full_groups = self._regroup(partial_groups, full)
+
+            if cache:
+                cache.put(
+                    [e for e in candidates if e.key in partial or e.key in full],
+                    partial,
+                    full,
+                )
+        finally:
+            if cache:
+                cache.close()
+
+        self.stats = {
+            "files": len(entries),
+            "size_candidates": len(candidates),
+            "partial_hashed": self._distinct(missing),
+            "full_hashed": self._distinct(remaining),
+            "cache_hits": len(cached),
+        }
+        clusters = [
+            DuplicateCluster(
+                size=group[0].size,
+                digest=full[group[0].key],
+                paths=[entry.path for entry in group],
+                inodes=self._distinct(group),
+            )
+            for group in full_groups
+        ]
+        clusters.sort(key=lambda cluster: (-cluster.wasted_bytes, cluster.paths[0]))
+        return clusters
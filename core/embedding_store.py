@@ -0,0 +1,224 @@
+"""
+嵌入向量持久化存储模块
+以「模型名 + 文本」的稳定内容哈希为键，向量按行追加到内存映射的 float32/float16 矩阵，
+多个工作进程可以只读共享同一份文件，进程重启后无需重新编码
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from threading import RLock
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np  # type: ignore
+
+try:
+    import fcntl  # type: ignore
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+KEY_SIZE = 16
+
+
+def content_key(model_name: str, text: str) -> bytes:
+    """计算稳定的内容哈希（跨进程、跨重启一致，不受 PYTHONHASHSEED 影响）"""
+    return hashlib.blake2b(
+        f"{model_name}\0{text}".encode("utf-8"), digest_size=KEY_SIZE
+    ).digest()
+
+
+class EmbeddingStore:
+    """内容寻址的嵌入向量存储
+
+    目录结构（每个模型一个子目录）::
+
+        meta.json    维度、数据类型和模型名
+        vectors.bin  行优先的向量矩阵，只追加
+        keys.bin     每行 16 字节的内容哈希，与 vectors.bin 行号一一对应
+
+    写入时先追加向量再追加键，读取方以键文件长度为准，因此总能看到完整的行；
+    追加通过文件锁串行化，读取通过 ``np.memmap`` 只读映射，多进程共享页缓存。
+    """
+
+    META_FILE = "meta.json"
+    VECTORS_FILE = "vectors.bin"
+    KEYS_FILE = "keys.bin"
+    LOCK_FILE = ".lock"
+
+    def __init__(
+        self,
+        store_dir: Union[str, Path],
+        model_name: str,
+        dtype: str = "float32",
+    ):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"不支持的嵌入数据类型: {dtype}")
+
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.dir = Path(store_dir) / re.sub(r"[^\w.-]+", "_", model_name)
+        self.dimension: Optional[int] = None
+
+        self._index: Dict[bytes, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._rows = 0
+        self._lock = RLock()
+
+        self._load_meta()
+
+    def __len__(self) -> int:
+        self.refresh()
+        return self._rows
+
+    def __contains__(self, text: str) -> bool:
+        self.refresh()
+        return content_key(self.model_name, text) in self._index
+
+    def _load_meta(self):
+        meta_path = self.dir / self.META_FILE
+        if not meta_path.exists():
+            return
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        # 已有存储的数据类型优先，保证文件格式一致
+        self.dtype = np.dtype(meta.get("dtype", self.dtype.name))
+        self.dimension = int(meta["dimension"])
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """跨进程写锁（不支持 fcntl 的平台上退化为进程内锁）"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            self.dir.mkdir(parents=True, exist_ok=True)
+            with open(self.dir / self.LOCK_FILE, "a") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def refresh(self):
+        """加载其他进程追加的新行"""
+        keys_path = self.dir / self.KEYS_FILE
+        if self.dimension is None:
+            self._load_meta()
+            if self.dimension is None:
+                return
+        try:
+            rows = keys_path.stat().st_size // KEY_SIZE
+        except FileNotFoundError:
+            return
+        if rows <= self._rows:
+            return
+
+        with self._lock:
+            if rows <= self._rows:
+                return
+            with open(keys_path, "rb") as f:
+                f.seek(self._rows * KEY_SIZE)
+                data = f.read((rows - self._rows) * KEY_SIZE)
+            for offset in range(0, len(data), KEY_SIZE):
+                self._index[data[offset : offset + KEY_SIZE]] = (
+                    self._rows + offset // KEY_SIZE
+                )
+            self._matrix = np.memmap(
+                self.dir / self.VECTORS_FILE,
+                dtype=self.dtype,
+                mode="r",
+                shape=(rows, self.dimension),
+            )
+            self._rows = rows
+
+    def get_many(self, texts: Sequence[str]) -> Tuple[Dict[int, np.ndarray], List[int]]:
+        """
+        批量查询
+
+        Returns:
+            (位置 -> float32 向量, 未命中的位置列表)
+        """
+        self.refresh()
+        found: Dict[int, np.ndarray] = {}
+        missing: List[int] = []
+        for position, text in enumerate(texts):
+            row = self._index.get(content_key(self.model_name, text))
+            if row is None or self._matrix is None:
+                missing.append(position)
+            else:
+                found[position] = np.asarray(self._matrix[row], dtype="float32")
+        return found, missing
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray):
+        """批量追加向量（已存在的文本会被跳过）"""
+        if not len(texts):
+            return
+        array = np.asarray(vectors).reshape(len(texts), -1)
+
+        with self._file_lock():
+            self.dir.mkdir(parents=True, exist_ok=True)
+            self._load_meta()
+            if self.dimension is None:
+                self.dimension = int(array.shape[1])
+                tmp_path = self.dir / f"{self.META_FILE}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {
+                            "model_name": self.model_name,
+                            "dimension": self.dimension,
+                            "dtype": self.dtype.name,
+                        },
+                        f,
+                    )
+                os.replace(tmp_path, self.dir / self.META_FILE)
+            elif array.shape[1] != self.dimension:
+                raise ValueError(
+                    f"嵌入维度不匹配: {array.shape[1]} != {self.dimension}"
+                )
+
+            # 持锁后同步其他进程的写入，避免重复追加
+            self.refresh()
+            keys: List[bytes] = []
+            rows: List[int] = []
+            seen = set()
+            for row, text in enumerate(texts):
+                key = content_key(self.model_name, text)
+                if key in self._index or key in seen:
+                    continue
+                seen.add(key)
+                keys.append(key)
+                rows.append(row)
+            if not keys:
+                return
+
+            data = np.ascontiguousarray(array[rows], dtype=self.dtype)
+            with open(self.dir / self.VECTORS_FILE, "ab") as f:
+                # 丢弃上次中断写入留下的、没有对应键的尾部数据
+                f.truncate(self._rows * self.dimension * self.dtype.itemsize)
+                f.write(data.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            # 键最后写入：读取方看到键时对应的向量已经落盘
+            with open(self.dir / self.KEYS_FILE, "ab") as f:
+                # 同样丢弃中断写入留下的不完整的键，否则之后的键全部错位
+                f.truncate(self._rows * KEY_SIZE)
+                f.write(b"".join(keys))
+
+        self.refresh()
+
+    def get_stats(self) -> Dict[str, object]:
+        """获取存储统计信息"""
+        self.refresh()
+        return {
+            "model_name": self.model_name,
+            "entries": self._rows,
+            "dimension": self.dimension,
+            "dtype": self.dtype.name,
+            "path": str(self.dir),
+        }
@@ -11,6 +11,19 @@ from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+from .batch_executor import (
+    ACTION_COPY,
+    ACTION_MOVE,
+    ACTION_RENAME,
+    ACTION_SYMLINK,
+    CONFLICT_OVERWRITE,
+    FileOperation,
+    run_batch,
+)
+from .fs_scanner import ScanEntry, scan_files
+from .library_index import IndexedFile, LibraryIndex, LibraryWatcher
+from .release_parser import parse_release_name
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,6 +36,15 @@ class FileAction(Enum):
     RENAME = "rename"
 
 
+# 整理动作对应的批量执行器操作
+_BATCH_ACTIONS = {
+    FileAction.MOVE: ACTION_MOVE,
+    FileAction.COPY: ACTION_COPY,
+    FileAction.LINK: ACTION_SYMLINK,
+    FileAction.RENAME: ACTION_RENAME,
+}
+
+
 class MediaType(Enum):
     """媒体类型"""
 
@@ -72,11 +94,20 @@ class OrganizationRule:
 class FileOrganizer:
     """文件整理器"""
 
-    def __init__(self, base_path: str):
+    # 文件名解析逻辑变化时递增，使索引中缓存的元数据失效
+    INDEX_VERSION = "2"
+
+    def __init__(self, base_path: str, index_path: Optional[str] = None):
         self.base_path = Path(base_path)
         self.rules: List[OrganizationRule] = []
         self._load_default_rules()
 
+        # 配置索引路径后扫描只读取变化的目录，批量整理只处理新增或变化的文件
+        self.library_index: Optional[LibraryIndex] = None
+        if index_path:
+            self.library_index = LibraryIndex(index_path, version=self.INDEX_VERSION)
+        self.library_watcher: Optional[LibraryWatcher] = None
+
     def _load_default_rules(self):
         """加载默认整理规则"""
         default_rules = [
@@ -124,26 +155,97 @@ class FileOrganizer:
                 return True
         return False
 
-    def scan_directory(self, directory: Optional[str] = None) -> List[FileInfo]:
-        """扫描目录获取文件信息"""
+    def scan_directory(
+        self, directory: Optional[str] = None, pending_only: bool = False
+    ) -> List[FileInfo]:
+        """
+        扫描目录获取文件信息
+
+        Args:
+            directory: 扫描目录，默认为基础路径
+            pending_only: 只返回尚未整理或整理后发生变化的文件（需要启用索引）
+        """
         scan_path = Path(directory) if directory else self.base_path
+        if self.library_index is not None:
+            return self._scan_indexed(scan_path, pending_only)
+
         file_infos = []
 
         try:
-            for file_path in scan_path.rglob("*"):
-                if file_path.is_file():
-                    file_info = self._analyze_file(file_path)
-                    if file_info:
-                        file_infos.append(file_info)
+            # 复用扫描时的 stat 结果，不再逐个文件调用 is_file()/stat()
+            for entry in scan_files(scan_path):
+                file_info = self._analyze_file(Path(entry.path), entry)
+                if file_info:
+                    file_infos.append(file_info)
         except Exception as e:
             logger.error(f"Error scanning directory {scan_path}: {e}")
 
+        file_infos.sort(key=lambda info: info.path)
         return file_infos
 
-    def _analyze_file(self, file_path: Path) -> Optional[FileInfo]:
+    def start_watching(self) -> bool:
+        """监听基础路径的变化（需要启用索引并安装 watchdog），之后的扫描只读取变化的目录"""
+        if self.library_index is None:
+            return False
+        if self.library_watcher is None:
+            self.library_watcher = LibraryWatcher(self.library_index, self.base_path)
+        return self.library_watcher.start()
+
+    def stop_watching(self):
+        if self.library_watcher is not None:
+            self.library_watcher.stop()
+
+    def _scan_indexed(self, scan_path: Path, pending_only: bool) -> List[FileInfo]:
+        """增量刷新索引后从索引读取文件信息（未变化的文件不再重新解析）"""
+        watcher = self.library_watcher
+        scan_root = os.path.abspath(scan_path)
+        dirty_only = (
+            watcher is not None
+            and watcher.running
+            and (
+                scan_root == watcher.root or scan_root.startswith(watcher.root + os.sep)
+            )
+        )
+        try:
+            self.library_index.refresh(
+                scan_path, self._index_analyzer, dirty_only=dirty_only
+            )
+        except Exception as e:
+            logger.error(f"Error refreshing library index for {scan_path}: {e}")
+            return []
+        return [
+            self._file_info_from_index(indexed)
+            for indexed in self.library_index.files(scan_path, pending_only)
+        ]
+
+    def _index_analyzer(self, entry: ScanEntry) -> Tuple[str, Dict[str, Any]]:
+        ext = entry.extension
+        return (
+            self._detect_media_type(entry.name, ext).value,
+            self._extract_metadata(entry.name),
+        )
+
+    @staticmethod
+    def _file_info_from_index(indexed: IndexedFile) -> FileInfo:
+        return FileInfo(
+            path=indexed.path,
+            name=indexed.name,
+            size=indexed.size,
+            modified_time=indexed.mtime,
+            media_type=MediaType(indexed.media_type),
+            metadata=indexed.metadata,
+        )
+
+    def _analyze_file(
+        self, file_path: Path, entry: Optional[ScanEntry] = None
+    ) -> Optional[FileInfo]:
         """分析文件信息"""
         try:
-            stat = file_path.stat()
+            if entry is None:
+                stat = file_path.stat()
+                size, modified_time = stat.st_size, stat.st_mtime
+            else:
+                size, modified_time = entry.size, entry.mtime
 
             # 提取文件名和扩展名
             name = file_path.name
@@ -158,8 +260,8 @@ class FileOrganizer:
             return FileInfo(
                 path=str(file_path),
                 name=name,
-                size=stat.st_size,
-                modified_time=stat.st_mtime,
+                size=size,
+                modified_time=modified_time,
                 media_type=media_type,
                 metadata=metadata,
             )
@@ -188,66 +290,7 @@ class FileOrganizer:
 
     def _extract_metadata(self, filename: str) -> Dict[str, Any]:
         """从文件名提取元数据"""
-        metadata = {}
-
-        # 提取年份
-        year_match = re.search(r"(19|20)\d{2}", filename)
-        if year_match:
-            metadata["year"] = year_match.group()
-
-        # 提取季集信息
-        season_episode_match = re.search(
-            r"S(\d{1,2})E(\d{1,2})", filename, re.IGNORECASE
-        )
-        if season_episode_match:
-            metadata["season"] = str(int(season_episode_match.group(1)))
-            metadata["episode"] = str(int(season_episode_match.group(2)))
-
-        # 提取分辨率
-        resolution_match = re.search(
-            r"(480p|720p|1080p|4K|2160p)", filename, re.IGNORECASE
-        )
-        if resolution_match:
-            metadata["resolution"] = resolution_match.group().lower()
-
-        # 提取编码信息
-        codec_match = re.search(
-            r"(H\.?264|H\.?265|HEVC|AVC|X264|X265)", filename, re.IGNORECASE
-        )
-        if codec_match:
-            metadata["codec"] = codec_match.group().upper()
-
-        # 提取音频信息
-        audio_match = re.search(r"(DTS|AC3|AAC|FLAC|MP3)", filename, re.IGNORECASE)
-        if audio_match:
-            metadata["audio"] = audio_match.group().upper()
-
-        # 提取发布组信息
-        group_match = re.search(r"\[(.*?)\]", filename)
-        if group_match:
-            metadata["release_group"] = group_match.group(1)
-
-        # 提取标题（移除各种标识符）
-        title = re.sub(r"[\[\]].*?[\[\]]", "", filename)  # 移除括号内容
-        title = re.sub(
-            r"S\d{1,2}E\d{1,2}", "", title, flags=re.IGNORECASE
-        )  # 移除季集信息
-        title = re.sub(
-            r"(480p|720p|1080p|4K|2160p)", "", title, flags=re.IGNORECASE
-        )  # 移除分辨率
-        title = re.sub(
-            r"(H\.?264|H\.?265|HEVC|AVC|X264|X265)", "", title, flags=re.IGNORECASE
-        )  # 移除编码
-        title = re.sub(
-            r"(DTS|AC3|AAC|FLAC|MP3)", "", title, flags=re.IGNORECASE
-        )  # 移除音频
-        title = re.sub(r"[\[\]()]", "", title)  # 移除括号
-        title = re.sub(r"[\.\-_]", " ", title)  # 替换分隔符为空格
-        title = re.sub(r"\s+", " ", title).strip()  # 清理多余空格
-
-        metadata["title"] = title
-
-        return metadata
+        return parse_release_name(filename).to_dict()
 
     def organize_file(
         self, file_info: FileInfo, rule: Optional[OrganizationRule] = None
@@ -356,14 +399,79 @@ class FileOrganizer:
             )
             return False
 
-    def batch_organize(self, directory: Optional[str] = None) -> List[Dict[str, Any]]:
-        """批量整理目录中的文件"""
-        file_infos = self.scan_directory(directory)
-        results = []
+    def batch_organize(
+        self, directory: Optional[str] = None, journal_path: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        批量整理目录中的文件（启用索引时只整理新增或变化的文件）
+
+        先为所有文件匹配规则、生成目标路径，再交给批量执行器并行执行；批次内目标重复的
+        文件跳过后者，已存在的目标文件与单个整理时一样被覆盖。
+
+        Args:
+            directory: 整理目录，默认为基础路径
+            journal_path: 操作日志路径，配置后中断的任务可以继续执行或回滚
+        """
+        indexed = self.library_index is not None
+        file_infos = self.scan_directory(directory, pending_only=indexed)
+        results: List[Dict[str, Any]] = []
+        planned: List[Tuple[int, FileInfo, OrganizationRule]] = []
+        operations: List[FileOperation] = []
+        touched: List[str] = []
 
         for file_info in file_infos:
-            result = self.organize_file(file_info)
-            results.append(result)
+            rule = self._find_matching_rule(file_info)
+            if rule is None:
+                touched.append(file_info.path)
+                results.append(
+                    {
+                        "success": False,
+                        "message": "No matching rule found",
+                        "file": file_info.name,
+                    }
+                )
+                continue
+            try:
+                target_path = self._generate_target_path(file_info, rule)
+            except Exception as e:
+                logger.error(f"Error organizing file {file_info.path}: {e}")
+                results.append(
+                    {"success": False, "message": str(e), "file": file_info.name}
+                )
+                continue
+            operations.append(
+                FileOperation(file_info.path, target_path, _BATCH_ACTIONS[rule.action])
+            )
+            planned.append((len(results), file_info, rule))
+            results.append({})
+
+        executed = run_batch(
+            operations, on_conflict=CONFLICT_OVERWRITE, journal_path=journal_path
+        )
+        for (position, file_info, rule), op in zip(planned, executed):
+            if op.succeeded:
+                touched += [file_info.path, op.target]
+                results[position] = {
+                    "success": True,
+                    "action": rule.action.value,
+                    "original_path": file_info.path,
+                    "target_path": op.target,
+                    "rule_used": rule.name,
+                    "metadata": file_info.metadata,
+                }
+            else:
+                results[position] = {
+                    "success": False,
+                    "message": op.error,
+                    "file": file_info.name,
+                }
+
+        if indexed:
+            # 整理成功的原文件及其目标、以及未匹配规则的文件记为已处理；
+            # 整理失败的文件保持待处理状态，下次运行时重试
+            self.library_index.update_paths(
+                touched, self._index_analyzer, processed=True
+            )
 
         return results
 
@@ -0,0 +1,156 @@
+"""
+并行目录扫描
+基于 os.scandir，复用 DirEntry 的类型与 stat 信息，在线程池中并行遍历子目录，
+遍历时按扩展名过滤，并以生成器形式流式返回结果
+"""
+
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScanEntry:
+    """扫描结果"""
+
+    path: str
+    name: str
+    size: int
+    mtime: float
+    mtime_ns: int
+    inode: int
+    device: int
+    is_dir: bool = False
+
+    @property
+    def extension(self) -> str:
+        """小写扩展名（不含点）"""
+        return os.path.splitext(self.name)[1][1:].lower()
+
+
+def _normalize_extensions(extensions: Optional[Iterable[str]]) -> Optional[Set[str]]:
+    if extensions is None:
+        return None
+    return {
+        ext.lower() if ext.startswith(".") else f".{ext.lower()}" for ext in extensions
+    }
+
+
+def _scan_one(
+    directory: str,
+    extensions: Optional[Set[str]],
+    include_dirs: bool,
+    descend: bool,
+) -> Tuple[List[ScanEntry], List[str]]:
+    """扫描单个目录，返回 (匹配的条目, 需要继续遍历的子目录)"""
+    entries: List[ScanEntry] = []
+    subdirs: List[str] = []
+    try:
+        with os.scandir(directory) as iterator:
+            for item in iterator:
+                try:
+                    # 不进入符号链接目录；指向文件的符号链接按文件处理
+                    if item.is_dir(follow_symlinks=False):
+                        if descend:
+                            subdirs.append(item.path)
+                        if not include_dirs:
+                            continue
+                        is_dir = True
+                    elif item.is_file():
+                        if (
+                            extensions is not None
+                            and os.path.splitext(item.name)[1].lower() not in extensions
+                        ):
+                            continue
+                        is_dir = False
+                    else:
+                        continue
+
+                    st = item.stat()
+                    entries.append(
+                        ScanEntry(
+                            path=item.path,
+                            name=item.name,
+                            size=0 if is_dir else st.st_size,
+                            mtime=st.st_mtime,
+                            mtime_ns=st.st_mtime_ns,
+                            inode=st.st_ino,
+                            device=st.st_dev,
+                            is_dir=is_dir,
+                        )
+                    )
+                except OSError:
+                    # 扫描过程中被删除或无权限的条目直接跳过
+                    continue
+    except OSError as e:
+        logger.warning(f"无法读取目录 {directory}: {e}")
+    return entries, subdirs
+
+
+def list_directory(
+    directory: Union[str, os.PathLike], extensions: Optional[Iterable[str]] = None
+) -> Tuple[List[ScanEntry], List[str]]:
+    """
+    列出单个目录（不递归）
+
+    Returns:
+        (匹配的文件条目, 子目录路径)，目录不可读时均为空
+    """
+    return _scan_one(
+        os.fspath(directory), _normalize_extensions(extensions), False, True
+    )
+
+
+def scan_files(
+    root: Union[str, os.PathLike],
+    extensions: Optional[Iterable[str]] = None,
+    recursive: bool = True,
+    include_dirs: bool = False,
+    workers: int = 8,
+) -> Iterator[ScanEntry]:
+    """
+    扫描目录下的文件
+
+    Args:
+        root: 根目录
+        extensions: 只返回这些扩展名的文件（如 ``{".mkv", "strm"}``，不区分大小写）
+        recursive: 是否递归子目录
+        include_dirs: 是否同时返回目录条目
+        workers: 并行扫描的线程数（1 表示在当前线程中顺序扫描）
+
+    Yields:
+        ScanEntry，顺序不保证
+    """
+    root = os.fspath(root)
+    wanted = _normalize_extensions(extensions)
+
+    if workers <= 1 or not recursive:
+        pending = [root]
+        while pending:
+            entries, subdirs = _scan_one(pending.pop(), wanted, include_dirs, recursive)
+            yield from entries
+            pending.extend(subdirs)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fs-scan")
+    running: Set[Future] = set()
+    try:
+        running = {executor.submit(_scan_one, root, wanted, include_dirs, True)}
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                entries, subdirs = future.result()
+                for subdir in subdirs:
+                    running.add(
+                        executor.submit(_scan_one, subdir, wanted, include_dirs, True)
+                    )
+                yield from entries
+    finally:
+        # 调用方提前结束迭代时取消尚未开始的目录（shutdown 的 cancel_futures 需要 3.9+）
+        for future in running:
+            future.cancel()
+        executor.shutdown(wait=False)
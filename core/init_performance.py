@@ -12,7 +12,7 @@ from .cache_manager import (
     cache_manager,
     CacheLevel,
     MemoryCacheBackend,
-    DiskCacheBackend,
+    SQLiteCacheBackend,
 )
 from .performance_monitor import performance_monitor
 from .websocket_manager import websocket_manager
@@ -26,7 +26,7 @@ async def initialize_performance_system():
     try:
         # 初始化缓存后端
         memory_cache = MemoryCacheBackend(max_size=1000)
-        disk_cache = DiskCacheBackend(cache_dir=Path(".cache"))
+        disk_cache = SQLiteCacheBackend(cache_dir=Path(".cache"))
 
         cache_manager.add_backend(CacheLevel.MEMORY, memory_cache)
         cache_manager.add_backend(CacheLevel.DISK, disk_cache)
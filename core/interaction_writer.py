@@ -0,0 +1,165 @@
+"""
+用户交互写回队列
+交互记录和偏好权重先进入内存队列，由后台线程按批（N 条或 T 毫秒）在单个事务中写入 SQLite
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+_FLUSH = object()
+_STOP = object()
+
+
+class InteractionWriter:
+    """批量写回 SQLite 的后台写入器
+
+    后台线程使用独立的数据库连接，调用方线程不再共享游标。
+    交互记录按顺序追加；同一用户同一偏好在一个批次内只写入最后的权重。
+    """
+
+    def __init__(
+        self,
+        db_path: Union[str, Path],
+        batch_size: int = 256,
+        flush_interval: float = 0.2,
+    ):
+        self.db_path = str(db_path)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+
+        self.written_interactions = 0
+        self.written_preferences = 0
+        self.transactions = 0
+
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="interaction-writer", daemon=True
+                )
+                self._thread.start()
+
+    def add_interaction(self, row: Tuple[Any, ...]):
+        """排队一条交互记录 (user_id, media_id, type, value, metadata, timestamp)"""
+        self._ensure_started()
+        self._queue.put(("interaction", row))
+
+    def add_preferences(self, rows: List[Tuple[str, str, str, float]]):
+        """排队一组偏好权重 (user_id, preference_type, preference_value, weight)"""
+        if not rows:
+            return
+        self._ensure_started()
+        self._queue.put(("preference", rows))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待已排队的写入落盘"""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """写入剩余数据并停止后台线程"""
+        if self._thread is None:
+            return
+        self._queue.put((_STOP, None))
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("PRAGMA busy_timeout=5000")
+            interactions: List[Tuple[Any, ...]] = []
+            preferences: Dict[Tuple[str, str, str], float] = {}
+            deadline: Optional[float] = None
+
+            while True:
+                timeout = (
+                    None if deadline is None else max(0.0, deadline - time.monotonic())
+                )
+                try:
+                    kind, payload = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    kind, payload = _FLUSH, None
+
+                if kind == "interaction":
+                    interactions.append(payload)
+                elif kind == "preference":
+                    for user_id, pref_type, pref_value, weight in payload:
+                        preferences[(user_id, pref_type, pref_value)] = weight
+
+                if deadline is None and (interactions or preferences):
+                    deadline = time.monotonic() + self.flush_interval
+
+                pending = len(interactions) + len(preferences)
+                if kind in (_FLUSH, _STOP) or pending >= self.batch_size:
+                    if pending:
+                        self._write(conn, interactions, preferences)
+                        interactions = []
+                        preferences = {}
+                    deadline = None
+                    if kind is _FLUSH and payload is not None:
+                        payload.set()
+                    if kind is _STOP:
+                        return
+        finally:
+            conn.close()
+
+    def _write(
+        self,
+        conn: sqlite3.Connection,
+        interactions: List[Tuple[Any, ...]],
+        preferences: Dict[Tuple[str, str, str], float],
+    ):
+        try:
+            with conn:
+                if interactions:
+                    conn.executemany(
+                        """
+                        INSERT INTO user_interactions
+                        (user_id, media_id, interaction_type, interaction_value,
+                         metadata, timestamp)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                        interactions,
+                    )
+                if preferences:
+                    conn.executemany(
+                        """
+                        INSERT INTO user_preferences
+                        (user_id, preference_type, preference_value, preference_weight)
+                        VALUES (?, ?, ?, ?)
+                        ON CONFLICT (user_id, preference_type, preference_value)
+                        DO UPDATE SET preference_weight = excluded.preference_weight,
+                                      last_updated = CURRENT_TIMESTAMP
+                    """,
+                        [key + (weight,) for key, weight in preferences.items()],
+                    )
+            self.written_interactions += len(interactions)
+            self.written_preferences += len(preferences)
+            self.transactions += 1
+        except sqlite3.Error as e:
+            logger.error(f"批量写入用户交互失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self._queue.qsize(),
+            "written_interactions": self.written_interactions,
+            "written_preferences": self.written_preferences,
+            "transactions": self.transactions,
+        }
@@ -0,0 +1,139 @@
+"""
+重量级依赖的延迟加载
+torch / sentence-transformers / faiss / scikit-learn 等模块在首次使用时才导入，
+可在服务启动后由后台线程预加载，并记录每个模块的导入耗时
+"""
+
+import importlib
+import importlib.util
+import logging
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 模块名 -> 导入耗时（秒），只记录由本模块实际触发的导入
+_import_times: Dict[str, float] = {}
+_import_lock = threading.RLock()
+
+
+def is_available(name: str) -> bool:
+    """判断模块是否已安装（只查找顶层包，不执行导入）"""
+    top_level = name.partition(".")[0]
+    if top_level in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(top_level) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def import_module(name: str) -> ModuleType:
+    """导入模块并记录耗时"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _import_lock:
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        elapsed = time.perf_counter() - start
+        _import_times[name] = elapsed
+        logger.info(f"已加载模块 {name}，耗时 {elapsed * 1000:.0f} ms")
+        return module
+
+
+class LazyModule:
+    """延迟导入的模块代理
+
+    首次访问属性时导入真实模块；``before_import`` 在导入前执行一次（例如兼容性补丁）。
+    模块未安装时访问属性抛出 ``ImportError``，可先用 ``available`` 判断。
+    """
+
+    def __init__(self, name: str, before_import: Optional[Callable[[], None]] = None):
+        self.__dict__["_name"] = name
+        self.__dict__["_before_import"] = before_import
+        self.__dict__["_module"] = None
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def available(self) -> bool:
+        return self._module is not None or is_available(self._name)
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self) -> ModuleType:
+        module = self._module
+        if module is None:
+            with _import_lock:
+                module = self._module
+                if module is None:
+                    if self._before_import is not None:
+                        self._before_import()
+                    module = import_module(self._name)
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self.load(), attr)
+
+    def __setattr__(self, attr: str, value):
+        setattr(self.load(), attr, value)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def preload(
+    modules: Iterable[LazyModule], background: bool = True
+) -> Optional[threading.Thread]:
+    """
+    预加载模块（跳过未安装的模块）
+
+    Args:
+        modules: 需要预加载的模块
+        background: 是否在后台线程中加载
+
+    Returns:
+        后台线程（同步加载时返回 None）
+    """
+    pending: List[LazyModule] = [
+        module for module in modules if not module.loaded and module.available
+    ]
+
+    def run():
+        for module in pending:
+            try:
+                module.load()
+            except Exception as e:
+                logger.warning(f"预加载模块 {module.name} 失败: {e}")
+        # 预加载完成后才有完整的导入耗时
+        logger.info("模块预加载完成", extra={"import_times_ms": get_import_report()})
+
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name="module-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_import_report() -> Dict[str, float]:
+    """获取各模块导入耗时（毫秒），按耗时降序"""
+    return {
+        name: round(elapsed * 1000, 1)
+        for name, elapsed in sorted(
+            _import_times.items(), key=lambda item: item[1], reverse=True
+        )
+    }
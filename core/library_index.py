@@ -0,0 +1,645 @@
+"""
+媒体库增量索引
+以 SQLite 持久化文件路径、大小、修改时间、inode、媒体类型和解析出的元数据，
+通过比较目录修改时间（或 Linux 上的 inotify 监听）只重新读取发生变化的目录，
+所有新增、修改、删除都记录在变更日志中
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .fs_scanner import ScanEntry, _normalize_extensions, list_directory
+
+try:
+    from watchdog.events import FileSystemEventHandler  # type: ignore
+    from watchdog.observers import Observer  # type: ignore
+except ImportError:
+    FileSystemEventHandler = object  # type: ignore
+    Observer = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# 文件分析函数：扫描条目 -> (媒体类型, 元数据)
+Analyzer = Callable[[ScanEntry], Tuple[str, Dict[str, Any]]]
+
+# 目录修改时间距今小于该值时，同一时间戳内可能还有未观察到的变化，下次仍重新读取
+_RACY_WINDOW_NS = 2_000_000_000
+
+EVENT_ADDED = "added"
+EVENT_MODIFIED = "modified"
+EVENT_REMOVED = "removed"
+
+
+@dataclass
+class IndexedFile:
+    """索引中的文件"""
+
+    path: str
+    name: str
+    size: int
+    mtime_ns: int
+    inode: int
+    device: int
+    media_type: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def mtime(self) -> float:
+        return self.mtime_ns / 1e9
+
+
+@dataclass
+class ChangeSet:
+    """一次刷新发现的变化"""
+
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    scanned_dirs: int = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "added": self.added,
+            "modified": self.modified,
+            "removed": self.removed,
+            "scanned_dirs": self.scanned_dirs,
+        }
+
+
+def _entry_from_stat(path: str) -> Optional[ScanEntry]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not os.path.isfile(path):
+        return None
+    return ScanEntry(
+        path=path,
+        name=os.path.basename(path),
+        size=st.st_size,
+        mtime=st.st_mtime,
+        mtime_ns=st.st_mtime_ns,
+        inode=st.st_ino,
+        device=st.st_dev,
+    )
+
+
+def _under(root: str) -> Tuple[str, str]:
+    """LIKE 前缀匹配参数（转义通配符）"""
+    prefix = root.rstrip(os.sep) + os.sep
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return prefix, escaped + "%"
+
+
+class LibraryIndex:
+    """媒体库增量索引
+
+    ``refresh`` 逐个比较目录的修改时间：目录未变化时只沿用已知的子目录继续向下，
+    不读取目录内容；变化的目录才重新列出并与索引逐个比较大小、修改时间和 inode。
+    目录修改时间不会因文件原地修改而改变，这类变化需要 ``full=True`` 或监听器捕获。
+
+    文件另有“已处理”状态（处理时的大小和修改时间），``files(pending_only=True)``
+    只返回从未处理或处理后又变化的文件，供整理任务增量执行。
+    """
+
+    def __init__(
+        self,
+        db_path: Union[str, Path],
+        extensions: Optional[Iterable[str]] = None,
+        version: str = "1",
+    ):
+        """
+        Args:
+            db_path: 索引数据库路径
+            extensions: 只索引这些扩展名的文件（None 表示全部）
+            version: 分析器版本，变化时已有元数据全部作废并重新分析
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.extensions = _normalize_extensions(extensions)
+
+        self._lock = threading.RLock()
+        self._dirty: Set[str] = set()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL").fetchone()
+        self._init_schema(version)
+
+    def _init_schema(self, version: str):
+        with self.conn:
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    dir TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    device INTEGER NOT NULL,
+                    media_type TEXT,
+                    metadata TEXT,
+                    processed_size INTEGER,
+                    processed_mtime_ns INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS idx_files_dir ON files (dir);
+                CREATE TABLE IF NOT EXISTS dirs (
+                    path TEXT PRIMARY KEY,
+                    parent TEXT,
+                    mtime_ns INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_dirs_parent ON dirs (parent);
+                CREATE TABLE IF NOT EXISTS changes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    path TEXT NOT NULL,
+                    event TEXT NOT NULL,
+                    timestamp REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            """
+            )
+            row = self.conn.execute(
+                "SELECT value FROM meta WHERE key = 'version'"
+            ).fetchone()
+            if row is None or row[0] != version:
+                # 分析器变化后旧元数据不可信，清空目录时间戳强制全部重新分析
+                self.conn.execute("DELETE FROM files")
+                self.conn.execute("DELETE FROM dirs")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                    (version,),
+                )
+
+    # ------------------------------------------------------------------
+    # 刷新
+    # ------------------------------------------------------------------
+
+    def mark_dirty(self, directory: Union[str, Path]):
+        """标记目录需要重新读取（线程安全，供监听器调用）"""
+        with self._lock:
+            self._dirty.add(os.path.abspath(os.fspath(directory)))
+
+    def refresh(
+        self,
+        root: Union[str, Path],
+        analyze: Analyzer,
+        full: bool = False,
+        dirty_only: bool = False,
+    ) -> ChangeSet:
+        """
+        增量刷新目录
+
+        Args:
+            root: 根目录
+            analyze: 新增或修改的文件的分析函数
+            full: 重新读取所有目录（可发现原地修改的文件）
+            dirty_only: 只处理被标记的目录及其中新出现的子目录（监听器运行时使用）
+
+        Returns:
+            本次发现的变化
+        """
+        root = os.path.abspath(os.fspath(root))
+        changes = ChangeSet()
+        with self._lock:
+            dirty = {d for d in self._dirty if d == root or d.startswith(root + os.sep)}
+            self._dirty -= dirty
+            try:
+                with self.conn:
+                    if dirty_only and self._known_dir(root):
+                        pending = sorted(dirty)
+                    else:
+                        pending = [root]
+                    visited: Set[str] = set()
+                    while pending:
+                        directory = pending.pop()
+                        if directory in visited:
+                            continue
+                        visited.add(directory)
+                        pending.extend(
+                            self._refresh_dir(
+                                directory,
+                                analyze,
+                                changes,
+                                force=full or directory in dirty,
+                                descend_known=not dirty_only,
+                            )
+                        )
+            except Exception:
+                # 失败时恢复标记，下次刷新重新处理
+                self._dirty |= dirty
+                raise
+
+        if changes:
+            logger.info(
+                f"媒体库索引刷新 {root}: 新增 {len(changes.added)}，"
+                f"修改 {len(changes.modified)}，删除 {len(changes.removed)}，"
+                f"读取目录 {changes.scanned_dirs}"
+            )
+        return changes
+
+    def _known_dir(self, directory: str) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM dirs WHERE path = ?", (directory,)
+        ).fetchone()
+        return row is not None
+
+    def _refresh_dir(
+        self,
+        directory: str,
+        analyze: Analyzer,
+        changes: ChangeSet,
+        force: bool,
+        descend_known: bool,
+    ) -> List[str]:
+        """刷新单个目录，返回需要继续处理的子目录"""
+        try:
+            st = os.stat(directory)
+        except OSError:
+            self._drop_tree(directory, changes)
+            return []
+        if not os.path.isdir(directory):
+            self._drop_tree(directory, changes)
+            return []
+
+        row = self.conn.execute(
+            "SELECT mtime_ns FROM dirs WHERE path = ?", (directory,)
+        ).fetchone()
+        known_children = [
+            child
+            for (child,) in self.conn.execute(
+                "SELECT path FROM dirs WHERE parent = ?", (directory,)
+            )
+        ]
+        if not force and row is not None and row[0] == st.st_mtime_ns:
+            return known_children if descend_known else []
+
+        entries, subdirs = list_directory(directory, self.extensions)
+        changes.scanned_dirs += 1
+
+        indexed = {
+            path: (size, mtime_ns, inode)
+            for path, size, mtime_ns, inode in self.conn.execute(
+                "SELECT path, size, mtime_ns, inode FROM files WHERE dir = ?",
+                (directory,),
+            )
+        }
+        upserts = []
+        for entry in entries:
+            previous = indexed.pop(entry.path, None)
+            if previous == (entry.size, entry.mtime_ns, entry.inode):
+                continue
+            try:
+                media_type, metadata = analyze(entry)
+            except Exception as e:
+                logger.error(f"分析文件失败 {entry.path}: {e}")
+                continue
+            event = EVENT_ADDED if previous is None else EVENT_MODIFIED
+            upserts.append((entry, media_type, metadata, event))
+            (changes.added if previous is None else changes.modified).append(entry.path)
+        self._upsert(upserts)
+        self._delete_files(list(indexed), changes)
+
+        for child in set(known_children) - set(subdirs):
+            self._drop_tree(child, changes)
+
+        # 修改时间过新的目录下次仍重新读取，避免同一时间戳内的后续变化被忽略
+        mtime_ns = st.st_mtime_ns
+        if time.time_ns() - mtime_ns < _RACY_WINDOW_NS:
+            mtime_ns = -1
+        self.conn.execute(
+            """
+            INSERT INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?)
+            ON CONFLICT (path) DO UPDATE SET mtime_ns = excluded.mtime_ns
+        """,
+            (directory, os.path.dirname(directory), mtime_ns),
+        )
+
+        if descend_known:
+            return subdirs
+        # 只处理标记目录时，已知子目录由各自的标记负责
+        known = set(known_children)
+        return [subdir for subdir in subdirs if subdir not in known]
+
+    def _upsert(
+        self,
+        rows: List[Tuple[ScanEntry, str, Dict[str, Any], str]],
+        processed: bool = False,
+    ):
+        if not rows:
+            return
+        now = time.time()
+        self.conn.executemany(
+            """
+            INSERT INTO files (path, dir, name, size, mtime_ns, inode, device,
+                               media_type, metadata, processed_size,
+                               processed_mtime_ns)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (path) DO UPDATE SET
+                size = excluded.size,
+                mtime_ns = excluded.mtime_ns,
+                inode = excluded.inode,
+                device = excluded.device,
+                media_type = excluded.media_type,
+                metadata = excluded.metadata,
+                processed_size = COALESCE(excluded.processed_size,
+                                          files.processed_size),
+                processed_mtime_ns = COALESCE(excluded.processed_mtime_ns,
+                                              files.processed_mtime_ns)
+        """,
+            [
+                (
+                    entry.path,
+                    os.path.dirname(entry.path),
+                    entry.name,
+                    entry.size,
+                    entry.mtime_ns,
+                    entry.inode,
+                    entry.device,
+                    media_type,
+                    json.dumps(metadata, ensure_ascii=False, default=str),
+                    entry.size if processed else None,
+                    entry.mtime_ns if processed else None,
+                )
+                for entry, media_type, metadata, _ in rows
+            ],
+        )
+        self._journal([(row[0].path, row[3]) for row in rows], timestamp=now)
+
+    def _delete_files(self, paths: List[str], changes: ChangeSet):
+        if not paths:
+            return
+        self.conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in paths])
+        self._journal([(path, EVENT_REMOVED) for path in paths])
+        changes.removed.extend(paths)
+
+    def _drop_tree(self, directory: str, changes: ChangeSet):
+        """目录已不存在：删除其下所有文件和子目录记录"""
+        prefix, pattern = _under(directory)
+        removed = [
+            path
+            for (path,) in self.conn.execute(
+                "SELECT path FROM files WHERE dir = ? OR path LIKE ? ESCAPE '\\'",
+                (directory, pattern),
+            )
+        ]
+        self._delete_files(removed, changes)
+        self.conn.execute(
+            "DELETE FROM dirs WHERE path = ? OR path LIKE ? ESCAPE '\\'",
+            (directory, pattern),
+        )
+
+    def _journal(
+        self, events: List[Tuple[str, str]], timestamp: Optional[float] = None
+    ):
+        timestamp = time.time() if timestamp is None else timestamp
+        self.conn.executemany(
+            "INSERT INTO changes (path, event, timestamp) VALUES (?, ?, ?)",
+            [(path, event, timestamp) for path, event in events],
+        )
+
+    # ------------------------------------------------------------------
+    # 查询与处理状态
+    # ------------------------------------------------------------------
+
+    def files(
+        self, root: Optional[Union[str, Path]] = None, pending_only: bool = False
+    ) -> List[IndexedFile]:
+        """
+        查询索引中的文件（按路径排序）
+
+        Args:
+            root: 只返回该目录下的文件
+            pending_only: 只返回未处理或处理后发生变化的文件
+        """
+        sql = (
+            "SELECT path, name, size, mtime_ns, inode, device, media_type, metadata"
+            " FROM files"
+        )
+        clauses: List[str] = []
+        params: List[Any] = []
+        if root is not None:
+            root = os.path.abspath(os.fspath(root))
+            clauses.append("(dir = ? OR path LIKE ? ESCAPE '\\')")
+            params.extend([root, _under(root)[1]])
+        if pending_only:
+            clauses.append(
+                "(processed_mtime_ns IS NULL OR processed_mtime_ns != mtime_ns"
+                " OR processed_size != size)"
+            )
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY path"
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [
+            IndexedFile(
+                path=path,
+                name=name,
+                size=size,
+                mtime_ns=mtime_ns,
+                inode=inode,
+                device=device,
+                media_type=media_type,
+                metadata=json.loads(metadata) if metadata else {},
+            )
+            for path, name, size, mtime_ns, inode, device, media_type, metadata in rows
+        ]
+
+    def mark_processed(self, paths: Iterable[Union[str, Path]]):
+        """记录文件在当前状态下已处理"""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                """
+                UPDATE files SET processed_size = size, processed_mtime_ns = mtime_ns
+                WHERE path = ?
+            """,
+                [(os.path.abspath(os.fspath(path)),) for path in paths],
+            )
+
+    def update_paths(
+        self,
+        paths: Iterable[Union[str, Path]],
+        analyze: Analyzer,
+        processed: bool = False,
+    ) -> ChangeSet:
+        """
+        按路径直接同步索引（例如整理任务移动文件之后），无需重新读取目录
+
+        存在的文件被写入或更新，不存在的文件从索引中删除。
+        """
+        changes = ChangeSet()
+        with self._lock, self.conn:
+            upserts = []
+            removed = []
+            for path in paths:
+                path = os.path.abspath(os.fspath(path))
+                entry = _entry_from_stat(path)
+                if entry is None:
+                    row = self.conn.execute(
+                        "SELECT 1 FROM files WHERE path = ?", (path,)
+                    ).fetchone()
+                    if row is not None:
+                        removed.append(path)
+                    continue
+                if self.extensions is not None and (
+                    os.path.splitext(entry.name)[1].lower() not in self.extensions
+                ):
+                    continue
+                row = self.conn.execute(
+                    "SELECT size, mtime_ns, inode FROM files WHERE path = ?", (path,)
+                ).fetchone()
+                if row == (entry.size, entry.mtime_ns, entry.inode):
+                    if processed:
+                        self.conn.execute(
+                            """
+                            UPDATE files SET processed_size = size,
+                                             processed_mtime_ns = mtime_ns
+                            WHERE path = ?
+                        """,
+                            (path,),
+                        )
+                    continue
+                try:
+                    media_type, metadata = analyze(entry)
+                except Exception as e:
+                    logger.error(f"分析文件失败 {path}: {e}")
+                    continue
+                event = EVENT_ADDED if row is None else EVENT_MODIFIED
+                upserts.append((entry, media_type, metadata, event))
+                (changes.added if row is None else changes.modified).append(path)
+            self._upsert(upserts, processed=processed)
+            self._delete_files(removed, changes)
+        return changes
+
+    # ------------------------------------------------------------------
+    # 变更日志
+    # ------------------------------------------------------------------
+
+    @property
+    def last_seq(self) -> int:
+        with self._lock:
+            row = self.conn.execute("SELECT MAX(seq) FROM changes").fetchone()
+        return row[0] or 0
+
+    def changes_since(self, seq: int = 0, limit: int = 10000) -> List[Dict[str, Any]]:
+        """读取序号大于 ``seq`` 的变更记录"""
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT seq, path, event, timestamp FROM changes
+                WHERE seq > ? ORDER BY seq LIMIT ?
+            """,
+                (seq, limit),
+            ).fetchall()
+        return [
+            {"seq": s, "path": path, "event": event, "timestamp": timestamp}
+            for s, path, event, timestamp in rows
+        ]
+
+    def prune_journal(self, before_seq: int) -> int:
+        """删除序号小于 ``before_seq`` 的变更记录，返回删除条数"""
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM changes WHERE seq < ?", (before_seq,)
+            )
+        return cursor.rowcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            files, pending = self.conn.execute(
+                """
+                SELECT COUNT(*), COALESCE(SUM(processed_mtime_ns IS NULL
+                    OR processed_mtime_ns != mtime_ns OR processed_size != size), 0)
+                FROM files
+            """
+            ).fetchone()
+            dirs = self.conn.execute("SELECT COUNT(*) FROM dirs").fetchone()[0]
+            journal = self.conn.execute("SELECT COUNT(*) FROM changes").fetchone()[0]
+        return {
+            "db_path": str(self.db_path),
+            "files": files,
+            "pending": pending,
+            "dirs": dirs,
+            "journal": journal,
+        }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class _DirtyHandler(FileSystemEventHandler):  # type: ignore[misc]
+    """把文件系统事件转换为目录标记"""
+
+    def __init__(self, index: LibraryIndex):
+        super().__init__()
+        self.index = index
+
+    def on_any_event(self, event):
+        if getattr(event, "event_type", None) in ("opened", "closed_no_write"):
+            return
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if not path:
+                continue
+            path = os.fsdecode(path)
+            # 目录自身的增删改体现在父目录的列表中；目录内容修改时也重新读取该目录
+            self.index.mark_dirty(os.path.dirname(path))
+            if event.is_directory:
+                self.index.mark_dirty(path)
+
+
+class LibraryWatcher:
+    """媒体库目录监听器（需要 watchdog，Linux 上使用 inotify）
+
+    运行期间把发生变化的目录标记到索引中，``refresh(dirty_only=True)`` 只读取这些目录，
+    连原地修改的文件也能发现。watchdog 未安装时 ``available`` 为 False，
+    调用方应回退到按目录修改时间刷新。
+    """
+
+    def __init__(self, index: LibraryIndex, root: Union[str, Path]):
+        self.index = index
+        self.root = os.path.abspath(os.fspath(root))
+        self._observer = None
+
+    @property
+    def available(self) -> bool:
+        return Observer is not None
+
+    @property
+    def running(self) -> bool:
+        return self._observer is not None and self._observer.is_alive()
+
+    def start(self) -> bool:
+        """开始监听，成功返回 True"""
+        if self.running:
+            return True
+        if Observer is None:
+            logger.warning("watchdog 未安装，媒体库索引将按目录修改时间增量刷新")
+            return False
+        try:
+            observer = Observer()
+            observer.schedule(_DirtyHandler(self.index), self.root, recursive=True)
+            observer.daemon = True
+            observer.start()
+        except Exception as e:
+            logger.warning(f"启动目录监听失败 {self.root}: {e}")
+            return False
+        self._observer = observer
+        return True
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        if self._observer is None:
+            return
+        self._observer.stop()
+        self._observer.join(timeout)
+        self._observer = None
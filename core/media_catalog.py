@@ -0,0 +1,294 @@
+"""
+推荐系统媒体目录与用户偏好模块
+媒体目录以列式数组保存评分、年份和特征编号，并维护媒体ID到行号的索引；
+用户偏好以稀疏向量（有序特征编号 + 权重数组）保存，按交互增量更新
+"""
+
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+
+# 特征种类：分类、导演、演员、媒体类型
+FEATURE_GENRE = 0
+FEATURE_DIRECTOR = 1
+FEATURE_ACTOR = 2
+FEATURE_MEDIA_TYPE = 3
+
+FEATURE_KIND_NAMES = ("genre", "director", "actor", "media_type")
+
+# 偏好权重的默认值与下限
+DEFAULT_PREFERENCE_WEIGHT = 0.1
+
+
+class FeatureVocabulary:
+    """特征词表：``"genre:科幻"`` 形式的特征键与连续整数编号的双向映射"""
+
+    def __init__(self):
+        self.keys: List[str] = []
+        self._ids: Dict[str, int] = {}
+        # 按编号保存特征种类，容量按倍数增长
+        self._kinds = np.zeros(0, dtype=np.int8)
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get(self, key: str) -> Optional[int]:
+        return self._ids.get(key)
+
+    def add(self, kind: int, value: Any) -> int:
+        key = f"{FEATURE_KIND_NAMES[kind]}:{value}"
+        feature_id = self._ids.get(key)
+        if feature_id is None:
+            with self._lock:
+                feature_id = self._ids.get(key)
+                if feature_id is None:
+                    feature_id = len(self.keys)
+                    if feature_id >= len(self._kinds):
+                        kinds = np.zeros(
+                            max(feature_id + 1, len(self._kinds) * 2, 64),
+                            dtype=np.int8,
+                        )
+                        kinds[: len(self._kinds)] = self._kinds
+                        self._kinds = kinds
+                    # 先写入种类再公开编号，读取方拿到的编号总有对应的种类
+                    self._kinds[feature_id] = kind
+                    self.keys.append(key)
+                    self._ids[key] = feature_id
+        return feature_id
+
+    def kinds(self, feature_ids: np.ndarray) -> np.ndarray:
+        return self._kinds[feature_ids]
+
+    def split(self, feature_id: int) -> Tuple[str, str]:
+        """拆分为 (偏好类型, 偏好值)"""
+        pref_type, _, pref_value = self.keys[feature_id].partition(":")
+        return pref_type, pref_value
+
+
+def _numeric(value: Any) -> float:
+    if value:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            pass
+    return np.nan
+
+
+class MediaCatalog:
+    """列式媒体目录
+
+    每行对应推荐系统中的一个媒体（与向量索引行号一致）。评分、年份、媒体类型
+    保存为连续数组，分类/导演/前三位演员/媒体类型编码为特征编号数组，
+    其中分类和导演排在前面，是交互时用于学习偏好的特征。
+    """
+
+    def __init__(self, vocabulary: Optional[FeatureVocabulary] = None):
+        self.vocabulary = vocabulary or FeatureVocabulary()
+        self.ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self.ratings = np.zeros(0, dtype=np.float32)
+        self.years = np.zeros(0, dtype=np.float32)
+        self.type_codes = np.zeros(0, dtype=np.int32)
+        self._features: List[np.ndarray] = []
+        self._learned: List[int] = []  # 每行前多少个特征参与偏好学习
+        # 学习特征预先去重排序，交互时直接用于更新偏好向量
+        self._learned_counts: List[Tuple[np.ndarray, np.ndarray]] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, media_id: Any) -> bool:
+        return str(media_id) in self.row_of
+
+    def get_row(self, media_id: Any) -> Optional[int]:
+        return self.row_of.get(str(media_id)) if media_id is not None else None
+
+    def encode(self, item: Dict[str, Any]) -> Tuple[np.ndarray, int, int]:
+        """编码媒体特征，返回 (特征编号, 学习特征数, 媒体类型编号)"""
+        add = self.vocabulary.add
+        learned = [add(FEATURE_GENRE, genre) for genre in item.get("genres") or []]
+        learned += [
+            add(FEATURE_DIRECTOR, director) for director in item.get("directors") or []
+        ]
+        extra = [add(FEATURE_ACTOR, actor) for actor in (item.get("actors") or [])[:3]]
+        type_code = -1
+        if item.get("type"):
+            type_code = add(FEATURE_MEDIA_TYPE, item["type"])
+            extra.append(type_code)
+        return np.array(learned + extra, dtype=np.int32), len(learned), type_code
+
+    def _grow(self, size: int):
+        capacity = len(self.ratings)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 64)
+        for name, fill in (("ratings", np.nan), ("years", np.nan), ("type_codes", -1)):
+            old = getattr(self, name)
+            column = np.full(capacity, fill, dtype=old.dtype)
+            column[: len(old)] = old
+            setattr(self, name, column)
+
+    def _set_row(self, row: int, item: Dict[str, Any]):
+        features, learned, type_code = self.encode(item)
+        self.ratings[row] = _numeric(item.get("rating"))
+        self.years[row] = _numeric(item.get("year"))
+        self.type_codes[row] = type_code
+        self._features[row] = features
+        self._learned[row] = learned
+        unique, counts = np.unique(features[:learned], return_counts=True)
+        self._learned_counts[row] = (unique.astype(np.int32), counts)
+
+    def add(self, items: Sequence[Dict[str, Any]]):
+        """追加媒体（行号按追加顺序递增）"""
+        start = len(self.ids)
+        self._grow(start + len(items))
+        for offset, item in enumerate(items):
+            row = start + offset
+            media_id = str(item.get("id", ""))
+            self.ids.append(media_id)
+            if media_id:
+                self.row_of[media_id] = row
+            self._features.append(np.zeros(0, dtype=np.int32))
+            self._learned.append(0)
+            self._learned_counts.append((self._features[-1], self._features[-1]))
+            self._set_row(row, item)
+
+    def update(self, row: int, item: Dict[str, Any]):
+        """原位更新某一行的元数据"""
+        self._set_row(row, item)
+
+    def features(self, row: int) -> np.ndarray:
+        return self._features[row]
+
+    def learned_features(self, row: int) -> np.ndarray:
+        """交互时用于更新偏好的特征（分类和导演）"""
+        return self._features[row][: self._learned[row]]
+
+    def learned_counts(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        """去重排序后的学习特征及其出现次数"""
+        return self._learned_counts[row]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "media_count": len(self.ids),
+            "feature_count": len(self.vocabulary),
+        }
+
+
+class PreferenceVectors:
+    """用户偏好稀疏向量
+
+    每个用户保存一对有序数组（特征编号, 权重），未出现的特征取默认权重。
+    更新和查询都对整批特征做向量化的 ``searchsorted``。
+    """
+
+    def __init__(self, vocabulary: FeatureVocabulary):
+        self.vocabulary = vocabulary
+        self._vectors: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._lock = Lock()
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._vectors
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._vectors))
+
+    def weights(self, user_id: str, feature_ids: np.ndarray) -> np.ndarray:
+        """批量查询权重，未知特征返回默认权重"""
+        feature_ids = np.asarray(feature_ids, dtype=np.int32)
+        result = np.full(len(feature_ids), DEFAULT_PREFERENCE_WEIGHT)
+        vector = self._vectors.get(user_id)
+        if vector is None or not len(feature_ids):
+            return result
+        indices, values = vector
+        if not len(indices):
+            return result
+        positions = np.minimum(np.searchsorted(indices, feature_ids), len(indices) - 1)
+        found = indices[positions] == feature_ids
+        result[found] = values[positions[found]]
+        return result
+
+    def get_weight(self, user_id: str, key: str) -> float:
+        feature_id = self.vocabulary.get(key)
+        if feature_id is None:
+            return DEFAULT_PREFERENCE_WEIGHT
+        return float(self.weights(user_id, np.array([feature_id]))[0])
+
+    def update(
+        self,
+        user_id: str,
+        feature_ids: np.ndarray,
+        delta: float,
+        counts: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        增量更新：每次出现的特征权重加 ``delta``，结果不低于默认权重
+
+        Args:
+            feature_ids: 特征编号；传入 ``counts`` 时须已去重并升序排列
+            counts: 每个特征的出现次数
+
+        Returns:
+            (被更新的特征编号, 更新后的权重)
+        """
+        if counts is None:
+            unique, counts = np.unique(
+                np.asarray(feature_ids, dtype=np.int32), return_counts=True
+            )
+        else:
+            unique = feature_ids
+        if not len(unique):
+            return unique, np.zeros(0)
+
+        with self._lock:
+            current = self.weights(user_id, unique)
+            # 重复出现的特征依次更新，与一次加 counts*delta 后取下限等价
+            updated = np.maximum(DEFAULT_PREFERENCE_WEIGHT, current + counts * delta)
+            self._assign(user_id, unique, updated)
+        return unique, updated
+
+    def set_weights(self, user_id: str, feature_ids: np.ndarray, weights: np.ndarray):
+        """直接设置权重（例如从数据库加载）"""
+        feature_ids = np.asarray(feature_ids, dtype=np.int32)
+        order = np.argsort(feature_ids, kind="stable")
+        with self._lock:
+            self._assign(user_id, feature_ids[order], np.asarray(weights)[order])
+
+    def set_weight(self, user_id: str, key: str, weight: float):
+        pref_type, _, pref_value = key.partition(":")
+        feature_id = self.vocabulary.add(
+            FEATURE_KIND_NAMES.index(pref_type), pref_value
+        )
+        self.set_weights(user_id, np.array([feature_id]), np.array([weight]))
+
+    def _assign(self, user_id: str, feature_ids: np.ndarray, weights: np.ndarray):
+        """按有序特征编号写入权重（调用方持有锁）"""
+        indices, values = self._vectors.get(
+            user_id, (np.zeros(0, dtype=np.int32), np.zeros(0))
+        )
+        positions = np.searchsorted(indices, feature_ids)
+        clipped = np.minimum(positions, max(len(indices) - 1, 0))
+        found = (positions < len(indices)) & (
+            indices[clipped] == feature_ids if len(indices) else False
+        )
+
+        values = values.copy()
+        values[positions[found]] = weights[found]
+        missing = ~found
+        if missing.any():
+            indices = np.insert(indices, positions[missing], feature_ids[missing])
+            values = np.insert(values, positions[missing], weights[missing])
+        self._vectors[user_id] = (indices, values)
+
+    def to_dict(self, user_id: str) -> Dict[str, float]:
+        """以 ``{"genre:科幻": 权重}`` 形式导出"""
+        vector = self._vectors.get(user_id)
+        if vector is None:
+            return {}
+        keys = self.vocabulary.keys
+        return {keys[i]: float(w) for i, w in zip(*vector)}
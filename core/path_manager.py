@@ -9,17 +9,29 @@ import logging
 from pathlib import Path
 from typing import Any, Optional, List, Dict, Tuple
 
+from .batch_executor import ACTION_RENAME, FileOperation, run_batch
+from .dedup import DuplicateCluster, DuplicateFinder
+
 
 class PathManager:
     """路径管理器，负责文件路径的优化和管理"""
 
-    def __init__(self, base_path: Optional[str] = None):
+    def __init__(
+        self, base_path: Optional[str] = None, hash_cache_path: Optional[str] = None
+    ):
         self.base_path: Optional[Path] = None
         if base_path is not None:
             self.base_path = Path(base_path)
             self.base_path.mkdir(parents=True, exist_ok=True)
         self.logger: logging.Logger = logging.getLogger(__name__)
 
+        # 重复文件查找的哈希缓存，默认放在基础目录下
+        self.hash_cache_path: Optional[Path] = None
+        if hash_cache_path is not None:
+            self.hash_cache_path = Path(hash_cache_path)
+        elif self.base_path is not None:
+            self.hash_cache_path = self.base_path / ".dedup_cache.db"
+
     def sanitize_filename(self, filename: str) -> str:
         """
         清理文件名，移除非法字符
@@ -165,19 +177,27 @@ class PathManager:
             return False
 
     def batch_rename(
-        self, files: List[Dict[str, Any]], template: str
+        self,
+        files: List[Dict[str, Any]],
+        template: str,
+        journal_path: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         批量重命名文件
 
+        先规划全部新路径并一次性处理重名，再并行执行重命名。
+
         Args:
             files: 文件信息列表
             template: 命名模板
+            journal_path: 操作日志路径，配置后中断的任务可以继续执行或回滚
 
         Returns:
-            重命名结果列表
+            重命名结果列表（与输入顺序一致）
         """
-        results = []
+        results: List[Optional[Dict[str, Any]]] = []
+        operations: List[FileOperation] = []
+        positions: List[int] = []
 
         for file_info in files:
             try:
@@ -243,36 +263,40 @@ class PathManager:
                 # 获取原始文件路径
                 original_path = Path(file_info["path"])
 
-                # 构建新路径
-                new_path = original_path.parent / new_filename
-
-                # 确保文件名唯一
-                unique_filename = self.get_unique_filename(str(new_path))
-                new_path = Path(unique_filename)
-
-                # 重命名文件
-                original_path.rename(new_path)
-
-                # 记录结果
-                result = {
-                    "original_path": str(original_path),
-                    "new_path": str(new_path),
-                    "success": True,
-                    "error": None,
-                }
-                results.append(result)
+                # 新路径与原文件同目录，重名由规划阶段统一处理
+                operations.append(
+                    FileOperation(
+                        str(original_path),
+                        str(original_path.parent / new_filename),
+                        ACTION_RENAME,
+                    )
+                )
+                positions.append(len(results))
+                results.append(None)
 
             except Exception as e:
                 # 记录错误
-                result = {
-                    "original_path": file_info.get("path", "unknown"),
-                    "new_path": None,
-                    "success": False,
-                    "error": str(e),
-                }
-                results.append(result)
+                results.append(
+                    {
+                        "original_path": file_info.get("path", "unknown"),
+                        "new_path": None,
+                        "success": False,
+                        "error": str(e),
+                    }
+                )
 
-        return results
+        planned = run_batch(
+            operations, suffix_format="_{:03d}", journal_path=journal_path
+        )
+        for position, op in zip(positions, planned):
+            results[position] = {
+                "original_path": op.source,
+                "new_path": op.target if op.succeeded else None,
+                "success": op.succeeded,
+                "error": op.error if not op.succeeded else None,
+            }
+
+        return results  # type: ignore[return-value]
 
     def _render_template(self, template: str, file_info: Dict[str, Any]) -> str:
         """
@@ -319,24 +343,31 @@ class PathManager:
             directory: 要检查的目录
 
         Returns:
-            重复文件对列表
+            重复文件对列表（每个重复簇中第一个文件与其余文件配对）
         """
         duplicates: List[Tuple[str, str]] = []
-        file_hashes: Dict[str, Path] = {}
-
-        dir_path = Path(directory)
+        for cluster in self.find_duplicate_clusters(directory):
+            first = cluster.paths[0]
+            duplicates.extend((first, other) for other in cluster.paths[1:])
+        return duplicates
 
-        for file_path in dir_path.rglob("*"):
-            if file_path.is_file():
-                # 计算文件哈希（简化实现）
-                file_hash = self._get_file_hash(file_path)
+    def find_duplicate_clusters(
+        self, directory: str, workers: int = 8
+    ) -> List[DuplicateCluster]:
+        """
+        分阶段查找重复文件簇：按大小分组、头尾块哈希、全量哈希
 
-                if file_hash in file_hashes:
-                    duplicates.append((str(file_hashes[file_hash]), str(file_path)))
-                else:
-                    file_hashes[file_hash] = file_path
+        Args:
+            directory: 要检查的目录
+            workers: 并行哈希的线程数
 
-        return duplicates
+        Returns:
+            重复文件簇列表，按可节省空间降序排列
+        """
+        finder = DuplicateFinder(cache_path=self.hash_cache_path, workers=workers)
+        clusters = finder.find(directory)
+        self.logger.info(f"重复文件查找完成: {finder.stats}, {len(clusters)} 个重复簇")
+        return clusters
 
     def _get_file_hash(self, filepath: Path) -> str:
         """
@@ -0,0 +1,338 @@
+"""
+发布名称解析
+重命名器、文件整理器和 RSS 解析器共用的预编译解析器：标题、年份、季集、分辨率、
+编码、音频、来源、发布组和大小，解析结果按名称做有界 LRU 缓存
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# 分辨率映射（按优先级排列，标记不区分大小写，须位于词边界）
+RESOLUTION_PATTERNS: Dict[str, List[str]] = {
+    "2160p": ["2160p", "4k", "uhd"],
+    "1080p": ["1080p", "1080"],
+    "720p": ["720p", "720"],
+    "480p": ["480p", "480"],
+}
+
+# 编码映射
+CODEC_PATTERNS: Dict[str, List[str]] = {
+    "H265": ["h265", "h.265", "hevc", "x265"],
+    "H264": ["h264", "h.264", "x264", "avc"],
+    "AV1": ["av1"],
+}
+
+# 音频格式映射
+AUDIO_PATTERNS: Dict[str, List[str]] = {
+    "DTS-HD": ["dts-hd", "dtshd"],
+    "DTS": ["dts"],
+    "Dolby Atmos": ["atmos"],
+    "Dolby Digital": ["ac3", "ddp", "dd+", "dd", "dolbydigital"],
+    "AAC": ["aac"],
+    "FLAC": ["flac"],
+}
+
+# 来源映射
+SOURCE_PATTERNS: Dict[str, List[str]] = {
+    "BluRay": ["bluray", "bdrip", "brrip"],
+    "WEB-DL": ["webdl", "web-dl", "webrip"],
+    "HDTV": ["hdtv"],
+    "DVD": ["dvdrip", "dvd"],
+}
+
+# 大小解析正则及其宽松的快速定位正则
+SIZE_PATTERN = r"(\d+\.?\d*)\s*(GB|MB|gb|mb)"
+SIZE_ANCHOR_PATTERN = r"[\d.]+\s*(?:GB|MB|gb|mb)"
+
+# 没有 SxxExx 时单独出现的季、集标记（须是独立的词）
+SEASON_PATTERN = r"(?<![A-Za-z0-9])[Ss](\d{1,2})(?!\d)"
+EPISODE_PATTERN = r"(?<![A-Za-z0-9])[Ee][Pp]?(\d{1,4})(?!\d)"
+
+# 被视为扩展名的后缀（发布名称中的 “.5.1”、“.S01E01” 等不是扩展名）
+KNOWN_EXTENSIONS = frozenset(
+    "mp4 mkv avi mov wmv flv webm m4v 3gp ts mts m2ts iso rmvb "
+    "mp3 wav flac aac ogg wma m4a "
+    "strm nfo srt ass ssa sub idx sup torrent txt jpg png".split()
+)
+
+_SEASON_EPISODE = re.compile(r"(?<![A-Za-z0-9])[Ss](\d{1,3})[Ee](\d{1,4})")
+# 动漫常见的 “标题 - 01”“[01]” 集数写法
+_ANIME_EPISODE = re.compile(
+    r"\s-\s(\d{1,3})(?:v\d)?(?=\s|\[|\(|$)|\[(\d{1,3})(?:v\d)?\]"
+)
+_YEAR = re.compile(r"(?<![0-9A-Za-z])((?:19|20)\d{2})(?![0-9]|x\d)")
+_LEADING_GROUP = re.compile(r"^\s*\[([^\]]+)\]\s*")
+_TRAILING_GROUP = re.compile(r"-([A-Za-z0-9]+)$")
+_BRACKET = re.compile(r"[\[(]")
+_SEPARATORS = re.compile(r"[._\s]+")
+_TITLE_STRIP = " -([{._"
+
+# 属性标记的边界：前面不能紧跟字母数字，后面不能紧跟字母（允许 “DD5.1”“AAC2.0”）
+_TOKEN_START = r"(?<![a-z0-9])"
+_TOKEN_END = r"(?![a-z])"
+
+# 以连字符结尾但不是发布组的标记（如 DTS-HD、WEB-DL）
+_NOT_GROUPS = frozenset({"hd", "dl", "ma", "rip"})
+
+
+class ReleaseInfo(NamedTuple):
+    """发布名称解析结果（会被缓存共享，不可修改）"""
+
+    title: str
+    year: Optional[str] = None
+    season: Optional[int] = None
+    episode: Optional[int] = None
+    resolution: str = ""
+    codec: str = ""
+    audio: str = ""
+    source_type: str = ""
+    release_group: str = ""
+    size_gb: float = 0.0
+
+    @property
+    def season_episode(self) -> str:
+        if self.season is None or self.episode is None:
+            return ""
+        return f"S{self.season:02d}E{self.episode:02d}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为媒体信息字典（只包含解析到的字段，季集为字符串）"""
+        info: Dict[str, Any] = {}
+        if self.year:
+            info["year"] = self.year
+        if self.season is not None:
+            info["season"] = str(self.season)
+        if self.episode is not None:
+            info["episode"] = str(self.episode)
+        if self.season_episode:
+            info["season_episode"] = self.season_episode
+        for key in ("resolution", "codec", "audio", "release_group", "source_type"):
+            value = getattr(self, key)
+            if value:
+                info[key] = value
+        info["title"] = self.title
+        return info
+
+
+def _token_alternation(substrings) -> str:
+    """标记的正则分支，长的在前（使 “1080p” 先于 “1080” 尝试）"""
+    return "|".join(
+        re.escape(sub) for sub in sorted(set(substrings), key=len, reverse=True)
+    )
+
+
+def _compile_families(
+    families: List[Dict[str, List[str]]],
+) -> List[Tuple[Tuple[str, "re.Pattern[str]"], ...]]:
+    """编译属性族：每族为按优先级排列的 (属性值, 匹配其任一标记的正则)"""
+    return [
+        tuple(
+            (
+                value,
+                re.compile(
+                    _TOKEN_START
+                    + "(?:"
+                    + _token_alternation(sub.lower() for sub in substrings)
+                    + ")"
+                    + _TOKEN_END
+                ),
+            )
+            for value, substrings in patterns.items()
+            if substrings
+        )
+        for patterns in families
+    ]
+
+
+def _compile_marker(families: List[Dict[str, List[str]]]) -> "re.Pattern[str]":
+    """编译标题结束标记正则（作用于小写名称）：位于词边界的属性标记、季集、年份，
+    或任意括号、动漫集数"""
+    alternation = _token_alternation(
+        sub.lower()
+        for patterns in families
+        for substrings in patterns.values()
+        for sub in substrings
+    )
+    return re.compile(
+        _TOKEN_START
+        + "(?:"
+        + ("(?:" + alternation + ")" + _TOKEN_END + "|" if alternation else "")
+        + r"s\d{1,3}(?:e\d{1,4}|(?!\d))|ep?\d{1,4}(?!\d)"
+        + r"|(?:19|20)\d{2}(?![0-9]|x\d))"
+        + r"|[\[(]|\s-\s\d{1,3}(?:v\d)?(?=\s|\[|\(|$)"
+    )
+
+
+class ReleaseNameParser:
+    """预编译的发布名称解析器
+
+    分辨率/编码/音频/来源四个属性族按映射表顺序取第一个出现了标记的属性值（标记须位于
+    词边界，避免 “Addams” 中的 “dd” 被当作音频；不区分大小写，名称只转小写一次）。
+    标题取第一个位于词边界的标记（属性、季集、年份、括号）之前的部分，所有标记合并为
+    一条预编译正则，一次搜索即可定位。
+    ``parse`` 按名称缓存结果，重复名称（RSS 重复条目、反复扫描的文件）不再重新解析。
+    """
+
+    def __init__(
+        self,
+        resolution_patterns: Optional[Dict[str, List[str]]] = None,
+        codec_patterns: Optional[Dict[str, List[str]]] = None,
+        audio_patterns: Optional[Dict[str, List[str]]] = None,
+        source_patterns: Optional[Dict[str, List[str]]] = None,
+        size_pattern: str = SIZE_PATTERN,
+        size_anchor_pattern: Optional[str] = SIZE_ANCHOR_PATTERN,
+        season_pattern: str = SEASON_PATTERN,
+        episode_pattern: str = EPISODE_PATTERN,
+        cache_size: int = 65536,
+    ):
+        families = [
+            resolution_patterns or RESOLUTION_PATTERNS,
+            codec_patterns or CODEC_PATTERNS,
+            audio_patterns or AUDIO_PATTERNS,
+            source_patterns or SOURCE_PATTERNS,
+        ]
+        self._families = _compile_families(families)
+        self._size = re.compile(size_pattern)
+        self._size_anchor = (
+            re.compile(size_anchor_pattern) if size_anchor_pattern else None
+        )
+        self._marker = _compile_marker(families)
+        self._season = re.compile(season_pattern)
+        self._episode = re.compile(episode_pattern)
+        self.parse = lru_cache(maxsize=cache_size)(self._parse)
+
+    def cache_info(self):
+        return self.parse.cache_info()
+
+    def cache_clear(self):
+        self.parse.cache_clear()
+
+    def _parse_size(self, name: str) -> float:
+        """解析大小（GB）"""
+        if self._size_anchor is None:
+            size_match = self._size.search(name)
+        else:
+            # 先用宽松正则定位候选起点，再从该处执行精确匹配
+            anchor_match = self._size_anchor.search(name)
+            size_match = (
+                self._size.search(name, anchor_match.start()) if anchor_match else None
+            )
+
+        if not size_match:
+            return 0.0
+
+        size_value = float(size_match.group(1))
+        unit = size_match.group(2).lower()
+        if unit == "gb":
+            return size_value
+        if unit == "mb":
+            return size_value / 1024
+        return 0.0
+
+    def _scan_attributes(self, lower: str) -> List[str]:
+        """按优先级取各属性族第一个出现了标记的属性值（整个名称，含扩展名）"""
+        values = []
+        for family in self._families:
+            found = ""
+            for value, pattern in family:
+                if pattern.search(lower):
+                    found = value
+                    break
+            values.append(found)
+        return values
+
+    def _parse(self, name: str) -> ReleaseInfo:
+        text = name.strip()
+        lower = text.lower()
+        end = len(text)
+        dot = text.rfind(".")
+        if dot >= 0 and lower[dot + 1 :] in KNOWN_EXTENSIONS:
+            end = dot
+
+        release_group = ""
+        start = 0
+        leading = _LEADING_GROUP.match(text, 0, end)
+        if leading:
+            release_group = leading.group(1)
+            start = leading.end()
+
+        resolution, codec, audio, source_type = self._scan_attributes(lower)
+        size_gb = self._parse_size(text) if "gb" in lower or "mb" in lower else 0.0
+
+        # 结尾的 “-组名” 只有在名称中还有其他发布标记时才算发布组（避免 “Spider-Man”）
+        trailing = _TRAILING_GROUP.search(text, start, end)
+        if trailing and trailing.group(1).lower() not in _NOT_GROUPS:
+            marker = self._marker.search(lower, start + 1, trailing.start())
+            if marker or size_gb:
+                release_group = trailing.group(1)
+                end = trailing.start()
+        else:
+            marker = None
+        if marker is None:
+            marker = self._marker.search(lower, start + 1, end)
+        # 标题取第一个标记之前的部分；开头的标记（如片名 “2012”）不截断
+        cut = marker.start() if marker else end
+
+        season = episode = None
+        pair = _SEASON_EPISODE.search(text, start, end)
+        if pair:
+            season, episode = int(pair.group(1)), int(pair.group(2))
+        else:
+            season_match = self._season.search(text, start, end)
+            if season_match:
+                season = int(season_match.group(1))
+            episode_match = self._episode.search(
+                text, start, end
+            ) or _ANIME_EPISODE.search(text, start, end)
+            if episode_match:
+                episode = int(episode_match.group(episode_match.lastindex or 1))
+
+        # 开头的年份属于标题，其余取最后一个
+        years = _YEAR.findall(text, start + 1, end)
+        year = years[-1] if years else None
+
+        title = _SEPARATORS.sub(" ", text[start:cut]).strip(_TITLE_STRIP)
+        if not title:
+            title = _SEPARATORS.sub(" ", text[start:end]).strip(_TITLE_STRIP)
+
+        return ReleaseInfo(
+            title,
+            year,
+            season,
+            episode,
+            resolution,
+            codec,
+            audio,
+            source_type,
+            release_group,
+            size_gb,
+        )
+
+    def classify(self, title: str) -> Tuple[float, str, str, str, int, int]:
+        """RSS 用的精简结果：(大小GB, 分辨率, 编码, 音频, 季, 集)，缺失的季集为 0"""
+        info = self.parse(title)
+        return (
+            info.size_gb,
+            info.resolution,
+            info.codec,
+            info.audio,
+            info.season or 0,
+            info.episode or 0,
+        )
+
+
+_default_parser: Optional[ReleaseNameParser] = None
+
+
+def get_release_parser() -> ReleaseNameParser:
+    """获取共享的默认解析器"""
+    global _default_parser
+    if _default_parser is None:
+        _default_parser = ReleaseNameParser()
+    return _default_parser
+
+
+def parse_release_name(name: str) -> ReleaseInfo:
+    """使用默认解析器解析发布名称或文件名"""
+    return get_release_parser().parse(name)
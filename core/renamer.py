@@ -9,9 +9,21 @@ import shutil
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from urllib.parse import urlparse
 
+from .batch_executor import (
+    ACTION_COPY,
+    ACTION_HARDLINK,
+    ACTION_MOVE,
+    ACTION_SYMLINK,
+    FileOperation,
+    run_batch,
+)
+from .fs_scanner import ScanEntry, list_directory
+from .library_index import LibraryIndex
+from .release_parser import parse_release_name
+
 
 class RenameTemplate:
     """重命名模板类"""
@@ -88,108 +100,7 @@ class FileRenamer:
 
     def parse_filename(self, filename: str) -> Dict[str, Any]:
         """解析文件名获取媒体信息"""
-        info = {}
-
-        # 提取年份
-        year_match = re.search(r"(19|20)\d{2}", filename)
-        if year_match:
-            info["year"] = year_match.group()
-
-        # 提取季集信息
-        season_episode_match = re.search(r"[Ss](\d+)[Ee](\d+)", filename)
-        if season_episode_match:
-            season = int(season_episode_match.group(1))
-            episode = int(season_episode_match.group(2))
-            info["season"] = str(season)
-            info["episode"] = str(episode)
-            info["season_episode"] = f"S{season:02d}E{episode:02d}"
-
-        # 提取分辨率
-        resolution_patterns = {
-            "2160p": ["2160p", "4k", "uhd"],
-            "1080p": ["1080p", "1080"],
-            "720p": ["720p", "720"],
-            "480p": ["480p", "480"],
-        }
-
-        for resolution, patterns in resolution_patterns.items():
-            if any(pattern in filename.lower() for pattern in patterns):
-                info["resolution"] = resolution
-                break
-
-        # 提取编码
-        codec_patterns = {
-            "H265": ["h265", "hevc", "x265"],
-            "H264": ["h264", "x264", "avc"],
-            "AV1": ["av1"],
-        }
-
-        for codec, patterns in codec_patterns.items():
-            if any(pattern in filename.lower() for pattern in patterns):
-                info["codec"] = codec
-                break
-
-        # 提取音频格式
-        audio_patterns = {
-            "DTS-HD": ["dts-hd", "dtshd"],
-            "DTS": ["dts"],
-            "Dolby Atmos": ["atmos"],
-            "Dolby Digital": ["ac3", "dd", "dolbydigital"],
-            "AAC": ["aac"],
-            "FLAC": ["flac"],
-        }
-
-        for audio, patterns in audio_patterns.items():
-            if any(pattern in filename.lower() for pattern in patterns):
-                info["audio"] = audio
-                break
-
-        # 提取发布组
-        group_match = re.search(r"-([A-Za-z0-9]+)(?:\.[^.]+)?$", filename)
-        if group_match:
-            info["release_group"] = group_match.group(1)
-
-        # 提取来源类型
-        source_patterns = {
-            "BluRay": ["bluray", "bdrip", "brrip"],
-            "WEB-DL": ["webdl", "web-dl", "webrip"],
-            "HDTV": ["hdtv"],
-            "DVD": ["dvdrip", "dvd"],
-        }
-
-        for source, patterns in source_patterns.items():
-            if any(pattern in filename.lower() for pattern in patterns):
-                info["source_type"] = source
-                break
-
-        # 提取标题（移除其他信息）
-        title = filename
-
-        # 移除扩展名
-        title = Path(title).stem
-
-        # 移除常见标识符
-        patterns_to_remove = [
-            r"[Ss]\d+[Ee]\d+",  # 季集信息
-            r"(19|20)\d{2}",  # 年份
-            r"2160p|1080p|720p|480p",  # 分辨率
-            r"h265|h264|hevc|x265|x264|av1",  # 编码
-            r"dts[-_]?hd|dts|atmos|ac3|aac|flac",  # 音频
-            r"bluray|bdrip|webdl|hdtv|dvdrip",  # 来源
-            r"\[.*?\]",  # 方括号内容
-            r"\(.*?\)",  # 圆括号内容
-        ]
-
-        for pattern in patterns_to_remove:
-            title = re.sub(pattern, "", title, flags=re.IGNORECASE)
-
-        # 清理标题
-        title = re.sub(r"[._]+", " ", title)
-        title = title.strip(" ._-")
-
-        info["title"] = title
-
-        return info
+        return parse_release_name(filename).to_dict()
 
     def generate_new_filename(
         self, old_filename: str, media_info: Dict[str, Any]
@@ -254,24 +165,42 @@ class FileRenamer:
             self.logger.error(f"Error renaming file: {e}")
             return False
 
-    def batch_rename(self, directory: str, strategy: str = "move") -> Dict[str, str]:
-        """批量重命名目录中的文件"""
+    def batch_rename(
+        self,
+        directory: str,
+        strategy: str = "move",
+        journal_path: Optional[str] = None,
+    ) -> Dict[str, str]:
+        """
+        批量重命名目录中的文件
+
+        先规划全部新文件名并一次性处理重名（追加 _01、_02 …），再并行执行。
+
+        Args:
+            directory: 目录
+            strategy: move / copy / hardlink / symlink
+            journal_path: 操作日志路径，配置后中断的任务可以继续执行或回滚
+        """
         results: Dict[str, str] = {}
 
         dir_path = Path(directory)
         if not dir_path.exists() or not dir_path.is_dir():
             return results
+        if strategy not in (ACTION_MOVE, ACTION_COPY, ACTION_HARDLINK, ACTION_SYMLINK):
+            return results
 
-        for file_path in dir_path.iterdir():
-            if (
-                file_path.is_file()
-                and file_path.suffix.lower() in self.video_extensions
-            ):
-                media_info = self.parse_filename(file_path.name)
-                new_filename = self.generate_new_filename(file_path.name, media_info)
+        entries, _ = list_directory(dir_path, self.video_extensions)
+        operations = []
+        for entry in sorted(entries, key=lambda e: e.name):
+            media_info = self.parse_filename(entry.name)
+            new_filename = self.generate_new_filename(entry.name, media_info)
+            operations.append(
+                FileOperation(entry.path, str(dir_path / new_filename), strategy)
+            )
 
-                if self.rename_file(str(file_path), new_filename, strategy):
-                    results[str(file_path)] = new_filename
+        for op in run_batch(operations, journal_path=journal_path):
+            if op.succeeded:
+                results[op.source] = Path(op.target).name
 
         return results
 
@@ -371,11 +300,31 @@ class STRMGenerator:
 class MediaOrganizer:
     """媒体文件组织器"""
 
-    def __init__(self, base_path: str, template: Optional[str] = None):
+    # 文件名解析逻辑变化时递增，使索引中缓存的元数据失效
+    INDEX_VERSION = "2"
+
+    def __init__(
+        self,
+        base_path: str,
+        template: Optional[str] = None,
+        index_path: Optional[str] = None,
+    ):
         self.renamer = FileRenamer(base_path, template)
         self.strm_generator = STRMGenerator(base_path)
         self.logger = logging.getLogger(__name__)
 
+        # 配置索引路径后只处理新增或变化的视频文件，并复用已解析的媒体信息
+        self.library_index: Optional[LibraryIndex] = None
+        if index_path:
+            self.library_index = LibraryIndex(
+                index_path,
+                extensions=self.renamer.video_extensions,
+                version=self.INDEX_VERSION,
+            )
+
+    def _index_analyzer(self, entry: ScanEntry) -> Tuple[str, Dict[str, Any]]:
+        return "video", self.renamer.parse_filename(entry.name)
+
     def organize_media_file(
         self,
         file_path: str,
@@ -420,6 +369,9 @@ class MediaOrganizer:
         if not source_path.exists() or not source_path.is_dir():
             return results
 
+        if self.library_index is not None:
+            return self._scan_and_organize_indexed(source_path)
+
         for file_path in source_path.rglob("*"):
             if (
                 file_path.is_file()
@@ -433,3 +385,31 @@ class MediaOrganizer:
                     self.logger.error(f"Error processing {file_path}: {e}")
 
         return results
+
+    def _scan_and_organize_indexed(
+        self, source_path: Path
+    ) -> Dict[str, Dict[str, str]]:
+        """增量刷新索引，只组织新增或变化的文件"""
+        results: Dict[str, Dict[str, str]] = {}
+        self.library_index.refresh(source_path, self._index_analyzer)
+
+        touched: List[str] = []
+        for indexed in self.library_index.files(source_path, pending_only=True):
+            try:
+                file_results = self.organize_media_file(
+                    indexed.path, dict(indexed.metadata)
+                )
+                results[indexed.path] = file_results
+                if "renamed" in file_results:
+                    touched.append(indexed.path)
+                    touched.append(
+                        os.path.join(
+                            os.path.dirname(indexed.path), file_results["renamed"]
+                        )
+                    )
+            except Exception as e:
+                self.logger.error(f"Error processing {indexed.path}: {e}")
+
+        # 重命名成功的原文件和新文件记为已处理；失败的文件保持待处理，下次运行时重试
+        self.library_index.update_paths(touched, self._index_analyzer, processed=True)
+        return results
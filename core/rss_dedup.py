@@ -0,0 +1,265 @@
+"""
+RSS去重存储模块
+提供固定内存的布隆过滤器去重与基于SQLite的持久化去重，替代无界的内存集合
+"""
+
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 条目摘要固定为16字节（MD5）
+DIGEST_SIZE = 16
+
+
+def to_digest(key: Union[str, bytes]) -> bytes:
+    """将条目标识转换为固定宽度的二进制摘要"""
+    if isinstance(key, bytes):
+        return key
+    try:
+        digest = bytes.fromhex(key)
+    except ValueError:
+        digest = b""
+    if len(digest) != DIGEST_SIZE:
+        digest = hashlib.md5(key.encode()).digest()
+    return digest
+
+
+class DedupStore(ABC):
+    """去重存储抽象类
+
+    键可以是 RSSItem.hash_id（MD5十六进制）或16字节摘要，
+    支持 ``in`` 与 ``add``，可直接替代原先的 ``set``。
+    """
+
+    @abstractmethod
+    def contains(self, digest: bytes) -> bool:
+        """检查摘要是否已见过"""
+        pass
+
+    @abstractmethod
+    def add_digest(self, digest: bytes) -> None:
+        """记录摘要"""
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """清空存储"""
+        pass
+
+    def add(self, key: Union[str, bytes]) -> None:
+        """记录条目"""
+        self.add_digest(to_digest(key))
+
+    def update(self, keys: Iterable[Union[str, bytes]]) -> None:
+        """批量记录条目"""
+        for key in keys:
+            self.add(key)
+
+    def flush(self) -> None:
+        """将缓冲写入持久化介质"""
+        pass
+
+    def close(self) -> None:
+        """关闭存储"""
+        pass
+
+    def __contains__(self, key: Union[str, bytes]) -> bool:
+        return self.contains(to_digest(key))
+
+
+class BloomDedupStore(DedupStore):
+    """分代布隆过滤器去重存储
+
+    两代过滤器轮换实现按时间老化：写入当前代，查询两代，
+    每隔 ``max_age / 2`` 秒（或当前代写满 ``capacity`` 条时）丢弃旧代，
+    因此条目在 ``max_age/2 ~ max_age`` 秒后被遗忘。
+    内存固定为 ``2 * m`` 位，与已记录条目数无关。
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1_000_000,
+        error_rate: float = 1e-6,
+        max_age: Optional[float] = 30 * 24 * 3600,
+    ):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.max_age = max_age
+
+        # m = -n*ln(p)/ln(2)^2, k = m/n*ln(2)
+        bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_bits = max(8, bits)
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+
+        self._current = bytearray((self.num_bits + 7) // 8)
+        self._previous = bytearray(len(self._current))
+        self._current_count = 0
+        self._rotated_at = time.time()
+
+    @property
+    def memory_bytes(self) -> int:
+        """过滤器占用的字节数"""
+        return len(self._current) + len(self._previous)
+
+    def _positions(self, digest: bytes):
+        """双重哈希生成 k 个位位置"""
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        num_bits = self.num_bits
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % num_bits
+
+    @staticmethod
+    def _test(bits: bytearray, positions) -> bool:
+        for position in positions:
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def _maybe_rotate(self):
+        """按时间或容量轮换过滤器代"""
+        now = time.time()
+        expired = self.max_age is not None and now - self._rotated_at >= (
+            self.max_age / 2
+        )
+        if expired or self._current_count >= self.capacity:
+            self._previous = self._current
+            self._current = bytearray(len(self._previous))
+            self._current_count = 0
+            self._rotated_at = now
+
+    def contains(self, digest: bytes) -> bool:
+        self._maybe_rotate()
+        positions = list(self._positions(digest))
+        return self._test(self._current, positions) or self._test(
+            self._previous, positions
+        )
+
+    def add_digest(self, digest: bytes) -> None:
+        self._maybe_rotate()
+        bits = self._current
+        for position in self._positions(digest):
+            bits[position >> 3] |= 1 << (position & 7)
+        self._current_count += 1
+
+    def clear(self) -> None:
+        self._current = bytearray(len(self._current))
+        self._previous = bytearray(len(self._previous))
+        self._current_count = 0
+        self._rotated_at = time.time()
+
+    def __len__(self) -> int:
+        return self._current_count
+
+
+class SQLiteDedupStore(DedupStore):
+    """基于SQLite的持久化去重存储
+
+    摘要以16字节BLOB主键存储（WITHOUT ROWID），进程重启后保留；
+    写入先缓冲，达到 ``batch_size`` 或调用 ``flush`` 时在单个事务中提交，
+    超过 ``max_age`` 秒的记录定期清理。
+    """
+
+    def __init__(
+        self,
+        db_path: Union[str, Path] = "data/rss_seen.db",
+        max_age: Optional[float] = 30 * 24 * 3600,
+        batch_size: int = 1000,
+        prune_interval: float = 3600,
+    ):
+        self.db_path = str(db_path)
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self.prune_interval = prune_interval
+
+        if self.db_path != ":memory:":
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._pending: Dict[bytes, float] = {}
+        self._last_prune = 0.0
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_items ("
+            "digest BLOB PRIMARY KEY, seen_at REAL NOT NULL) WITHOUT ROWID"
+        )
+        self.conn.commit()
+        self.prune()
+
+    def contains(self, digest: bytes) -> bool:
+        with self._lock:
+            if digest in self._pending:
+                return True
+            row = self.conn.execute(
+                "SELECT seen_at FROM seen_items WHERE digest = ?", (digest,)
+            ).fetchone()
+        if row is None:
+            return False
+        return self.max_age is None or row[0] >= time.time() - self.max_age
+
+    def add_digest(self, digest: bytes) -> None:
+        with self._lock:
+            self._pending[digest] = time.time()
+            should_flush = len(self._pending) >= self.batch_size
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._pending:
+                pending, self._pending = self._pending, {}
+                with self.conn:
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO seen_items (digest, seen_at) "
+                        "VALUES (?, ?)",
+                        pending.items(),
+                    )
+        if time.time() - self._last_prune >= self.prune_interval:
+            self.prune()
+
+    def prune(self) -> int:
+        """清理过期记录，返回删除条数"""
+        self._last_prune = time.time()
+        if self.max_age is None:
+            return 0
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM seen_items WHERE seen_at < ?",
+                (time.time() - self.max_age,),
+            )
+        if cursor.rowcount:
+            logger.info(f"Pruned {cursor.rowcount} expired RSS dedup entries")
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock, self.conn:
+            self._pending.clear()
+            self.conn.execute("DELETE FROM seen_items")
+
+    def close(self) -> None:
+        try:
+            self.flush()
+            self.conn.close()
+        except Exception as e:
+            logger.error(f"Failed to close RSS dedup store: {e}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self.conn.execute("SELECT COUNT(*) FROM seen_items").fetchone()
+            return count + len(self._pending)
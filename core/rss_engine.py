@@ -5,19 +5,74 @@ RSS引擎模块 - 基于MoviePilot参考实现
 
 import asyncio
 import hashlib
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
-import re
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Set
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 from urllib.parse import urlparse
 
 import aiohttp
 import feedparser
 from pydantic import BaseModel, Field
 
+from . import release_parser
+from .release_parser import ReleaseNameParser, get_release_parser
+from .rss_dedup import BloomDedupStore, DedupStore
+from .rss_rules import CompiledRuleSet
+from .rss_scheduler import FeedScheduler
+
+# 轻量条目元组：(title, link, description, guid, published, enclosure_url,
+#               enclosure_type, enclosure_length)
+RawEntry = Tuple[str, str, str, str, Optional[str], str, str, int]
+
+
+def item_digest(title: str, guid: str, enclosure_url: str) -> bytes:
+    """计算条目的16字节去重摘要（与 RSSItem.hash_digest 一致）"""
+    return hashlib.md5(f"{title}_{guid}_{enclosure_url}".encode()).digest()
+
+
+def parse_feed_entries(content: str) -> List[RawEntry]:
+    """解析RSS内容为轻量条目元组，可在线程池或子进程中执行"""
+    feed = feedparser.parse(content)
+
+    entries = []
+    for entry in feed.entries:
+        enclosure_url = enclosure_type = ""
+        enclosure_length = 0
+        if "enclosures" in entry and entry.enclosures:
+            enclosure = entry.enclosures[0]
+            enclosure_url = enclosure.get("href", "")
+            enclosure_type = enclosure.get("type", "")
+            enclosure_length = int(enclosure.get("length", 0))
+
+        entries.append(
+            (
+                entry.get("title", ""),
+                entry.get("link", ""),
+                entry.get("description", ""),
+                entry.get("id", entry.get("link", "")),
+                entry.get("published"),
+                enclosure_url,
+                enclosure_type,
+                enclosure_length,
+            )
+        )
+
+    return entries
+
 
 class RSSItem(BaseModel):
     """RSS条目模型"""
@@ -40,12 +95,20 @@ class RSSItem(BaseModel):
     season: int = 0  # 季
     episode: int = 0  # 集
 
+    # 匹配的规则名称
+    matched_rules: List[str] = []
+
     @property
     def hash_id(self) -> str:
         """生成唯一hash标识"""
         content = f"{self.title}_{self.guid}_{self.enclosure_url}"
         return hashlib.md5(content.encode()).hexdigest()
 
+    @property
+    def hash_digest(self) -> bytes:
+        """生成16字节二进制hash标识"""
+        return item_digest(self.title, self.guid, self.enclosure_url)
+
 
 class RSSRule(BaseModel):
     """RSS规则模型"""
@@ -97,7 +160,12 @@ class RSSParser(ABC):
     """RSS解析器抽象类"""
 
     @abstractmethod
-    async def parse_feed(self, feed_url: str) -> List[RSSItem]:
+    async def parse_feed(
+        self,
+        feed_url: str,
+        session: Optional[aiohttp.ClientSession] = None,
+        feed_state: Optional[Dict[str, Any]] = None,
+    ) -> List[RSSItem]:
         """解析RSS源"""
         pass
 
@@ -107,129 +175,246 @@ class RSSParser(ABC):
         pass
 
 
+# 影响解析结果的类属性，子类覆盖任意一项时使用独立的解析器
+_CLASSIFIER_ATTRS = (
+    "RESOLUTION_PATTERNS",
+    "CODEC_PATTERNS",
+    "AUDIO_PATTERNS",
+    "SIZE_PATTERN",
+    "SIZE_ANCHOR_PATTERN",
+    "SEASON_PATTERN",
+    "EPISODE_PATTERN",
+)
+
+
 class DefaultRSSParser(RSSParser):
     """默认RSS解析器"""
 
-    # 分辨率映射
-    RESOLUTION_PATTERNS = {
-        "2160p": ["2160p", "4k", "uhd"],
-        "1080p": ["1080p", "1080"],
-        "720p": ["720p", "720"],
-        "480p": ["480p", "480"],
-    }
-
-    # 编码映射
-    CODEC_PATTERNS = {
-        "H265": ["h265", "hevc", "x265"],
-        "H264": ["h264", "x264", "avc"],
-        "AV1": ["av1"],
-    }
-
-    # 音频格式映射
-    AUDIO_PATTERNS = {
-        "DTS-HD": ["dts-hd", "dtshd"],
-        "DTS": ["dts"],
-        "Dolby Atmos": ["atmos"],
-        "Dolby Digital": ["ac3", "dd", "dolbydigital"],
-        "AAC": ["aac"],
-        "FLAC": ["flac"],
-    }
-
-    # 大小解析正则
-    SIZE_PATTERN = r"(\d+\.?\d*)\s*(GB|MB|gb|mb)"
-
-    # 季集解析正则
-    SEASON_PATTERN = r"[Ss](\d+)"
-    EPISODE_PATTERN = r"[Ee](\d+)"
-
-    async def parse_feed(self, feed_url: str) -> List[RSSItem]:
-        """解析RSS源"""
+    # 属性映射与解析正则（子类可覆盖，见 core.release_parser）
+    RESOLUTION_PATTERNS = release_parser.RESOLUTION_PATTERNS
+    CODEC_PATTERNS = release_parser.CODEC_PATTERNS
+    AUDIO_PATTERNS = release_parser.AUDIO_PATTERNS
+    SIZE_PATTERN = release_parser.SIZE_PATTERN
+    SIZE_ANCHOR_PATTERN = release_parser.SIZE_ANCHOR_PATTERN
+    SEASON_PATTERN = release_parser.SEASON_PATTERN
+    EPISODE_PATTERN = release_parser.EPISODE_PATTERN
+
+    PARSE_MODES = ("inline", "thread", "process")
+
+    def __init__(
+        self,
+        parse_mode: str = "thread",
+        max_workers: int = 2,
+        offload_threshold: int = 256 * 1024,
+        dedup_store: Optional[DedupStore] = None,
+    ):
+        """
+        Args:
+            parse_mode: 解析模式，inline（事件循环内）/thread（线程池）/process（进程池）
+            max_workers: 线程池/进程池大小
+            offload_threshold: 内容达到该字节数时才交给执行器解析
+            dedup_store: 去重存储，已见过的条目不构建 RSSItem
+        """
+        if parse_mode not in self.PARSE_MODES:
+            raise ValueError(f"Unsupported parse mode: {parse_mode}")
+
+        self.parse_mode = parse_mode
+        self.max_workers = max_workers
+        self.offload_threshold = offload_threshold
+        self.dedup_store = dedup_store
+        self._executor: Optional[Executor] = None
+
+    async def parse_feed(
+        self,
+        feed_url: str,
+        session: Optional[aiohttp.ClientSession] = None,
+        feed_state: Optional[Dict[str, Any]] = None,
+    ) -> List[RSSItem]:
+        """解析RSS源
+
+        Args:
+            feed_url: RSS源地址
+            session: 共享的HTTP会话，未提供时临时创建
+            feed_state: RSS源状态，用于读写 ETag/Last-Modified 实现条件请求
+        """
+        headers = {}
+        if feed_state is not None:
+            if feed_state.get("etag"):
+                headers["If-None-Match"] = feed_state["etag"]
+            if feed_state.get("last_modified"):
+                headers["If-Modified-Since"] = feed_state["last_modified"]
+
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(feed_url) as response:
-                    if response.status != 200:
-                        logger.error(f"RSS feed fetch failed: {response.status}")
-                        return []
-
-                    content = await response.text()
-                    feed = feedparser.parse(content)
-
-                    items = []
-                    for entry in feed.entries:
-                        item = RSSItem(
-                            title=entry.get("title", ""),
-                            link=entry.get("link", ""),
-                            description=entry.get("description", ""),
-                            guid=entry.get("id", entry.get("link", "")),
-                            source=feed_url,
-                        )
-
-                        # 解析发布时间
-                        if "published" in entry:
-                            try:
-                                item.pub_date = datetime.fromisoformat(
-                                    entry.published.replace("Z", "+00:00")
-                                )
-                            except:
-                                pass
-
-                        # 解析附件信息
-                        if "enclosures" in entry and entry.enclosures:
-                            enclosure = entry.enclosures[0]
-                            item.enclosure_url = enclosure.get("href", "")
-                            item.enclosure_type = enclosure.get("type", "")
-                            item.enclosure_length = int(enclosure.get("length", 0))
-
-                        # 解析详细信息
-                        item = self.parse_item_info(item)
-                        items.append(item)
-
-                    return items
+            if session is None:
+                async with aiohttp.ClientSession() as own_session:
+                    return await self._fetch_and_parse(
+                        own_session, feed_url, headers, feed_state
+                    )
+            return await self._fetch_and_parse(session, feed_url, headers, feed_state)
 
         except Exception as e:
             logger.error(f"RSS parsing error: {e}")
+            if feed_state is not None:
+                feed_state["last_error"] = str(e)
             return []
 
+    async def _fetch_and_parse(
+        self,
+        session: aiohttp.ClientSession,
+        feed_url: str,
+        headers: Dict[str, str],
+        feed_state: Optional[Dict[str, Any]],
+    ) -> List[RSSItem]:
+        """发送（条件）请求并解析响应"""
+        async with session.get(feed_url, headers=headers) as response:
+            if feed_state is not None:
+                feed_state["last_error"] = None
+
+            if response.status == 304:
+                # 内容未变化，跳过解析
+                logger.debug(f"RSS feed not modified: {feed_url}")
+                return []
+
+            if response.status != 200:
+                logger.error(f"RSS feed fetch failed: {response.status}")
+                if feed_state is not None:
+                    feed_state["last_error"] = f"HTTP {response.status}"
+                return []
+
+            content = await response.text()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        items = await self.parse_content_async(content, feed_url)
+
+        # 解析成功后才保存校验值，否则解析失败的内容会因 304 永远不再被解析
+        if feed_state is not None:
+            feed_state["etag"] = etag
+            feed_state["last_modified"] = last_modified
+        return items
+
+    def parse_content(self, content: str, feed_url: str) -> List[RSSItem]:
+        """解析RSS内容"""
+        return self.build_items(parse_feed_entries(content), feed_url)
+
+    async def parse_content_async(self, content: str, feed_url: str) -> List[RSSItem]:
+        """解析RSS内容，大内容交给线程池/进程池执行，避免阻塞事件循环"""
+        executor = self._get_executor()
+        if executor is None or len(content) < self.offload_threshold:
+            return self.parse_content(content, feed_url)
+
+        loop = asyncio.get_running_loop()
+        entries = await loop.run_in_executor(executor, parse_feed_entries, content)
+        return self.build_items(entries, feed_url)
+
+    def build_items(self, entries: List[RawEntry], feed_url: str) -> List[RSSItem]:
+        """由条目元组构建 RSSItem，已见过的条目直接跳过"""
+        seen_items = self.dedup_store
+
+        items = []
+        for entry in entries:
+            (
+                title,
+                link,
+                description,
+                guid,
+                published,
+                enclosure_url,
+                enclosure_type,
+                enclosure_length,
+            ) = entry
+
+            # 去重检查：已见过的条目不再构建模型
+            if seen_items is not None:
+                if item_digest(title, guid, enclosure_url) in seen_items:
+                    continue
+
+            item = RSSItem(
+                title=title,
+                link=link,
+                description=description,
+                guid=guid,
+                source=feed_url,
+                enclosure_url=enclosure_url,
+                enclosure_type=enclosure_type,
+                enclosure_length=enclosure_length,
+            )
+
+            # 解析发布时间
+            if published:
+                try:
+                    item.pub_date = datetime.fromisoformat(
+                        published.replace("Z", "+00:00")
+                    )
+                except:
+                    pass
+
+            # 解析详细信息
+            item = self.parse_item_info(item)
+            items.append(item)
+
+        return items
+
+    def _get_executor(self) -> Optional[Executor]:
+        """按解析模式获取执行器"""
+        if self.parse_mode == "inline":
+            return None
+        if self._executor is None:
+            if self.parse_mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="rss-parse"
+                )
+        return self._executor
+
+    def close(self):
+        """关闭解析执行器"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    @classmethod
+    def get_classifier(cls) -> ReleaseNameParser:
+        """获取按解析器类缓存的发布名称解析器（未覆盖映射时共用默认解析器及其缓存）"""
+        classifier = cls.__dict__.get("_classifier")
+        if classifier is None:
+            if all(
+                getattr(cls, attr) is getattr(DefaultRSSParser, attr)
+                for attr in _CLASSIFIER_ATTRS
+            ):
+                classifier = get_release_parser()
+            else:
+                classifier = ReleaseNameParser(
+                    resolution_patterns=cls.RESOLUTION_PATTERNS,
+                    codec_patterns=cls.CODEC_PATTERNS,
+                    audio_patterns=cls.AUDIO_PATTERNS,
+                    size_pattern=cls.SIZE_PATTERN,
+                    size_anchor_pattern=cls.SIZE_ANCHOR_PATTERN,
+                    season_pattern=cls.SEASON_PATTERN,
+                    episode_pattern=cls.EPISODE_PATTERN,
+                )
+            cls._classifier = classifier
+        return classifier
+
     def parse_item_info(self, item: RSSItem) -> RSSItem:
         """解析条目详细信息"""
-        title_lower = item.title.lower()
-
-        # 解析大小
-        size_match = re.search(self.SIZE_PATTERN, item.title)
-        if size_match:
-            size_value = float(size_match.group(1))
-            unit = size_match.group(2).lower()
-            if unit == "gb":
-                item.size = size_value
-            elif unit == "mb":
-                item.size = size_value / 1024
-
-        # 解析分辨率
-        for resolution, patterns in self.RESOLUTION_PATTERNS.items():
-            if any(pattern in title_lower for pattern in patterns):
-                item.resolution = resolution
-                break
-
-        # 解析编码
-        for codec, patterns in self.CODEC_PATTERNS.items():
-            if any(pattern in title_lower for pattern in patterns):
-                item.codec = codec
-                break
-
-        # 解析音频
-        for audio, patterns in self.AUDIO_PATTERNS.items():
-            if any(pattern in title_lower for pattern in patterns):
-                item.audio = audio
-                break
-
-        # 解析季集
-        season_match = re.search(self.SEASON_PATTERN, item.title)
-        if season_match:
-            item.season = int(season_match.group(1))
-
-        episode_match = re.search(self.EPISODE_PATTERN, item.title)
-        if episode_match:
-            item.episode = int(episode_match.group(1))
+        size, resolution, codec, audio, season, episode = (
+            self.get_classifier().classify(item.title)
+        )
+
+        if size:
+            item.size = size
+        if resolution:
+            item.resolution = resolution
+        if codec:
+            item.codec = codec
+        if audio:
+            item.audio = audio
+        if season:
+            item.season = season
+        if episode:
+            item.episode = episode
 
         return item
 
@@ -237,77 +422,198 @@ class DefaultRSSParser(RSSParser):
 class RSSFilter:
     """RSS过滤器"""
 
-    def __init__(self):
-        self.seen_items: Set[str] = set()
+    def __init__(self, dedup_store: Optional[DedupStore] = None):
+        # 去重存储：默认使用固定内存的分代布隆过滤器，可替换为 SQLiteDedupStore 持久化
+        self.seen_items: DedupStore = (
+            dedup_store if dedup_store is not None else BloomDedupStore()
+        )
+
+        self._rule_set: Optional[CompiledRuleSet] = None
+
+    def compile_rules(self, rules: List[RSSRule]) -> CompiledRuleSet:
+        """获取规则列表对应的编译规则集（规则列表变化时重新编译）"""
+        if self._rule_set is None or not self._rule_set.is_compiled_from(rules):
+            self._rule_set = CompiledRuleSet(rules)
+        return self._rule_set
 
     def filter_items(self, items: List[RSSItem], rules: List[RSSRule]) -> List[RSSItem]:
-        """过滤RSS条目"""
+        """过滤RSS条目，匹配的规则名称记录在 item.matched_rules 中"""
         filtered_items = []
+        rule_set = self.compile_rules(rules)
 
         for item in items:
             # 去重检查
-            if item.hash_id in self.seen_items:
+            digest = item.hash_digest
+            if digest in self.seen_items:
                 continue
 
             # 规则匹配
-            matched = False
-            for rule in rules:
-                if rule.match(item):
-                    matched = True
-                    break
+            matched_rules = rule_set.match(item)
 
-            if matched:
+            if matched_rules:
+                item.matched_rules = matched_rules
                 filtered_items.append(item)
-                self.seen_items.add(item.hash_id)
+                self.seen_items.add(digest)
 
+        self.seen_items.flush()
         return filtered_items
 
 
 class RSSManager:
     """RSS管理器"""
 
-    def __init__(self):
-        self.parser = DefaultRSSParser()
-        self.filter = RSSFilter()
+    def __init__(
+        self,
+        dedup_store: Optional[DedupStore] = None,
+        connection_limit: int = 100,
+        per_host_limit: int = 4,
+        request_timeout: float = 30,
+        parse_mode: str = "thread",
+        parse_workers: int = 2,
+        stream_queue_size: int = 1000,
+    ):
+        self.filter = RSSFilter(dedup_store)
+        self.parser = DefaultRSSParser(
+            parse_mode=parse_mode,
+            max_workers=parse_workers,
+            dedup_store=self.filter.seen_items,
+        )
         self.feeds: Dict[str, Dict[str, Any]] = {}
         self.rules: List[RSSRule] = []
+        self.stream_queue_size = stream_queue_size
+
+        # 共享连接池：复用TCP/TLS连接，并限制单个站点的并发连接数
+        self.connection_limit = connection_limit
+        self.per_host_limit = per_host_limit
+        self.request_timeout = request_timeout
+        self.session: Optional[aiohttp.ClientSession] = None
+
+        # 调度器：按间隔抓取，并限制全局与单站点并发
+        self.scheduler = FeedScheduler(self, per_host_concurrency=per_host_limit)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享HTTP会话"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.per_host_limit,
+                ttl_dns_cache=300,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            )
+        return self.session
+
+    async def close(self):
+        """关闭资源"""
+        await self.scheduler.stop()
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+        self.parser.close()
+        self.filter.seen_items.close()
 
     def add_feed(self, name: str, url: str, interval: int = 3600):
         """添加RSS源"""
-        self.feeds[name] = {"url": url, "interval": interval, "last_fetch": None}
+        self.feeds[name] = {
+            "url": url,
+            "interval": interval,
+            "last_fetch": None,
+            "etag": None,
+            "last_modified": None,
+            "last_error": None,
+        }
+        self.scheduler.wake()
 
     def add_rule(self, rule: RSSRule):
         """添加规则"""
         self.rules.append(rule)
 
     async def fetch_all_feeds(self) -> List[RSSItem]:
-        """抓取所有RSS源"""
-        all_items = []
-
-        tasks = []
-        for name, feed_info in self.feeds.items():
-            tasks.append(self.fetch_feed(name, feed_info["url"]))
-
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        for result in results:
-            if isinstance(result, list):
-                all_items.extend(result)
-
-        # 过滤条目
-        filtered_items = self.filter.filter_items(all_items, self.rules)
-
-        return filtered_items
+        """抓取所有RSS源（受调度器并发限制）"""
+        return [item async for item in self.stream_items()]
+
+    async def stream_items(
+        self, names: Optional[List[str]] = None, queue_size: Optional[int] = None
+    ) -> AsyncIterator[RSSItem]:
+        """流式抓取RSS源
+
+        每个源抓取完成后立即过滤、去重并产出条目，下游可以在慢速源仍在下载时开始处理；
+        内部队列长度受 ``queue_size`` 限制，消费过慢时抓取会被反压。
+
+        Args:
+            names: 要抓取的RSS源名称，默认全部
+            queue_size: 队列深度，默认使用 ``self.stream_queue_size``
+        """
+        if names is None:
+            names = list(self.feeds)
+        queue: asyncio.Queue = asyncio.Queue(
+            maxsize=queue_size if queue_size is not None else self.stream_queue_size
+        )
+        finished = object()
+
+        async def produce(name: str):
+            items = await self.scheduler.fetch(name)
+            for item in self.filter.filter_items(items, self.rules):
+                await queue.put(item)
+
+        async def produce_all():
+            results = await asyncio.gather(
+                *(produce(name) for name in names), return_exceptions=True
+            )
+            for name, result in zip(names, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to stream RSS feed {name}: {result}")
+            await queue.put(finished)
+
+        producer = asyncio.create_task(produce_all())
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    break
+                yield item
+        finally:
+            if not producer.done():
+                producer.cancel()
+                try:
+                    await producer
+                except asyncio.CancelledError:
+                    pass
+
+    def start_scheduler(
+        self,
+        callback: Optional[Callable[[List[RSSItem]], Optional[Awaitable[None]]]] = None,
+    ):
+        """启动后台调度，按各源间隔抓取，过滤后的条目交给回调处理"""
+
+        async def on_items(name: str, items: List[RSSItem]):
+            filtered_items = self.filter.filter_items(items, self.rules)
+            if callback is not None and filtered_items:
+                result = callback(filtered_items)
+                if asyncio.iscoroutine(result):
+                    await result
+
+        self.scheduler.on_items = on_items
+        self.scheduler.start()
+
+    async def stop_scheduler(self):
+        """停止后台调度"""
+        await self.scheduler.stop()
 
     async def fetch_feed(self, name: str, url: str) -> List[RSSItem]:
         """抓取单个RSS源"""
         try:
             logger.info(f"Fetching RSS feed: {name}")
-            items = await self.parser.parse_feed(url)
+            session = await self._get_session()
+            items = await self.parser.parse_feed(url, session, self.feeds.get(name))
             logger.info(f"Fetched {len(items)} items from {name}")
             return items
         except Exception as e:
             logger.error(f"Failed to fetch RSS feed {name}: {e}")
+            if name in self.feeds:
+                self.feeds[name]["last_error"] = str(e)
             return []
 
 
@@ -0,0 +1,181 @@
+"""
+RSS规则编译模块
+将规则列表编译为按分辨率/编码/音频索引的位图，并用 Aho-Corasick 自动机
+一次扫描标题完成所有规则的包含/排除关键词匹配
+"""
+
+from typing import TYPE_CHECKING, Dict, Iterable, List, Sequence, Set, Tuple
+
+if TYPE_CHECKING:
+    from .rss_engine import RSSItem, RSSRule
+
+
+class KeywordAutomaton:
+    """Aho-Corasick 多模式匹配自动机"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        outputs: List[Set[int]] = [set()]
+        for keyword in keywords:
+            index = len(self.keywords)
+            self.keywords.append(keyword)
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append(set())
+                state = next_state
+            outputs[state].add(index)
+
+        # 广度优先构建失败指针，并沿失败链合并输出
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail_target = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail_target if fail_target != next_state else 0
+                outputs[next_state] |= outputs[self._fail[next_state]]
+
+        self._output = [tuple(sorted(out)) for out in outputs]
+
+    def find(self, text: str) -> Set[int]:
+        """返回文本中出现的所有关键词序号"""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+
+        found: Set[int] = set(output[0])
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class CompiledRuleSet:
+    """编译后的规则集
+
+    每条规则对应一个比特位：分辨率/编码/音频各建一张 值 -> 规则位图 的索引，
+    未限制该属性的规则计入通配位图；关键词共用一个自动机，
+    命中的关键词映射为包含/排除位图，按位运算得到候选规则后再检查大小范围。
+    """
+
+    def __init__(self, rules: Sequence["RSSRule"]):
+        self.rules: Tuple["RSSRule", ...] = tuple(rules)
+        self._fingerprint = self._fingerprint_of(self.rules)
+        self.all_mask = (1 << len(self.rules)) - 1
+
+        self._resolution_index, self._resolution_any = self._build_index(
+            [rule.resolutions for rule in self.rules]
+        )
+        self._codec_index, self._codec_any = self._build_index(
+            [rule.codecs for rule in self.rules]
+        )
+        self._audio_index, self._audio_any = self._build_index(
+            [rule.audio_formats for rule in self.rules]
+        )
+
+        keyword_ids: Dict[str, int] = {}
+        include_masks: List[int] = []
+        exclude_masks: List[int] = []
+        self._no_include_mask = 0
+        for bit, rule in enumerate(self.rules):
+            if not rule.include_keywords:
+                self._no_include_mask |= 1 << bit
+            for keywords, masks in (
+                (rule.include_keywords, include_masks),
+                (rule.exclude_keywords, exclude_masks),
+            ):
+                for keyword in keywords:
+                    keyword_id = keyword_ids.setdefault(
+                        keyword.lower(), len(keyword_ids)
+                    )
+                    while len(include_masks) <= keyword_id:
+                        include_masks.append(0)
+                        exclude_masks.append(0)
+                    masks[keyword_id] |= 1 << bit
+
+        self._include_masks = include_masks
+        self._exclude_masks = exclude_masks
+        self._automaton = KeywordAutomaton(keyword_ids)
+
+    def _build_index(
+        self, allowed_values: List[List[str]]
+    ) -> Tuple[Dict[str, int], int]:
+        """构建 属性值 -> 规则位图 索引，返回 (索引, 通配位图)"""
+        index: Dict[str, int] = {}
+        any_mask = 0
+        for bit, values in enumerate(allowed_values):
+            if not values:
+                any_mask |= 1 << bit
+                continue
+            for value in values:
+                index[value] = index.get(value, 0) | (1 << bit)
+        return index, any_mask
+
+    def match_mask(self, item: "RSSItem") -> int:
+        """返回条目匹配的规则位图"""
+        candidates = (
+            (self._resolution_index.get(item.resolution, 0) | self._resolution_any)
+            & (self._codec_index.get(item.codec, 0) | self._codec_any)
+            & (self._audio_index.get(item.audio, 0) | self._audio_any)
+        )
+        if not candidates:
+            return 0
+
+        include = self._no_include_mask
+        exclude = 0
+        for keyword_id in self._automaton.find(item.title.lower()):
+            include |= self._include_masks[keyword_id]
+            exclude |= self._exclude_masks[keyword_id]
+        candidates &= include & ~exclude
+
+        # 大小范围检查
+        size = item.size
+        mask = candidates
+        while mask:
+            low_bit = mask & -mask
+            rule = self.rules[low_bit.bit_length() - 1]
+            if not (rule.min_size <= size <= rule.max_size):
+                candidates &= ~low_bit
+            mask ^= low_bit
+        return candidates
+
+    def match(self, item: "RSSItem") -> List[str]:
+        """返回条目匹配的所有规则名称（按规则顺序）"""
+        mask = self.match_mask(item)
+        names = []
+        while mask:
+            low_bit = mask & -mask
+            names.append(self.rules[low_bit.bit_length() - 1].name)
+            mask ^= low_bit
+        return names
+
+    @staticmethod
+    def _fingerprint_of(rules: Sequence["RSSRule"]) -> List[Dict]:
+        """规则字段快照，规则对象被原地修改后快照随之不同"""
+        return [rule.model_dump() for rule in rules]
+
+    def is_compiled_from(self, rules: Sequence["RSSRule"]) -> bool:
+        """判断规则集是否由与给定规则列表字段相同的规则编译而来"""
+        return (
+            len(rules) == len(self.rules)
+            and self._fingerprint_of(rules) == self._fingerprint
+        )
@@ -0,0 +1,316 @@
+"""
+RSS调度器模块
+按各RSS源的抓取间隔调度，支持随机抖动、全局/单站点并发限制、失败退避和自适应间隔
+"""
+
+import asyncio
+import heapq
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .logging_config import get_logger
+
+if TYPE_CHECKING:
+    from .rss_engine import RSSItem, RSSManager
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class FeedSchedule:
+    """单个RSS源的调度状态"""
+
+    interval: float  # 配置的基础间隔（秒）
+    effective_interval: float  # 自适应后的间隔（秒）
+    next_fetch: float = 0.0  # 下次抓取时间（时间戳）
+    failures: int = 0  # 连续失败次数
+    unchanged: int = 0  # 连续未变化次数
+    last_duration: float = 0.0  # 上次抓取耗时（秒）
+    last_marker: Optional[str] = None  # 上次最新条目标识，用于判断内容是否变化
+    running: bool = False
+
+
+class FeedScheduler:
+    """RSS源调度器
+
+    使用最小堆维护各RSS源的下次抓取时间，到期后在全局与单站点并发上限内抓取。
+    失败或过慢的源按指数退避，内容长期不变的源逐步延长间隔，内容变化后恢复基础间隔。
+    """
+
+    def __init__(
+        self,
+        manager: "RSSManager",
+        max_concurrency: int = 10,
+        per_host_concurrency: int = 2,
+        host_min_interval: float = 0.5,
+        jitter: float = 0.1,
+        max_backoff_factor: float = 8.0,
+        max_idle_factor: float = 4.0,
+        slow_threshold: float = 10.0,
+        on_items: Optional[
+            Callable[[str, List["RSSItem"]], Optional[Awaitable[None]]]
+        ] = None,
+    ):
+        self.manager = manager
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.host_min_interval = host_min_interval
+        self.jitter = jitter
+        self.max_backoff_factor = max_backoff_factor
+        self.max_idle_factor = max_idle_factor
+        self.slow_threshold = slow_threshold
+        self.on_items = on_items
+
+        self.schedules: Dict[str, FeedSchedule] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._counter = 0
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._host_last_start: Dict[str, float] = {}
+        self._tasks: set = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._running = False
+
+    # ------------------------------------------------------------------
+    # 调度状态
+    # ------------------------------------------------------------------
+
+    def _jittered(self, delay: float) -> float:
+        """给延迟加上随机抖动"""
+        if self.jitter <= 0:
+            return delay
+        return max(0.0, delay * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def _push(self, name: str, due: float):
+        # 只有调度循环会出堆；未运行时（如 API 直接抓取）不入堆，启动时再重建
+        if not self._running:
+            return
+        self._counter += 1
+        heapq.heappush(self._heap, (due, self._counter, name))
+        self.wake()
+
+    def _rebuild_heap(self):
+        """按当前调度状态重建堆，每个RSS源一项"""
+        self._heap = []
+        for name, schedule in self.schedules.items():
+            self._counter += 1
+            self._heap.append((schedule.next_fetch, self._counter, name))
+        heapq.heapify(self._heap)
+
+    def _ensure_schedule(self, name: str, feed_info: Dict[str, Any]) -> FeedSchedule:
+        """获取RSS源的调度状态，新源在一个抖动窗口内随机分散首次抓取时间"""
+        interval = float(feed_info.get("interval") or 3600)
+        schedule = self.schedules.get(name)
+        if schedule is None:
+            schedule = FeedSchedule(interval=interval, effective_interval=interval)
+            schedule.next_fetch = time.time() + random.uniform(
+                0, interval * self.jitter
+            )
+            self.schedules[name] = schedule
+            self._push(name, schedule.next_fetch)
+        elif schedule.interval != interval:
+            schedule.interval = interval
+            schedule.effective_interval = interval
+        return schedule
+
+    def _sync_feeds(self):
+        """同步RSS源列表：新增的源加入堆，删除的源丢弃状态"""
+        for name, feed_info in self.manager.feeds.items():
+            self._ensure_schedule(name, feed_info)
+
+        for name in list(self.schedules):
+            if name not in self.manager.feeds:
+                del self.schedules[name]
+
+    def _reschedule(self, name: str, schedule: FeedSchedule, items, error: bool):
+        """根据抓取结果计算下次抓取时间"""
+        base = schedule.interval
+
+        if error:
+            schedule.failures += 1
+            factor = min(2.0**schedule.failures, self.max_backoff_factor)
+        else:
+            schedule.failures = 0
+            marker = items[0].hash_id if items else None
+            if marker is None or marker == schedule.last_marker:
+                schedule.unchanged += 1
+            else:
+                schedule.unchanged = 0
+                schedule.last_marker = marker
+            factor = min(1.0 + 0.5 * schedule.unchanged, self.max_idle_factor)
+
+        if schedule.last_duration > self.slow_threshold:
+            factor = min(factor * 2, self.max_backoff_factor)
+
+        schedule.effective_interval = base * factor
+        schedule.next_fetch = time.time() + self._jittered(schedule.effective_interval)
+        self._push(name, schedule.next_fetch)
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """获取调度状态"""
+        return {
+            name: {
+                "interval": schedule.interval,
+                "effective_interval": schedule.effective_interval,
+                "next_fetch": datetime.fromtimestamp(schedule.next_fetch),
+                "failures": schedule.failures,
+                "unchanged": schedule.unchanged,
+                "last_duration": schedule.last_duration,
+                "running": schedule.running,
+            }
+            for name, schedule in self.schedules.items()
+        }
+
+    # ------------------------------------------------------------------
+    # 并发控制
+    # ------------------------------------------------------------------
+
+    def _get_host_semaphore(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_concurrency)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def _wait_host_turn(self, host: str):
+        """等到距离同一站点上次开始抓取满足最小间隔"""
+        while True:
+            delay = (
+                self._host_last_start.get(host, 0)
+                + self.host_min_interval
+                - time.time()
+            )
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    async def fetch(self, name: str) -> List["RSSItem"]:
+        """在并发限制内抓取单个RSS源，并更新调度状态"""
+        feed_info = self.manager.feeds.get(name)
+        if feed_info is None:
+            return []
+
+        if self._global_semaphore is None:
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        schedule = self._ensure_schedule(name, feed_info)
+        url = feed_info["url"]
+        host = urlparse(url).netloc
+
+        schedule.running = True
+        try:
+            async with self._get_host_semaphore(host):
+                # 先等待同一站点的最小间隔再占用全局名额，避免等待中的请求占满全局并发；
+                # 等待全局名额期间同站点可能已有请求开始，拿到名额后需重新检查
+                while True:
+                    await self._wait_host_turn(host)
+                    await self._global_semaphore.acquire()
+                    started = time.time()
+                    if (
+                        started
+                        >= self._host_last_start.get(host, 0) + self.host_min_interval
+                    ):
+                        break
+                    self._global_semaphore.release()
+
+                try:
+                    self._host_last_start[host] = started
+                    items = await self.manager.fetch_feed(name, url)
+                    schedule.last_duration = time.time() - started
+                finally:
+                    self._global_semaphore.release()
+        finally:
+            schedule.running = False
+
+        feed_info["last_fetch"] = datetime.now()
+        error = bool(feed_info.get("last_error"))
+        if name in self.schedules:
+            self._reschedule(name, schedule, items, error)
+        return items
+
+    async def fetch_many(self, names: List[str]) -> Dict[str, List["RSSItem"]]:
+        """并发抓取多个RSS源（受并发限制）"""
+        results = await asyncio.gather(
+            *(self.fetch(name) for name in names), return_exceptions=True
+        )
+        return {
+            name: result
+            for name, result in zip(names, results)
+            if isinstance(result, list)
+        }
+
+    # ------------------------------------------------------------------
+    # 调度循环
+    # ------------------------------------------------------------------
+
+    def wake(self):
+        """唤醒调度循环（RSS源变化时调用）"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _dispatch(self, name: str):
+        try:
+            items = await self.fetch(name)
+            if self.on_items is not None and items:
+                result = self.on_items(name, items)
+                if asyncio.iscoroutine(result):
+                    await result
+        except Exception as e:
+            logger.error(f"Scheduled RSS fetch failed for {name}: {e}")
+
+    async def run(self):
+        """调度循环：按到期时间依次抓取RSS源"""
+        self._running = True
+        self._wakeup = asyncio.Event()
+        self._rebuild_heap()
+        logger.info("RSS feed scheduler started")
+
+        while self._running:
+            self._sync_feeds()
+
+            timeout = 60.0
+            while self._heap:
+                due, _, name = self._heap[0]
+                schedule = self.schedules.get(name)
+                # 跳过已删除或已重新调度的过期堆项
+                if schedule is None or schedule.next_fetch != due:
+                    heapq.heappop(self._heap)
+                    continue
+                now = time.time()
+                if due > now:
+                    timeout = min(timeout, due - now)
+                    break
+                heapq.heappop(self._heap)
+                if schedule.running:
+                    continue
+                task = asyncio.create_task(self._dispatch(name))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        logger.info("RSS feed scheduler stopped")
+
+    def start(self):
+        """在后台启动调度循环"""
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """停止调度循环并等待进行中的抓取完成"""
+        self._running = False
+        self.wake()
+        if self._runner is not None:
+            await self._runner
+            self._runner = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -11,6 +11,8 @@ from typing import Dict, Any, List, Optional
 from enum import Enum
 import logging
 
+from .fs_scanner import scan_files
+
 
 class StorageType(Enum):
     """存储类型枚举"""
@@ -591,39 +593,26 @@ class StorageManager:
             if not os.path.exists(full_path):
                 return {"error": "Path does not exist"}
 
-            files = []
-
-            if recursive:
-                for root, dirs, filenames in os.walk(full_path):
-                    for filename in filenames:
-                        file_path = os.path.join(root, filename)
-                        relative_path = os.path.relpath(file_path, storage_path)
-
-                        file_info = {
-                            "name": filename,
-                            "path": relative_path,
-                            "size": os.path.getsize(file_path),
-                            "modified_at": os.path.getmtime(file_path),
-                            "is_directory": False,
-                        }
-                        files.append(file_info)
-            else:
-                for item in os.listdir(full_path):
-                    item_path = os.path.join(full_path, item)
-                    relative_path = os.path.join(path, item) if path else item
-
-                    file_info = {
-                        "name": item,
-                        "path": relative_path,
-                        "size": (
-                            os.path.getsize(item_path)
-                            if os.path.isfile(item_path)
-                            else 0
-                        ),
-                        "modified_at": os.path.getmtime(item_path),
-                        "is_directory": os.path.isdir(item_path),
-                    }
-                    files.append(file_info)
+            # 递归时只列出文件，非递归时同时列出目录；在线程中扫描避免阻塞事件循环
+            loop = asyncio.get_running_loop()
+            entries = await loop.run_in_executor(
+                None,
+                lambda: list(
+                    scan_files(
+                        full_path, recursive=recursive, include_dirs=not recursive
+                    )
+                ),
+            )
+            files = [
+                {
+                    "name": entry.name,
+                    "path": os.path.relpath(entry.path, storage_path),
+                    "size": entry.size,
+                    "modified_at": entry.mtime,
+                    "is_directory": entry.is_dir,
+                }
+                for entry in sorted(entries, key=lambda entry: entry.path)
+            ]
 
             return {
                 "storage": storage_name,
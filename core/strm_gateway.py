@@ -3,6 +3,7 @@ STRM Gateway module for VabHub Core
 """
 
 import os
+from .fs_scanner import ScanEntry, scan_files
 from .logging_config import get_logger
 from typing import Dict, List, Optional, Any
 from pathlib import Path
@@ -86,12 +87,8 @@ class STRMGatewayManager:
         strm_files = []
 
         try:
-            for root, dirs, files in os.walk(self.library_path):
-                for file in files:
-                    if file.endswith(".strm"):
-                        file_path = os.path.join(root, file)
-                        file_info = self._get_strm_file_info(file_path)
-                        strm_files.append(file_info)
+            for entry in scan_files(self.library_path, extensions={".strm"}):
+                strm_files.append(self._get_strm_file_info(entry.path, entry))
 
             logger.info(f"Found {len(strm_files)} STRM files in library")
             return strm_files
@@ -100,19 +97,25 @@ class STRMGatewayManager:
             logger.error(f"Failed to scan library for STRM files: {e}")
             return []
 
-    def _get_strm_file_info(self, file_path: str) -> Dict[str, Any]:
+    def _get_strm_file_info(
+        self, file_path: str, entry: Optional[ScanEntry] = None
+    ) -> Dict[str, Any]:
         """Get information about STRM file"""
         try:
             with open(file_path, "r", encoding="utf-8") as f:
                 content = f.read().strip()
 
-            file_stat = os.stat(file_path)
+            if entry is None:
+                file_stat = os.stat(file_path)
+                size, modified = file_stat.st_size, file_stat.st_mtime
+            else:
+                size, modified = entry.size, entry.mtime
 
             return {
                 "path": file_path,
                 "filename": os.path.basename(file_path),
-                "size": file_stat.st_size,
-                "modified": file_stat.st_mtime,
+                "size": size,
+                "modified": modified,
                 "content": content,
                 "url": content,  # The content is the streaming URL
             }
@@ -0,0 +1,302 @@
+"""
+向量索引管理模块
+按语料规模自动选择 FAISS 索引类型（Flat / HNSW / IVF），负责向量归一化、增量添加、
+规模增长后的重建，以及索引与行号->ID映射的持久化和内存映射加载
+"""
+
+import json
+import logging
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np  # type: ignore
+
+from .lazy_imports import LazyModule
+
+faiss = LazyModule("faiss")
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIndexManager:
+    """FAISS 向量索引管理器
+
+    所有向量在写入和查询前做 L2 归一化，内积即余弦相似度。
+    语料较小时使用精确的 Flat 索引，中等规模使用 HNSW，超大规模使用 IVF；
+    语料规模跨过阈值，或 IVF 语料相对上次训练增长超过 ``retrain_growth`` 倍时，
+    从现有向量重建索引。行号与外部ID一一对应，随索引一起持久化。
+    """
+
+    INDEX_FILE = "index.faiss"
+    IDS_FILE = "ids.json"
+    META_FILE = "meta.json"
+
+    def __init__(
+        self,
+        dimension: int,
+        index_dir: Optional[Union[str, Path]] = None,
+        flat_threshold: int = 10_000,
+        ivf_threshold: int = 1_000_000,
+        retrain_growth: float = 2.0,
+        nprobe: int = 10,
+        hnsw_m: int = 32,
+        hnsw_ef_search: int = 64,
+        normalize: bool = True,
+    ):
+        if not faiss.available:
+            raise ImportError("faiss package is required for VectorIndexManager")
+
+        self.dimension = dimension
+        self.index_dir = Path(index_dir) if index_dir else None
+        self.flat_threshold = flat_threshold
+        self.ivf_threshold = ivf_threshold
+        self.retrain_growth = retrain_growth
+        self.nprobe = nprobe
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_search = hnsw_ef_search
+        self.normalize = normalize
+
+        self.index: Any = None
+        self.index_type: Optional[str] = None
+        self.trained_size = 0  # 上次构建索引时的向量数
+        self.ids: List[str] = []
+        self.id_to_row: Dict[str, int] = {}
+
+        # 以内存映射方式加载的索引只读，修改前需要完整加载
+        self._read_only = False
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.index.ntotal) if self.index is not None else 0
+
+    def choose_index_type(self, size: int) -> str:
+        """根据语料规模选择索引类型"""
+        if size < self.flat_threshold:
+            return "flat"
+        if size < self.ivf_threshold:
+            return "hnsw"
+        return "ivf"
+
+    # ------------------------------------------------------------------
+    # 构建
+    # ------------------------------------------------------------------
+
+    def _prepare(self, vectors: Any) -> np.ndarray:
+        """转换为连续的 float32 矩阵并归一化（不修改调用方的数组）"""
+        array = np.array(vectors, dtype="float32", copy=True, order="C")
+        array = array.reshape(-1, self.dimension)
+        if self.normalize and len(array):
+            faiss.normalize_L2(array)
+        return array
+
+    def _create_index(self, index_type: str, training: np.ndarray) -> Any:
+        if index_type == "flat":
+            return faiss.IndexFlatIP(self.dimension)
+
+        if index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(
+                self.dimension, self.hnsw_m, faiss.METRIC_INNER_PRODUCT
+            )
+            index.hnsw.efSearch = self.hnsw_ef_search
+            return index
+
+        # IVF：聚类数约为 4*sqrt(n)，同时保证每个聚类至少有 39 个训练样本
+        nlist = max(1, min(int(4 * math.sqrt(len(training))), len(training) // 39))
+        quantizer = faiss.IndexFlatIP(self.dimension)
+        index = faiss.IndexIVFFlat(
+            quantizer, self.dimension, nlist, faiss.METRIC_INNER_PRODUCT
+        )
+        index.train(training)
+        index.nprobe = min(self.nprobe, nlist)
+        return index
+
+    def _build(self, vectors: np.ndarray):
+        """用全部（已归一化的）向量重建索引"""
+        index_type = self.choose_index_type(len(vectors))
+        index = self._create_index(index_type, vectors)
+        if len(vectors):
+            index.add(vectors)
+
+        self.index = index
+        self.index_type = index_type
+        self.trained_size = len(vectors)
+        logger.info(f"向量索引已构建: {index_type}, {len(vectors)} 个向量")
+
+    def reconstruct_all(self) -> np.ndarray:
+        """取回索引中的全部（已归一化的）向量"""
+        if self.index is None or self.ntotal == 0:
+            return np.zeros((0, self.dimension), dtype="float32")
+        if self.index_type == "ivf":
+            faiss.extract_index_ivf(self.index).make_direct_map()
+        return self.index.reconstruct_n(0, self.ntotal)
+
+    def _needs_rebuild(self, total: int) -> bool:
+        if self.index is None:
+            return True
+        if self.choose_index_type(total) != self.index_type:
+            return True
+        return (
+            self.index_type == "ivf" and total > self.trained_size * self.retrain_growth
+        )
+
+    def _ensure_writable(self):
+        if not self._read_only:
+            return
+        # 内存映射的索引不能修改，完整加载一份可写副本
+        self.index = faiss.read_index(str(self.index_dir / self.INDEX_FILE))
+        self._read_only = False
+
+    def add(self, vectors: Any, ids: Sequence[str]):
+        """
+        添加向量
+
+        Args:
+            vectors: 形状为 (n, dimension) 的向量
+            ids: 与向量一一对应的外部ID，行号按添加顺序递增
+        """
+        array = self._prepare(vectors)
+        if len(array) != len(ids):
+            raise ValueError("向量数量与ID数量不一致")
+        if not len(array):
+            return
+
+        self._ensure_writable()
+        total = self.ntotal + len(array)
+        if self._needs_rebuild(total):
+            self._build(np.vstack([self.reconstruct_all(), array]))
+        else:
+            self.index.add(array)
+
+        start = len(self.ids)
+        for offset, media_id in enumerate(ids):
+            media_id = str(media_id)
+            self.ids.append(media_id)
+            if media_id:
+                self.id_to_row[media_id] = start + offset
+
+    def search(self, queries: Any, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        搜索最相似的向量
+
+        Returns:
+            (相似度, 行号)，形状均为 (查询数, k)；不足 k 个结果时行号为 -1
+        """
+        array = self._prepare(queries)
+        k = min(int(k), self.ntotal)
+        if k <= 0:
+            return (
+                np.zeros((len(array), 0), dtype="float32"),
+                np.zeros((len(array), 0), dtype="int64"),
+            )
+        return self.index.search(array, k)
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    def save(self, index_dir: Optional[Union[str, Path]] = None):
+        """保存索引、ID映射和元数据（先写临时文件再替换，避免半写状态）"""
+        target = Path(index_dir) if index_dir else self.index_dir
+        if target is None or self.index is None:
+            return
+        target.mkdir(parents=True, exist_ok=True)
+
+        index_path = target / self.INDEX_FILE
+        tmp_path = target / f"{self.INDEX_FILE}.tmp"
+        faiss.write_index(self.index, str(tmp_path))
+        os.replace(tmp_path, index_path)
+
+        for name, data in (
+            (self.IDS_FILE, self.ids),
+            (
+                self.META_FILE,
+                {
+                    "dimension": self.dimension,
+                    "index_type": self.index_type,
+                    "trained_size": self.trained_size,
+                    "normalize": self.normalize,
+                },
+            ),
+        ):
+            tmp_path = target / f"{name}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, target / name)
+
+        self.index_dir = target
+
+    def load(
+        self, index_dir: Optional[Union[str, Path]] = None, mmap: bool = True
+    ) -> bool:
+        """
+        加载持久化的索引
+
+        Args:
+            index_dir: 索引目录，默认使用构造时的目录
+            mmap: 是否以内存映射方式只读加载（启动快、多进程共享页缓存）
+
+        Returns:
+            是否加载成功
+        """
+        source = Path(index_dir) if index_dir else self.index_dir
+        if source is None:
+            return False
+
+        index_path = source / self.INDEX_FILE
+        if not index_path.exists():
+            return False
+
+        try:
+            with open(source / self.META_FILE, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("dimension") != self.dimension:
+                logger.warning(
+                    f"向量索引维度不匹配: {meta.get('dimension')} != {self.dimension}"
+                )
+                return False
+
+            with open(source / self.IDS_FILE, "r", encoding="utf-8") as f:
+                ids = json.load(f)
+
+            flags = 0
+            if mmap:
+                flags = (
+                    getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+                    | faiss.IO_FLAG_READ_ONLY
+                )
+            index = faiss.read_index(str(index_path), flags)
+        except Exception as e:
+            logger.error(f"加载向量索引失败: {e}")
+            return False
+
+        if index.ntotal != len(ids):
+            logger.warning("向量索引与ID映射数量不一致，忽略持久化索引")
+            return False
+
+        self.index = index
+        self.index_type = meta.get("index_type")
+        self.trained_size = int(meta.get("trained_size", index.ntotal))
+        self.normalize = bool(meta.get("normalize", self.normalize))
+        self.ids = [str(media_id) for media_id in ids]
+        self.id_to_row = {
+            media_id: row for row, media_id in enumerate(self.ids) if media_id
+        }
+        self.index_dir = source
+        self._read_only = mmap
+        if self.index_type == "hnsw":
+            index.hnsw.efSearch = self.hnsw_ef_search
+        logger.info(f"已加载向量索引: {self.index_type}, {index.ntotal} 个向量")
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取索引统计信息"""
+        return {
+            "index_type": self.index_type,
+            "ntotal": self.ntotal,
+            "trained_size": self.trained_size,
+            "dimension": self.dimension,
+            "memory_mapped": self._read_only,
+            "index_dir": str(self.index_dir) if self.index_dir else None,
+        }
@@ -0,0 +1,88 @@
+"""
+内存缓存基准测试
+
+在 1M 键规模下测量 MemoryCacheBackend 各淘汰策略的 set/get/淘汰吞吐量（ops/sec）
+与进程常驻内存（RSS）增量及单条目内存。
+
+用法:
+    python scripts/benchmark_memory_cache.py [--keys 1000000] [--policy lru lfu fifo]
+"""
+
+import argparse
+import asyncio
+import gc
+import random
+import sys
+import time
+from pathlib import Path
+
+import psutil
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.cache_manager import CachePolicy, MemoryCacheBackend  # noqa: E402
+
+
+def rss_mb() -> float:
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+async def timed(label: str, count: int, coro_factory) -> None:
+    start = time.perf_counter()
+    await coro_factory()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<18} {count / elapsed:12,.0f} ops/sec")
+
+
+async def bench_policy(policy: CachePolicy, num_keys: int, ttl) -> None:
+    keys = [f"key:{i}" for i in range(num_keys)]
+    lookups = random.Random(0).choices(keys, k=num_keys)
+    overflow = [f"new:{i}" for i in range(num_keys)]
+    gc.collect()
+    base_rss = rss_mb()
+    cache = MemoryCacheBackend(max_size=num_keys, policy=policy)
+
+    print(f"{policy.value.upper()} ({num_keys:,} keys, ttl={ttl})")
+
+    async def fill():
+        for i, key in enumerate(keys):
+            await cache.set(key, i, ttl)
+
+    async def read():
+        for key in lookups:
+            await cache.get(key)
+
+    async def evict():
+        for i, key in enumerate(overflow):
+            await cache.set(key, i, ttl)
+
+    await timed("set (fill)", num_keys, fill)
+    gc.collect()
+    rss_delta = rss_mb() - base_rss
+    print(f"  {'rss delta':<18} {rss_delta:12,.1f} MB")
+    print(f"  {'per entry':<18} {rss_delta * 1024 * 1024 / num_keys:12,.0f} bytes")
+    await timed("get (random)", num_keys, read)
+    await timed("set (evicting)", num_keys, evict)
+
+    await cache.clear()
+    del cache
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    parser.add_argument("--ttl", type=int, default=3600)
+    parser.add_argument(
+        "--policy",
+        nargs="+",
+        default=["lru", "lfu", "fifo"],
+        choices=["lru", "lfu", "fifo"],
+    )
+    args = parser.parse_args()
+
+    for policy in args.policy:
+        await bench_policy(CachePolicy(policy), args.keys, args.ttl)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,220 @@
+"""
+发布名称解析基准测试
+
+在合成的发布名称语料（文件名、RSS 标题、动漫命名混合，含一定比例的重复名称）上
+测量统一解析器的吞吐量（names/sec）：旧的重命名器实现、无缓存的首次解析、
+带 LRU 缓存的解析。
+
+用法:
+    python scripts/benchmark_release_parser.py [--count 1000000] [--repeat 0.3]
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.release_parser import ReleaseNameParser  # noqa: E402
+
+NAMES = [
+    "The Matrix",
+    "Breaking Bad",
+    "Inception",
+    "Dune Part Two",
+    "Severance",
+    "Spider-Man Across the Spider-Verse",
+    "Blade Runner 2049",
+    "Frieren",
+]
+SOURCES = ["BluRay", "WEB-DL", "HDTV", "REMUX", "WEBRip", "BDRip", ""]
+RESOLUTIONS = ["2160p", "4K", "UHD", "1080p", "720p", "480p", ""]
+CODECS = ["x265", "HEVC", "H264", "x264", "AVC", "AV1", ""]
+AUDIOS = ["DTS-HD.MA.5.1", "DTS", "Atmos", "AC3", "DD5.1", "AAC", "FLAC", ""]
+GROUPS = ["CHD", "HDS", "FRDS", "MTeam", "TTG", "SPARKS"]
+EXTENSIONS = [".mkv", ".mp4", ".ts", ""]
+
+
+def build_corpus(count: int, repeat: float, seed: int) -> List[str]:
+    """生成合成名称语料，``repeat`` 比例的名称重复最近出现过的名称"""
+    rng = random.Random(seed)
+    names: List[str] = []
+    for _ in range(count):
+        if names and rng.random() < repeat:
+            # 重复名称多来自最近出现过的名称（RSS 重复抓取、目录反复扫描）
+            names.append(names[rng.randrange(max(0, len(names) - 10_000), len(names))])
+            continue
+        title = rng.choice(NAMES)
+        style = rng.random()
+        if style < 0.15:
+            # 动漫命名：[组名] 标题 - 集数 [分辨率]
+            names.append(
+                f"[{rng.choice(GROUPS)}] {title} - {rng.randint(1, 28):02d} "
+                f"[{rng.choice(RESOLUTIONS) or '1080p'}]{rng.choice(EXTENSIONS)}"
+            )
+            continue
+        sep = "." if style < 0.6 else " "
+        parts = [title.replace(" ", sep), str(rng.randint(1990, 2024))]
+        if rng.random() < 0.5:
+            parts.append(f"S{rng.randint(1, 12):02d}E{rng.randint(1, 24):02d}")
+        parts.extend(
+            [
+                rng.choice(SOURCES),
+                rng.choice(RESOLUTIONS),
+                rng.choice(CODECS),
+                rng.choice(AUDIOS),
+            ]
+        )
+        if sep == " ":
+            parts.append(f"{rng.uniform(0.3, 80):.1f}{rng.choice(['GB', 'MB'])}")
+        name = sep.join(p for p in parts if p) + f"-{rng.choice(GROUPS)}"
+        names.append(name + (rng.choice(EXTENSIONS) if sep == "." else ""))
+    return names
+
+
+def legacy_parse_filename(filename: str) -> Dict[str, Any]:
+    """旧实现（FileRenamer.parse_filename）：十余次未编译的 re.search/re.sub 与重复的 lower()"""
+    info = {}
+
+    # 提取年份
+    year_match = re.search(r"(19|20)\d{2}", filename)
+    if year_match:
+        info["year"] = year_match.group()
+
+    # 提取季集信息
+    season_episode_match = re.search(r"[Ss](\d+)[Ee](\d+)", filename)
+    if season_episode_match:
+        season = int(season_episode_match.group(1))
+        episode = int(season_episode_match.group(2))
+        info["season"] = str(season)
+        info["episode"] = str(episode)
+        info["season_episode"] = f"S{season:02d}E{episode:02d}"
+
+    # 提取分辨率
+    resolution_patterns = {
+        "2160p": ["2160p", "4k", "uhd"],
+        "1080p": ["1080p", "1080"],
+        "720p": ["720p", "720"],
+        "480p": ["480p", "480"],
+    }
+
+    for resolution, patterns in resolution_patterns.items():
+        if any(pattern in filename.lower() for pattern in patterns):
+            info["resolution"] = resolution
+            break
+
+    # 提取编码
+    codec_patterns = {
+        "H265": ["h265", "hevc", "x265"],
+        "H264": ["h264", "x264", "avc"],
+        "AV1": ["av1"],
+    }
+
+    for codec, patterns in codec_patterns.items():
+        if any(pattern in filename.lower() for pattern in patterns):
+            info["codec"] = codec
+            break
+
+    # 提取音频格式
+    audio_patterns = {
+        "DTS-HD": ["dts-hd", "dtshd"],
+        "DTS": ["dts"],
+        "Dolby Atmos": ["atmos"],
+        "Dolby Digital": ["ac3", "dd", "dolbydigital"],
+        "AAC": ["aac"],
+        "FLAC": ["flac"],
+    }
+
+    for audio, patterns in audio_patterns.items():
+        if any(pattern in filename.lower() for pattern in patterns):
+            info["audio"] = audio
+            break
+
+    # 提取发布组
+    group_match = re.search(r"-([A-Za-z0-9]+)(?:\.[^.]+)?$", filename)
+    if group_match:
+        info["release_group"] = group_match.group(1)
+
+    # 提取来源类型
+    source_patterns = {
+        "BluRay": ["bluray", "bdrip", "brrip"],
+        "WEB-DL": ["webdl", "web-dl", "webrip"],
+        "HDTV": ["hdtv"],
+        "DVD": ["dvdrip", "dvd"],
+    }
+
+    for source, patterns in source_patterns.items():
+        if any(pattern in filename.lower() for pattern in patterns):
+            info["source_type"] = source
+            break
+
+    # 提取标题（移除其他信息）
+    title = filename
+
+    # 移除扩展名
+    title = Path(title).stem
+
+    # 移除常见标识符
+    patterns_to_remove = [
+        r"[Ss]\d+[Ee]\d+",  # 季集信息
+        r"(19|20)\d{2}",  # 年份
+        r"2160p|1080p|720p|480p",  # 分辨率
+        r"h265|h264|hevc|x265|x264|av1",  # 编码
+        r"dts[-_]?hd|dts|atmos|ac3|aac|flac",  # 音频
+        r"bluray|bdrip|webdl|hdtv|dvdrip",  # 来源
+        r"\[.*?\]",  # 方括号内容
+        r"\(.*?\)",  # 圆括号内容
+    ]
+
+    for pattern in patterns_to_remove:
+        title = re.sub(pattern, "", title, flags=re.IGNORECASE)
+
+    # 清理标题
+    title = re.sub(r"[._]+", " ", title)
+    title = title.strip(" ._-")
+
+    info["title"] = title
+
+    return info
+
+
+def run(label: str, func: Callable[[str], Any], names: List[str]) -> float:
+    start = time.perf_counter()
+    for name in names:
+        func(name)
+    elapsed = time.perf_counter() - start
+    rate = len(names) / elapsed
+    print(
+        f"{label:<18} {len(names):>9,} names {elapsed:8.3f}s  {rate:12,.0f} names/sec"
+    )
+    return rate
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--count", type=int, default=1_000_000)
+    arg_parser.add_argument("--repeat", type=float, default=0.3)
+    arg_parser.add_argument("--legacy-count", type=int, default=100_000)
+    arg_parser.add_argument("--seed", type=int, default=42)
+    args = arg_parser.parse_args()
+
+    names = build_corpus(args.count, args.repeat, args.seed)
+    print(f"corpus: {len(names):,} names, {len(set(names)):,} unique")
+
+    legacy = run("legacy renamer", legacy_parse_filename, names[: args.legacy_count])
+    uncached = ReleaseNameParser(cache_size=0)
+    cold = run("compiled (no memo)", uncached.parse, names)
+    memoized = ReleaseNameParser()
+    warm = run("compiled (LRU)", memoized.parse, names)
+    print(f"memo: {memoized.cache_info()}")
+    print(
+        f"speedup vs legacy: {cold / legacy:.2f}x cold, {warm / legacy:.2f}x memoized"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+RSS标题解析基准测试
+
+对比逐子串扫描的旧实现与预编译分类器在合成标题语料上的吞吐量（items/sec）。
+
+用法:
+    python scripts/benchmark_rss_parser.py [--count 100000] [--seed 42]
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.rss_engine import DefaultRSSParser  # noqa: E402
+
+NAMES = ["The Matrix", "Breaking Bad", "Inception", "Dune Part Two", "Severance"]
+SOURCES = ["BluRay", "WEB-DL", "HDTV", "REMUX", "WEBRip"]
+RESOLUTIONS = ["2160p", "4K", "UHD", "1080p", "720p", "480p", ""]
+CODECS = ["x265", "HEVC", "H264", "x264", "AVC", "AV1", ""]
+AUDIOS = ["DTS-HD MA 5.1", "DTS", "Atmos", "AC3", "DD5.1", "AAC", "FLAC", ""]
+GROUPS = ["CHD", "HDS", "FRDS", "MTeam", "TTG"]
+
+
+def build_corpus(count: int, seed: int) -> List[str]:
+    """生成合成标题语料"""
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(count):
+        parts = [rng.choice(NAMES), str(rng.randint(1990, 2024))]
+        if rng.random() < 0.5:
+            parts.append(f"S{rng.randint(1, 12):02d}E{rng.randint(1, 24):02d}")
+        parts.extend(
+            [
+                rng.choice(SOURCES),
+                rng.choice(RESOLUTIONS),
+                rng.choice(CODECS),
+                rng.choice(AUDIOS),
+                f"{rng.uniform(0.3, 80):.1f}{rng.choice(['GB', 'MB'])}",
+            ]
+        )
+        titles.append(" ".join(p for p in parts if p) + f"-{rng.choice(GROUPS)}")
+    return titles
+
+
+# 旧实现的季集正则（季、集各自独立匹配）
+LEGACY_SEASON_PATTERN = r"[Ss](\d+)"
+LEGACY_EPISODE_PATTERN = r"[Ee](\d+)"
+
+
+def legacy_parse(title: str) -> tuple:
+    """旧实现：逐属性逐子串扫描并多次调用 re.search"""
+    parser = DefaultRSSParser
+    title_lower = title.lower()
+
+    size = 0.0
+    size_match = re.search(parser.SIZE_PATTERN, title)
+    if size_match:
+        size_value = float(size_match.group(1))
+        unit = size_match.group(2).lower()
+        size = size_value if unit == "gb" else size_value / 1024
+
+    def family(patterns):
+        for value, substrings in patterns.items():
+            if any(pattern in title_lower for pattern in substrings):
+                return value
+        return ""
+
+    season_match = re.search(LEGACY_SEASON_PATTERN, title)
+    episode_match = re.search(LEGACY_EPISODE_PATTERN, title)
+    return (
+        size,
+        family(parser.RESOLUTION_PATTERNS),
+        family(parser.CODEC_PATTERNS),
+        family(parser.AUDIO_PATTERNS),
+        int(season_match.group(1)) if season_match else 0,
+        int(episode_match.group(1)) if episode_match else 0,
+    )
+
+
+def run(label: str, func, titles: List[str]) -> float:
+    start = time.perf_counter()
+    for title in titles:
+        func(title)
+    elapsed = time.perf_counter() - start
+    rate = len(titles) / elapsed
+    print(f"{label:<12} {elapsed:8.3f}s  {rate:12,.0f} items/sec")
+    return rate
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--count", type=int, default=100_000)
+    arg_parser.add_argument("--seed", type=int, default=42)
+    args = arg_parser.parse_args()
+
+    titles = build_corpus(args.count, args.seed)
+    classifier = DefaultRSSParser.get_classifier()
+
+    mismatches = sum(1 for t in titles if legacy_parse(t) != classifier.classify(t))
+    print(f"corpus: {len(titles):,} titles, mismatches: {mismatches}")
+
+    # 计时前清空解析缓存，测量的是首次解析的吞吐量
+    classifier.cache_clear()
+    before = run("legacy", legacy_parse, titles)
+    after = run("compiled", classifier.classify, titles)
+    print(f"speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from core.ai_recommendation import AIRecommendationSystem
+from core.vector_index import VectorIndexManager
+
+faiss = pytest.importorskip("faiss")
+
+DIMENSION = 8
+
+
+class FakeModel:
+    """Deterministic stand-in for a SentenceTransformer model."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, **kwargs):
+        self.calls.append(list(texts))
+        vectors = np.zeros((len(texts), DIMENSION), dtype="float32")
+        for row, text in enumerate(texts):
+            rng = np.random.default_rng(sum(text.encode("utf-8")) + len(text))
+            vectors[row] = rng.random(DIMENSION)
+        return vectors
+
+
+def make_items(count, start=0):
+    return [
+        {
+            "id": f"movie_{i}",
+            "title": f"电影 {i}",
+            "type": "movie",
+            "genres": ["科幻"] if i % 2 else ["剧情"],
+            "year": 2000 + i % 20,
+            "directors": [f"导演 {i % 7}"],
+        }
+        for i in range(start, start + count)
+    ]
+
+
+@pytest.fixture
+def system(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    system = AIRecommendationSystem()
+    system.model = FakeModel()
+    system.config["index_dir"] = str(tmp_path / "index")
+    system.index_manager = VectorIndexManager(DIMENSION, index_dir=tmp_path / "index")
+    system.is_initialized = True
+    yield system
+    system.close()
+
+
+class TestBatchedEmbedding:
+    """Test cases for batched embedding generation."""
+
+    def test_add_media_items_encodes_in_batches(self, system):
+        """Only cache misses are encoded, in batch_size chunks."""
+        system.config["batch_size"] = 32
+        items = make_items(100)
+
+        system.add_media_items(items)
+
+        assert [len(call) for call in system.model.calls] == [32, 32, 32, 4]
+        assert system.faiss_index.ntotal == 100
+        assert len(system.embeddings) == 100
+
+        expected = system.model.encode([system.build_media_text(items[5])])[0]
+        np.testing.assert_allclose(system.embeddings[5], expected)
+
+    def test_cached_and_duplicate_texts_are_not_reencoded(self, system):
+        """Known ids and repeated items are not encoded or indexed again."""
+        items = make_items(10)
+        system.add_media_items(items)
+        system.model.calls.clear()
+
+        system.add_media_items(items + make_items(3, start=10) + make_items(3, 10))
+
+        assert sum(len(call) for call in system.model.calls) == 3
+        assert system.faiss_index.ntotal == 13
+        assert len(system.media_items) == 13
+
+    def test_threaded_encoding_matches_sequential(self, system):
+        """Parallel chunk encoding keeps the input order."""
+        texts = [system.build_media_text(item) for item in make_items(50)]
+        system.config.update(batch_size=8, enable_cache=False)
+        sequential = system.generate_embeddings(texts)
+
+        system.config["encode_workers"] = 4
+        threaded = system.generate_embeddings(texts)
+
+        np.testing.assert_array_equal(sequential, threaded)
+        assert threaded.shape == (50, DIMENSION)
+
+
+class TestPersistentIndex:
+    """Test cases for the persisted vector index."""
+
+    def test_restart_loads_index_without_reencoding(self, system, tmp_path):
+        items = make_items(20)
+        system.add_media_items(items)
+        expected = system.get_similar_items("电影 3 科幻", top_k=5)
+
+        restarted = AIRecommendationSystem()
+        restarted.config["index_dir"] = str(tmp_path / "index")
+        restarted.model = FakeModel()
+        restarted.model.get_sentence_embedding_dimension = lambda: DIMENSION
+        restarted._init_faiss_index()
+        restarted.is_initialized = True
+
+        assert restarted.index_manager.get_stats()["memory_mapped"]
+        assert restarted.media_items == items
+
+        # 无需重新添加即可返回带元数据的结果
+        result = restarted.get_similar_items("电影 3 科幻", top_k=5)
+        assert [r["title"] for r in result] == [r["title"] for r in expected]
+
+        restarted.model.calls.clear()
+        restarted.add_media_items(items)
+
+        assert restarted.model.calls == []
+        assert restarted.faiss_index.ntotal == 20
+        assert restarted.media_items[3]["title"] == "电影 3"
+        result = restarted.get_similar_items("电影 3 科幻", top_k=5)
+        assert [r["id"] for r in result] == [r["id"] for r in expected]
+        restarted.close()
+
+    def test_restart_without_matching_metadata_keeps_ids(self, system, tmp_path):
+        system.add_media_items(make_items(5))
+        (tmp_path / "index" / AIRecommendationSystem.ITEMS_FILE).write_text("[]")
+
+        restarted = AIRecommendationSystem()
+        restarted.config["index_dir"] = str(tmp_path / "index")
+        restarted.model = FakeModel()
+        restarted.model.get_sentence_embedding_dimension = lambda: DIMENSION
+        restarted._init_faiss_index()
+
+        assert restarted.media_items == [{"id": f"movie_{i}"} for i in range(5)]
+        restarted.close()
+
+    def test_index_saves_are_debounced(self, system, tmp_path):
+        """Adds within the save interval rewrite the index once; close saves the rest."""
+        system.config["index_save_interval"] = 3600
+        with patch.object(
+            system.index_manager, "save", wraps=system.index_manager.save
+        ) as save:
+            for start in range(0, 50, 10):
+                system.add_media_items(make_items(10, start=start))
+            assert save.call_count == 1
+
+            system.close()
+            assert save.call_count == 2
+
+        restarted = VectorIndexManager(DIMENSION, index_dir=tmp_path / "index")
+        assert restarted.load()
+        assert restarted.ntotal == 50
+
+    def test_restart_reuses_persisted_embeddings(self, system, tmp_path):
+        items = make_items(10)
+        system.config["index_dir"] = None
+        system.add_media_items(items)
+
+        restarted = AIRecommendationSystem()
+        restarted.model = FakeModel()
+        restarted.is_initialized = True
+        embeddings = restarted.generate_embeddings(
+            [restarted.build_media_text(item) for item in items]
+        )
+
+        assert restarted.model.calls == []
+        np.testing.assert_allclose(embeddings, np.vstack(system.embeddings))
+        assert restarted.get_recommendation_stats()["embedding_store"]["entries"] == 10
+        restarted.close()
+
+
+class TestBatchedSearch:
+    """Test cases for batched multi-query search and personalization."""
+
+    def test_batch_recommend_matches_single_queries(self, system):
+        system.add_media_items(make_items(40))
+        system.config["enable_cache"] = False
+        media_ids = ["movie_1", "missing", "movie_7", "movie_20"]
+        expected = {
+            media_id: [item["id"] for item in system.get_similar_to_media(media_id, 5)]
+            for media_id in media_ids
+        }
+        system.model.calls.clear()
+
+        results = system.batch_recommend(media_ids, top_k=5)
+
+        assert len(system.model.calls) == 1
+        assert list(results) == media_ids
+        assert results["missing"] == []
+        for media_id in media_ids:
+            ids = [item["id"] for item in results[media_id]]
+            assert media_id not in ids
+            assert ids == expected[media_id]
+
+    def test_personalization_weights(self, system):
+        system.user_preferences.set_weight("alice", "genre:科幻", 2.0)
+        system.user_preferences.set_weight("alice", "director:导演 A", 1.0)
+        year = datetime.now().year
+        candidates = [
+            {
+                "id": "a",
+                "type": "movie",
+                "genres": ["科幻"],
+                "directors": ["导演 A"],
+                "rating": 9.1,
+                "year": year,
+                "similarity_score": 0.5,
+            },
+            {
+                "id": "b",
+                "type": "movie",
+                "directors": ["导演 A"],
+                "rating": 7.5,
+                "year": year - 4,
+                "similarity_score": 0.6,
+            },
+            {
+                "id": "c",
+                "type": "tv",
+                "directors": ["导演 B"],
+                "actors": list("wxyz"),
+                "similarity_score": 0.4,
+            },
+        ]
+
+        results = system._apply_personalization_weights("alice", candidates)
+
+        a, b, c = results
+        assert a["personalization_bonus"] == pytest.approx(2.0 + 1.0 + 0.1)
+        assert (a["diversity_bonus"], a["rating_bonus"], a["recency_bonus"]) == (
+            0.0,
+            0.3,
+            0.2,
+        )
+        assert b["personalization_bonus"] == pytest.approx(1.1)
+        assert (b["diversity_bonus"], b["rating_bonus"], b["recency_bonus"]) == (
+            0.0,
+            0.1,
+            0.1,
+        )
+        # 三位演员 + 导演 + 类型，均为默认权重 0.1
+        assert c["personalization_bonus"] == pytest.approx(0.5)
+        assert c["diversity_bonus"] == pytest.approx(0.3)
+        assert c["personalized_score"] == pytest.approx(0.4 + 0.05 + 0.3)
+        assert "alice" in system.user_preferences
+        assert "bob" not in system.user_preferences
+
+    def test_batch_personalized_recommendations(self, system):
+        system.add_media_items(make_items(30))
+        system.user_preferences.set_weight("alice", "genre:科幻", 5.0)
+        system.model.calls.clear()
+
+        results = system.batch_personalized_recommendations(
+            {"alice": "电影 科幻", "bob": "电影 剧情", "carol": ""}, top_k=4
+        )
+
+        assert len(system.model.calls) == 1
+        assert results["carol"] == []
+        assert len(results["alice"]) == len(results["bob"]) == 4
+        scores = [item["personalized_score"] for item in results["alice"]]
+        assert scores == sorted(scores, reverse=True)
+        single = system.get_personalized_recommendations("alice", "电影 科幻", 4)
+        assert [item["id"] for item in results["alice"]] == [
+            item["id"] for item in single
+        ]
+
+
+class TestUserInteractions:
+    """Test cases for interaction ingestion and preference persistence."""
+
+    def test_interactions_update_preferences_and_persist(self, system):
+        system.add_media_items(make_items(10))
+        for _ in range(3):
+            system.record_user_interaction("alice", "movie_1", "like")
+        system.record_user_interaction("alice", "unknown", "view")
+
+        assert system.user_preferences.get_weight("alice", "genre:科幻") == (
+            pytest.approx(6.1)
+        )
+        assert system.user_preferences.get_weight("alice", "director:导演 1") == (
+            pytest.approx(6.1)
+        )
+        assert len(system.user_interactions["alice"]) == 4
+        assert system.flush_interactions(timeout=5)
+        system.close()
+
+        restarted = AIRecommendationSystem()
+        assert restarted.user_preferences.to_dict("alice") == pytest.approx(
+            {"genre:科幻": 6.1, "director:导演 1": 6.1}
+        )
+        restarted.cursor.execute("SELECT COUNT(*) FROM user_interactions")
+        assert restarted.cursor.fetchone() == (4,)
+        restarted.close()
@@ -0,0 +1,249 @@
+"""
+批量文件操作执行器测试
+"""
+
+import errno
+import os
+
+import pytest
+
+from core.batch_executor import (
+    ACTION_COPY,
+    ACTION_HARDLINK,
+    ACTION_RENAME,
+    ACTION_SYMLINK,
+    CONFLICT_OVERWRITE,
+    CONFLICT_SKIP,
+    STATUS_DONE,
+    STATUS_FAILED,
+    STATUS_PENDING,
+    STATUS_ROLLED_BACK,
+    STATUS_SKIPPED,
+    BatchExecutor,
+    BatchJournal,
+    FileOperation,
+    _apply,
+    _part_path,
+    plan_operations,
+    run_batch,
+)
+from core.file_organizer import FileOrganizer
+from core.path_manager import PathManager
+from core.renamer import FileRenamer
+
+
+def write(path, data="data"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(data)
+    return str(path)
+
+
+@pytest.fixture
+def sources(tmp_path):
+    return [write(tmp_path / "in" / f"file{i}.mkv", f"content {i}") for i in range(5)]
+
+
+class TestPlan:
+    def test_collisions_get_suffixes(self, tmp_path):
+        a = write(tmp_path / "a.mkv")
+        b = write(tmp_path / "b.mkv")
+        c = write(tmp_path / "c.mkv")
+        write(tmp_path / "out" / "Movie.mkv")
+        target = str(tmp_path / "out" / "Movie.mkv")
+
+        planned = plan_operations(
+            [
+                FileOperation(a, target),
+                FileOperation(b, target),
+                FileOperation(c, target),
+            ]
+        )
+        assert [os.path.basename(op.target) for op in planned] == [
+            "Movie_01.mkv",
+            "Movie_02.mkv",
+            "Movie_03.mkv",
+        ]
+        assert all(op.status == STATUS_PENDING for op in planned)
+
+    def test_skip_and_overwrite(self, tmp_path):
+        a = write(tmp_path / "a.mkv")
+        b = write(tmp_path / "b.mkv")
+        existing = write(tmp_path / "Movie.mkv")
+
+        skipped = plan_operations([FileOperation(a, existing)], CONFLICT_SKIP)
+        assert skipped[0].status == STATUS_SKIPPED
+
+        overwrite = plan_operations(
+            [FileOperation(a, existing), FileOperation(b, existing)],
+            CONFLICT_OVERWRITE,
+        )
+        # 已存在的目标可以覆盖，批次内重复的目标跳过后者
+        assert [op.status for op in overwrite] == [STATUS_PENDING, STATUS_SKIPPED]
+
+    def test_target_equal_to_source(self, tmp_path):
+        a = write(tmp_path / "a.mkv")
+        move, copy = plan_operations(
+            [FileOperation(a, a), FileOperation(a, a, ACTION_COPY)]
+        )
+        assert move.status == STATUS_DONE
+        assert copy.status == STATUS_SKIPPED
+
+    def test_unknown_action_or_policy(self, tmp_path):
+        with pytest.raises(ValueError):
+            FileOperation("a", "b", "teleport")
+        with pytest.raises(ValueError):
+            plan_operations([], "merge")
+
+
+class TestExecute:
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_moves_into_new_directories(self, tmp_path, sources, workers):
+        operations = [
+            FileOperation(source, str(tmp_path / "out" / f"d{i % 2}" / f"m{i}.mkv"))
+            for i, source in enumerate(sources)
+        ]
+        progress = []
+        executed = BatchExecutor(workers, workers).execute(
+            operations, progress=lambda done, total: progress.append((done, total))
+        )
+
+        assert all(op.succeeded for op in executed)
+        assert not any(os.path.exists(source) for source in sources)
+        assert (tmp_path / "out" / "d1" / "m3.mkv").read_text() == "content 3"
+        assert progress[-1] == (5, 5)
+
+    def test_copy_and_links(self, tmp_path, sources):
+        out = tmp_path / "out"
+        executed = run_batch(
+            [
+                FileOperation(sources[0], str(out / "copy.mkv"), ACTION_COPY),
+                FileOperation(sources[1], str(out / "hard.mkv"), ACTION_HARDLINK),
+                FileOperation(sources[2], str(out / "soft.mkv"), ACTION_SYMLINK),
+                FileOperation(sources[3], str(out / "renamed.mkv"), ACTION_RENAME),
+            ]
+        )
+        assert all(op.succeeded for op in executed)
+        assert (out / "copy.mkv").read_text() == "content 0"
+        assert os.path.exists(sources[0])
+        assert os.path.samefile(sources[1], out / "hard.mkv")
+        assert os.readlink(out / "soft.mkv") == sources[2]
+        assert not os.path.exists(sources[3])
+
+    def test_failures_are_reported(self, tmp_path):
+        executed = run_batch(
+            [FileOperation(str(tmp_path / "missing.mkv"), str(tmp_path / "x.mkv"))]
+        )
+        assert executed[0].status == STATUS_FAILED
+        assert executed[0].error
+
+    def test_cross_device_move_copies_then_removes(self, tmp_path, sources):
+        op = FileOperation(sources[0], str(tmp_path / "target.mkv"))
+        _apply(op, cross_device=True)
+        assert op.succeeded
+        assert not os.path.exists(sources[0])
+        assert (tmp_path / "target.mkv").read_text() == "content 0"
+        assert not os.path.exists(_part_path(op.target))
+
+    def test_move_falls_back_to_copy_on_exdev(self, tmp_path, sources, monkeypatch):
+        def rename(source, target):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+        monkeypatch.setattr("core.batch_executor.os.rename", rename)
+        op = FileOperation(sources[0], str(tmp_path / "target.mkv"))
+        _apply(op, cross_device=False)
+        assert op.succeeded
+        assert not os.path.exists(sources[0])
+        assert (tmp_path / "target.mkv").read_text() == "content 0"
+
+
+class TestJournal:
+    def test_rollback_restores_sources(self, tmp_path, sources):
+        journal = tmp_path / "job.db"
+        operations = [
+            FileOperation(source, str(tmp_path / "out" / "new" / f"m{i}.mkv"))
+            for i, source in enumerate(sources)
+        ]
+        run_batch(operations, journal_path=journal)
+
+        rolled_back = BatchExecutor().rollback(journal)
+        assert all(op.status == STATUS_ROLLED_BACK for op in rolled_back)
+        assert all(os.path.exists(source) for source in sources)
+        assert not (tmp_path / "out").exists()
+
+    def test_rollback_ignores_moves_onto_themselves(self, tmp_path, sources):
+        journal = tmp_path / "job.db"
+        operations = [
+            FileOperation(sources[0], sources[0]),
+            FileOperation(sources[1], str(tmp_path / "out" / "m1.mkv")),
+        ]
+        run_batch(operations, journal_path=journal)
+
+        unchanged, moved = BatchExecutor().rollback(journal)
+        assert (unchanged.status, unchanged.error) == (STATUS_DONE, None)
+        assert moved.status == STATUS_ROLLED_BACK
+        assert os.path.exists(sources[0]) and os.path.exists(sources[1])
+
+    def test_resume_skips_operations_done_before_crash(self, tmp_path, sources):
+        journal_path = tmp_path / "job.db"
+        operations = plan_operations(
+            FileOperation(source, str(tmp_path / "out" / f"m{i}.mkv"))
+            for i, source in enumerate(sources)
+        )
+        journal = BatchJournal(journal_path)
+        journal.start(operations)
+        journal.close()
+
+        # 中断前已执行但未来得及记录的操作
+        (tmp_path / "out").mkdir()
+        os.rename(sources[0], operations[0].target)
+
+        with pytest.raises(RuntimeError):
+            BatchExecutor().execute(operations, journal_path)
+
+        resumed = BatchExecutor().resume(journal_path)
+        assert all(op.succeeded for op in resumed)
+        assert all(op.error is None for op in resumed)
+        assert sorted(os.listdir(tmp_path / "out")) == [f"m{i}.mkv" for i in range(5)]
+
+        # 任务完成后同一日志可以开始新任务
+        BatchExecutor().execute([], journal_path)
+
+
+class TestBatchCallers:
+    def test_renamer_resolves_duplicate_names(self, tmp_path):
+        write(tmp_path / "The.Matrix.1999.1080p.x264.mkv")
+        write(tmp_path / "The Matrix 1999 1080p H264.mkv")
+
+        results = FileRenamer(str(tmp_path)).batch_rename(str(tmp_path))
+        assert sorted(results.values()) == [
+            "The Matrix.1999.H264.mkv",
+            "The Matrix.1999.H264_01.mkv",
+        ]
+        assert sorted(os.listdir(tmp_path)) == sorted(results.values())
+
+    def test_path_manager_keeps_input_order(self, tmp_path):
+        first = write(tmp_path / "a.mp3")
+        second = write(tmp_path / "b.mp3")
+        files = [
+            {"path": first, "type": "other", "title": "Song", "extension": "mp3"},
+            {"type": "other"},
+            {"path": second, "type": "other", "title": "Song", "extension": "mp3"},
+        ]
+
+        results = PathManager().batch_rename(files, "{title}")
+        assert [r["success"] for r in results] == [True, False, True]
+        assert results[0]["new_path"].endswith("Song.mp3")
+        assert results[2]["new_path"].endswith("Song_001.mp3")
+
+    def test_organizer_skips_duplicate_targets(self, tmp_path):
+        write(tmp_path / "downloads" / "Inception.2010.1080p.mkv")
+        write(tmp_path / "downloads" / "Inception.2010.720p.mkv")
+
+        results = FileOrganizer(str(tmp_path)).batch_organize(
+            str(tmp_path / "downloads")
+        )
+        assert [r["success"] for r in results] == [True, False]
+        assert results[0]["target_path"].endswith(
+            os.path.join("Movies", "Inception (2010)", "Inception (2010).mkv")
+        )
+        assert "目标已存在" in results[1]["message"]
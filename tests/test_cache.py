@@ -1,9 +1,17 @@
 import pytest
+import asyncio
 import json
+import pickle
+import time
 from datetime import datetime, timedelta
 from unittest.mock import patch, AsyncMock
 
-from core.cache_manager import RedisCacheBackend
+from core.cache_manager import (
+    CachePolicy,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    SQLiteCacheBackend,
+)
 
 
 class TestRedisCacheManager:
@@ -181,3 +189,547 @@ class TestRedisCacheManager:
         """Test close operation."""
         # This should not raise an exception
         await cache_manager.close()
+
+
+class TestRedisCacheBackendFake:
+    """Test cases for RedisCacheBackend against fakeredis."""
+
+    @pytest.fixture
+    def server(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        return fakeredis.FakeServer()
+
+    def _backend(self, server, **kwargs):
+        import fakeredis
+
+        client = fakeredis.aioredis.FakeRedis(server=server)
+        return RedisCacheBackend(client=client, **kwargs)
+
+    @pytest.mark.asyncio
+    async def test_binary_roundtrip_and_compression(self, server):
+        """Values keep their Python types and large values are compressed."""
+        pytest.importorskip("zstandard")
+        cache = self._backend(server, compression="zstd", compress_threshold=64)
+        value = {"ids": (1, 2), "raw": b"\x00", "text": "片名" * 100}
+
+        assert await cache.set("big", value, ttl=60) is True
+        assert await cache.get("big") == value
+
+        stored = await cache.redis.get("vabhub:big")
+        assert stored[0] == 0x05
+        assert len(stored) < len(pickle.dumps(value, protocol=5))
+        await cache.close()
+
+    @pytest.mark.asyncio
+    async def test_reads_legacy_json_values(self, server):
+        """Values written by the old JSON backend are still readable."""
+        cache = self._backend(server)
+        await cache.redis.set("vabhub:old", json.dumps({"a": 1}))
+
+        assert await cache.get("old") == {"a": 1}
+        await cache.close()
+
+    @pytest.mark.asyncio
+    async def test_scan_keys_clear_and_per_key_ttl(self, server):
+        """keys/clear use SCAN and batch_set honours per-key TTLs."""
+        cache = self._backend(server, scan_count=2)
+        await cache.redis.set("other:keep", b"1")
+        items = {f"chart:{i}": i for i in range(5)}
+        assert await cache.batch_set(items, ttl=60, ttls={"chart:0": 5}) is True
+
+        assert sorted(await cache.keys("chart:*")) == sorted(items)
+        assert 0 < await cache.redis.ttl("vabhub:chart:0") <= 5
+        assert 5 < await cache.redis.ttl("vabhub:chart:1") <= 60
+
+        with patch.object(cache.redis, "keys", side_effect=AssertionError):
+            assert await cache.clear() is True
+        assert await cache.keys() == []
+        assert await cache.redis.get("other:keep") == b"1"
+        await cache.close()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("writer_local_cache_size", [100, 0])
+    async def test_client_side_cache_invalidation(
+        self, server, writer_local_cache_size
+    ):
+        """Hot keys are served locally until another instance writes them.
+
+        Writers publish invalidations even when they keep no local cache.
+        """
+        reader = self._backend(server, local_cache_size=100)
+        writer = self._backend(server, local_cache_size=writer_local_cache_size)
+        await writer.set("hot", 1)
+
+        assert await reader.get("hot") == 1
+        with patch.object(reader.redis, "mget", side_effect=AssertionError):
+            assert await reader.get("hot") == 1
+        assert reader.local_hits == 1
+
+        await writer.set("hot", 2)
+        for _ in range(50):
+            if "hot" not in reader._local:
+                break
+            await asyncio.sleep(0.01)
+        assert await reader.get("hot") == 2
+
+        await reader.close()
+        await writer.close()
+
+
+class TestMemoryCacheBackend:
+    """Test cases for MemoryCacheBackend."""
+
+    @pytest.mark.asyncio
+    async def test_lfu_evicts_least_frequently_used(self):
+        """LFU evicts the key with the lowest access count, oldest first."""
+        cache = MemoryCacheBackend(max_size=3, policy=CachePolicy.LFU)
+        for key in ("a", "b", "c"):
+            await cache.set(key, key)
+        await cache.get("a")
+        await cache.get("a")
+        await cache.get("c")
+
+        await cache.set("d", "d")
+
+        assert sorted(await cache.keys()) == ["a", "c", "d"]
+
+    @pytest.mark.asyncio
+    async def test_lru_and_fifo_eviction_order(self):
+        """LRU honours reads, FIFO only honours creation order."""
+        lru = MemoryCacheBackend(max_size=2, policy=CachePolicy.LRU)
+        fifo = MemoryCacheBackend(max_size=2, policy=CachePolicy.FIFO)
+        for cache in (lru, fifo):
+            await cache.set("a", 1)
+            await cache.set("b", 2)
+            await cache.get("a")
+            await cache.set("c", 3)
+
+        assert sorted(await lru.keys()) == ["a", "c"]
+        assert sorted(await fifo.keys()) == ["b", "c"]
+
+    @pytest.mark.asyncio
+    async def test_overwrite_does_not_evict(self):
+        """Overwriting an existing key never evicts another key."""
+        cache = MemoryCacheBackend(max_size=2)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.set("a", 3)
+
+        assert await cache.get("a") == 3
+        assert await cache.get("b") == 2
+
+    @pytest.mark.asyncio
+    async def test_ttl_expires_lazily_without_tasks(self):
+        """TTL expiry is lazy and does not spawn a task per key."""
+        cache = MemoryCacheBackend(max_size=10)
+        tasks_before = len(asyncio.all_tasks())
+
+        await cache.set("short", 1, ttl=1)
+        await cache.set("long", 2, ttl=3600)
+        assert len(asyncio.all_tasks()) == tasks_before
+
+        with patch("core.cache_manager.time.time", return_value=time.time() + 2):
+            assert await cache.get("short") is None
+            assert await cache.exists("short") is False
+            assert await cache.keys() == ["long"]
+
+    @pytest.mark.asyncio
+    async def test_max_bytes_capacity(self):
+        """max_bytes evicts by estimated size and rejects oversized values."""
+        cache = MemoryCacheBackend(
+            max_size=100, max_bytes=300, size_estimator=lambda v: len(v)
+        )
+        await cache.set("a", "x" * 100)
+        await cache.set("b", "x" * 100)
+        await cache.set("c", "x" * 150)
+
+        assert sorted(await cache.keys()) == ["b", "c"]
+        assert cache.current_bytes == 252
+        assert await cache.set("huge", "x" * 400) is False
+        assert (await cache.get_memory_usage())["bytes"] == 252
+
+    def test_entries_use_slots(self):
+        """Cache entries are slot-based objects without a per-entry __dict__."""
+        from core.cache_manager import CacheEntry
+
+        entry = CacheEntry("value", time.time(), None, 0)
+        assert not hasattr(entry, "__dict__")
+
+
+class TestSQLiteCacheBackend:
+    """Test cases for the sharded SQLite disk cache."""
+
+    @pytest.mark.asyncio
+    async def test_roundtrip_and_persistence(self, tmp_path):
+        """Values are stored in binary form and survive a reopen."""
+        cache = SQLiteCacheBackend(cache_dir=tmp_path, compaction_interval=None)
+        value = {"title": "movie", "raw": b"\x00\x01", "ids": (1, 2)}
+        assert await cache.set("tmdb:1", value) is True
+        assert await cache.batch_set({"a": 1, "b/c": [1, 2]}) is True
+        assert await cache.get("tmdb:1") == value
+        await cache.close()
+
+        assert sorted(p.name for p in tmp_path.glob("*.db")) == [
+            f"cache-{i}.db" for i in range(4)
+        ]
+
+        reopened = SQLiteCacheBackend(cache_dir=tmp_path, compaction_interval=None)
+        assert await reopened.batch_get(["tmdb:1", "b/c", "missing"]) == {
+            "tmdb:1": value,
+            "b/c": [1, 2],
+        }
+        assert sorted(await reopened.keys()) == ["a", "b/c", "tmdb:1"]
+        await reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_lru_size_enforcement(self, tmp_path):
+        """max_size evicts the least recently used key, also after a reopen."""
+        cache = SQLiteCacheBackend(
+            cache_dir=tmp_path, max_size=2, compaction_interval=None
+        )
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.get("a")
+        await cache.set("c", 3)
+
+        assert sorted(await cache.keys()) == ["a", "c"]
+        assert await cache.get("b") is None
+        await cache.close()
+
+        reopened = SQLiteCacheBackend(
+            cache_dir=tmp_path, max_size=1, compaction_interval=None
+        )
+        assert await reopened.keys() == ["c"]
+        await reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_max_bytes(self, tmp_path):
+        """max_bytes bounds the serialized size and rejects oversized values."""
+        cache = SQLiteCacheBackend(
+            cache_dir=tmp_path, max_bytes=1000, compaction_interval=None
+        )
+        await cache.set("a", "x" * 400)
+        await cache.set("b", "x" * 400)
+        await cache.set("c", "x" * 400)
+
+        assert sorted(await cache.keys()) == ["b", "c"]
+        assert await cache.set("b", "x" * 2000) is False
+        assert await cache.keys() == ["c"]
+        assert cache.current_bytes <= 1000
+        await cache.close()
+
+    @pytest.mark.asyncio
+    async def test_ttl_and_compaction(self, tmp_path):
+        """Expired keys are invisible immediately and removed by compaction."""
+        cache = SQLiteCacheBackend(cache_dir=tmp_path, compaction_interval=None)
+        await cache.set("short", 1, ttl=1)
+        await cache.set("long", 2, ttl=3600)
+
+        with patch("core.cache_manager.time.time", return_value=time.time() + 2):
+            assert await cache.exists("short") is False
+            assert await cache.get("short") is None
+            assert await cache.compact() == 1
+            assert await cache.keys() == ["long"]
+
+        assert await cache.delete("long") is True
+        assert await cache.delete("long") is False
+        assert await cache.clear() is True
+        assert (await cache.get_memory_usage())["size"] == 0
+        await cache.close()
+
+
+class TestCacheManagerSingleFlight:
+    """Test cases for request coalescing in CacheManager."""
+
+    @pytest.fixture
+    def manager(self):
+        from core.cache_manager import CacheLevel, CacheManager
+
+        manager = CacheManager()
+        manager.enabled_levels = [CacheLevel.MEMORY]
+        manager.add_backend(CacheLevel.MEMORY, MemoryCacheBackend(max_size=100))
+        return manager
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_call(self, manager):
+        """Concurrent misses for the same key run the factory once."""
+        calls = 0
+
+        async def factory():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"title": "movie"}
+
+        results = await asyncio.gather(
+            *(manager.get_or_set("tmdb:1", factory) for _ in range(50))
+        )
+
+        assert calls == 1
+        assert all(result == {"title": "movie"} for result in results)
+        assert await manager.get_or_set("tmdb:1", factory) == {"title": "movie"}
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_factory_error_propagates_to_all_waiters(self, manager):
+        """A failing computation is reported to every waiter and not cached."""
+
+        async def factory():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream down")
+
+        results = await asyncio.gather(
+            *(manager.get_or_set("tmdb:2", factory) for _ in range(5)),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert manager._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_followers(self, manager):
+        """Cancelling the caller that started the computation leaves the rest waiting."""
+        calls = 0
+
+        async def factory():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "value"
+
+        leader = asyncio.create_task(manager.get_or_set("tmdb:3", factory))
+        await asyncio.sleep(0)
+        followers = [
+            asyncio.create_task(manager.get_or_set("tmdb:3", factory)) for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        assert await asyncio.gather(*followers) == ["value"] * 3
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert calls == 1
+        assert manager._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_stale_while_revalidate(self, manager):
+        """Expired values are served while a single background refresh runs."""
+        version = 0
+
+        async def factory():
+            nonlocal version
+            version += 1
+            await asyncio.sleep(0.01)
+            return version
+
+        assert await manager.get_or_set("chart", factory, ttl=1, stale_ttl=60) == 1
+
+        with patch("core.cache_manager.time.time", return_value=time.time() + 2):
+            stale = await asyncio.gather(
+                *(
+                    manager.get_or_set("chart", factory, ttl=1, stale_ttl=60)
+                    for _ in range(10)
+                )
+            )
+        await asyncio.gather(*manager._refresh_tasks)
+
+        assert stale == [1] * 10
+        assert version == 2
+        assert await manager.get_or_set("chart", factory, ttl=1, stale_ttl=60) == 2
+
+    @pytest.mark.asyncio
+    async def test_cached_decorator_coalesces(self, manager):
+        """The cached decorator uses single-flight semantics."""
+        from core import cache_manager as cache_module
+
+        calls = 0
+
+        @cache_module.cached(ttl=60)
+        async def lookup(media_id):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"id": media_id}
+
+        with patch.object(cache_module, "cache_manager", manager):
+            results = await asyncio.gather(*(lookup(7) for _ in range(20)))
+
+        assert calls == 1
+        assert results == [{"id": 7}] * 20
+        assert lookup.__name__ == "lookup"
+
+
+class TestCacheManagerTiers:
+    """Test cases for tier promotion and negative caching."""
+
+    def _manager(self, **kwargs):
+        from core.cache_manager import CacheLevel, CacheManager
+
+        manager = CacheManager(**kwargs)
+        manager.enabled_levels = [CacheLevel.MEMORY, CacheLevel.DISK]
+        upper = MemoryCacheBackend(max_size=100)
+        lower = MemoryCacheBackend(max_size=100)
+        manager.add_backend(CacheLevel.MEMORY, upper)
+        manager.add_backend(CacheLevel.DISK, lower)
+        return manager, upper, lower
+
+    @pytest.mark.asyncio
+    async def test_inclusive_promotion_is_batched(self):
+        """Lower-tier hits are promoted upward in one batch and kept below."""
+        manager, upper, lower = self._manager()
+        for i in range(5):
+            await lower.set(f"k{i}", i)
+
+        with patch.object(upper, "batch_set", wraps=upper.batch_set) as batch_set:
+            values = await asyncio.gather(*(manager.get(f"k{i}") for i in range(5)))
+            assert values == [0, 1, 2, 3, 4]
+            await manager.flush_promotions()
+            await asyncio.sleep(0)
+
+        assert batch_set.call_count == 1
+        assert sorted(await upper.keys()) == [f"k{i}" for i in range(5)]
+        assert sorted(await lower.keys()) == [f"k{i}" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_exclusive_promotion_moves_key(self):
+        """Exclusive policy removes the promoted key from its source tier."""
+        from core.cache_manager import TierPolicy
+
+        manager, upper, lower = self._manager(tier_policy=TierPolicy.EXCLUSIVE)
+        await lower.set("k", "v")
+
+        assert await manager.get("k") == "v"
+        await manager.flush_promotions()
+
+        assert await upper.get("k") == "v"
+        assert await lower.exists("k") is False
+
+    @pytest.mark.asyncio
+    async def test_promotion_never_writes_downward(self):
+        """An upper-tier hit does not touch lower tiers."""
+        manager, upper, lower = self._manager()
+        await upper.set("k", "v")
+
+        with patch.object(lower, "get", wraps=lower.get) as lower_get:
+            assert await manager.get("k") == "v"
+            await manager.flush_promotions()
+
+        lower_get.assert_not_called()
+        assert await lower.exists("k") is False
+
+    @pytest.mark.asyncio
+    async def test_negative_cache(self):
+        """Known-missing keys skip the backends until set or expiry."""
+        manager, upper, lower = self._manager(negative_ttl=5)
+
+        with patch.object(lower, "get", wraps=lower.get) as lower_get:
+            assert await manager.get("missing") is None
+            assert await manager.get("missing") is None
+            assert lower_get.call_count == 1
+            assert manager.negative_hits == 1
+
+            with patch("core.cache_manager.time.time", return_value=time.time() + 6):
+                assert await manager.get("missing") is None
+            assert lower_get.call_count == 2
+
+        await manager.set("missing", "found")
+        assert await manager.get("missing") == "found"
+
+    @pytest.mark.asyncio
+    async def test_set_during_miss_is_not_negative_cached(self):
+        """A set racing an in-flight miss is not masked by the negative cache."""
+        manager, upper, lower = self._manager(negative_ttl=5)
+        reading = asyncio.Event()
+        release = asyncio.Event()
+        original_get = lower.get
+
+        async def slow_get(key):
+            # Read the miss, then let the concurrent set finish before returning
+            value = await original_get(key)
+            reading.set()
+            await release.wait()
+            return value
+
+        with patch.object(lower, "get", side_effect=slow_get):
+            pending = asyncio.create_task(manager.get("k"))
+            await reading.wait()
+            await manager.set("k", "v")
+            release.set()
+            assert await pending is None
+
+        assert await manager.get("k") == "v"
+        assert manager.negative_hits == 0
+
+
+class TestCacheManagerStats:
+    """Test cases for latency, namespace and eviction statistics."""
+
+    @pytest.fixture
+    def manager(self):
+        from core.cache_manager import CacheLevel, CacheManager
+
+        manager = CacheManager(negative_ttl=0)
+        manager.enabled_levels = [CacheLevel.MEMORY]
+        manager.add_backend(CacheLevel.MEMORY, MemoryCacheBackend(max_size=2))
+        return manager
+
+    @pytest.mark.asyncio
+    async def test_size_does_not_drift_on_overwrite(self, manager):
+        """Overwrites and evictions keep size equal to the real entry count."""
+        from core.cache_manager import CacheLevel
+
+        for _ in range(3):
+            await manager.set("tmdb:1", 1)
+        assert manager.stats[CacheLevel.MEMORY].size == 1
+
+        await manager.batch_set({"tmdb:2": 2, "chart:1": 3})
+        assert manager.stats[CacheLevel.MEMORY].size == 2
+
+    @pytest.mark.asyncio
+    async def test_namespace_latency_and_evictions(self, manager):
+        """Stats are split by key namespace and evictions by reason."""
+        from core.cache_manager import CacheLevel
+
+        await manager.set("tmdb:1", 1)
+        await manager.set("tmdb:2", 2)
+        await manager.set("chart:1", 3)
+        await manager.get("chart:1")
+        await manager.get("tmdb:1")
+        await manager.get("plain")
+
+        stats = manager.stats[CacheLevel.MEMORY]
+        assert stats.evictions == {"max_size": 1}
+        assert stats.namespaces["tmdb"].sets == 2
+        assert stats.namespaces["tmdb"].evictions == 1
+        assert stats.namespaces["tmdb"].misses == 1
+        assert stats.namespaces["chart"].hits == 1
+        assert stats.namespaces["default"].misses == 1
+        assert stats.latency["set"].count == 3
+        assert stats.latency["get"].count == 3
+
+        data = stats.to_dict()
+        assert data["latency"]["get"]["p99_ms"] <= data["latency"]["get"]["max_ms"]
+
+    def test_stats_endpoint(self, manager):
+        """The performance API exposes the detailed cache stats."""
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        from core import api_performance
+
+        async def fill():
+            await manager.set("tmdb:1", 1)
+            await manager.get("tmdb:1")
+
+        asyncio.run(fill())
+
+        app = FastAPI()
+        app.include_router(api_performance.router)
+        with patch.object(api_performance, "cache_manager", manager):
+            response = TestClient(app).get("/api/performance/cache/stats")
+
+        assert response.status_code == 200
+        memory = response.json()["memory"]
+        assert memory["size"] == 1
+        assert memory["namespaces"]["tmdb"]["hits"] == 1
+        assert memory["latency"]["get"]["count"] == 1
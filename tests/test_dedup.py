@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from core.dedup import DuplicateFinder
+from core.path_manager import PathManager
+
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+@pytest.fixture
+def library(tmp_path):
+    root = tmp_path / "library"
+    big = os.urandom(300 * 1024)
+    # 头尾相同、中间不同：需要全量哈希才能区分
+    middle_diff = bytearray(big)
+    middle_diff[150 * 1024] ^= 0xFF
+    files = {
+        "a": write(root / "movies" / "a.mkv", big),
+        "b": write(root / "backup" / "a copy.mkv", big),
+        "c": write(root / "c.mkv", big),
+        "d": write(root / "d.mkv", bytes(middle_diff)),
+        "e": write(root / "e.nfo", b"small"),
+        "f": write(root / "sub" / "f.nfo", b"small"),
+        "g": write(root / "g.nfo", b"other"),
+        "h": write(root / "unique.bin", os.urandom(1000)),
+    }
+    return root, files
+
+
+class TestDuplicateFinder:
+    """Test cases for the staged duplicate finder."""
+
+    def test_clusters(self, library):
+        root, files = library
+        finder = DuplicateFinder(block_size=4096, chunk_size=64 * 1024)
+
+        clusters = finder.find(root)
+
+        assert [sorted(c.paths) for c in clusters] == [
+            sorted([files["a"], files["b"], files["c"]]),
+            sorted([files["e"], files["f"]]),
+        ]
+        assert clusters[0].wasted_bytes == 2 * 300 * 1024
+        # 大小唯一的文件不读取；小文件的头尾哈希即全量哈希
+        assert finder.stats["size_candidates"] == 7
+        assert finder.stats["full_hashed"] == 4
+
+    def test_cache_makes_rerun_incremental(self, library, tmp_path):
+        root, files = library
+        cache = tmp_path / "cache.db"
+        DuplicateFinder(cache_path=cache).find(root)
+
+        finder = DuplicateFinder(cache_path=cache)
+        first = finder.find(root)
+        assert finder.stats["partial_hashed"] == 0
+        assert finder.stats["full_hashed"] == 0
+
+        # 修改后的文件重新哈希
+        write(root / "c.mkv", os.urandom(300 * 1024))
+        second = finder.find(root)
+        assert finder.stats["partial_hashed"] == 1
+        assert len(second[0].paths) == len(first[0].paths) - 1
+
+    def test_hard_links_are_hashed_once(self, tmp_path):
+        data = os.urandom(10000)
+        original = write(tmp_path / "x.bin", data)
+        os.link(original, tmp_path / "y.bin")
+        write(tmp_path / "z.bin", data)
+        finder = DuplicateFinder(block_size=1024)
+
+        clusters = finder.find(tmp_path)
+
+        assert len(clusters) == 1 and len(clusters[0].paths) == 3
+        # 硬链接共享数据：只有两个 inode 被哈希，只有一份副本浪费空间
+        assert finder.stats["full_hashed"] == 2
+        assert clusters[0].inodes == 2
+        assert clusters[0].wasted_bytes == 10000
+
+    def test_hard_links_alone_are_not_duplicates(self, tmp_path):
+        original = write(tmp_path / "x.bin", os.urandom(10000))
+        os.link(original, tmp_path / "y.bin")
+        finder = DuplicateFinder(block_size=1024)
+
+        assert finder.find(tmp_path) == []
+        assert finder.stats["partial_hashed"] == 0
+
+    def test_path_manager_returns_pairs(self, library, tmp_path):
+        root, files = library
+        manager = PathManager(str(tmp_path / "base"))
+
+        pairs = manager.find_duplicates(str(root))
+
+        assert len(pairs) == 3
+        assert (tmp_path / "base" / ".dedup_cache.db").exists()
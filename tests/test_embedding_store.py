@@ -0,0 +1,90 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from core.embedding_store import EmbeddingStore, content_key
+
+DIMENSION = 8
+
+
+def random_vectors(count, seed=0):
+    return np.random.default_rng(seed).random((count, DIMENSION)).astype("float32")
+
+
+class TestEmbeddingStore:
+    """Test cases for EmbeddingStore."""
+
+    def test_content_key_is_stable(self):
+        expected = hashlib.blake2b(b"model\0text", digest_size=16).digest()
+        assert content_key("model", "text") == expected
+        assert content_key("other", "text") != expected
+
+    def test_put_and_get_across_instances(self, tmp_path):
+        texts = [f"text {i}" for i in range(10)]
+        vectors = random_vectors(10)
+        EmbeddingStore(tmp_path, "model-a").put_many(texts, vectors)
+
+        store = EmbeddingStore(tmp_path, "model-a")
+        found, missing = store.get_many(["text 3", "unknown", "text 9"])
+
+        assert missing == [1]
+        np.testing.assert_array_equal(found[0], vectors[3])
+        np.testing.assert_array_equal(found[2], vectors[9])
+        assert len(store) == 10
+        # 不同模型的嵌入互不可见
+        assert len(EmbeddingStore(tmp_path, "model-b")) == 0
+
+    def test_reader_sees_rows_appended_by_other_writer(self, tmp_path):
+        reader = EmbeddingStore(tmp_path, "model")
+        writer = EmbeddingStore(tmp_path, "model")
+        writer.put_many(["a"], random_vectors(1))
+        assert "a" in reader
+
+        writer.put_many(["a", "b", "b"], random_vectors(3, seed=1))
+        assert len(reader) == 2
+
+    def test_float16_storage(self, tmp_path):
+        vectors = random_vectors(4)
+        store = EmbeddingStore(tmp_path, "model", dtype="float16")
+        store.put_many(list("abcd"), vectors)
+
+        found, _ = EmbeddingStore(tmp_path, "model").get_many(["c"])
+        assert found[0].dtype == np.float32
+        np.testing.assert_allclose(found[0], vectors[2], atol=1e-3)
+        assert (tmp_path / "model" / "vectors.bin").stat().st_size == 4 * 8 * 2
+
+    def test_torn_write_is_discarded(self, tmp_path):
+        store = EmbeddingStore(tmp_path, "model")
+        store.put_many(["a"], random_vectors(1))
+        # 模拟写入向量后、写入键前进程中断
+        with open(tmp_path / "model" / "vectors.bin", "ab") as f:
+            f.write(b"\0" * 10)
+
+        vectors = random_vectors(1, seed=2)
+        store.put_many(["b"], vectors)
+
+        found, _ = EmbeddingStore(tmp_path, "model").get_many(["b"])
+        np.testing.assert_array_equal(found[0], vectors[0])
+
+    def test_torn_key_write_is_discarded(self, tmp_path):
+        EmbeddingStore(tmp_path, "model").put_many(["a"], random_vectors(1))
+        # 模拟写入键的过程中进程中断，留下不完整的键
+        with open(tmp_path / "model" / "keys.bin", "ab") as f:
+            f.write(b"\1" * 7)
+
+        vectors = random_vectors(2, seed=3)
+        EmbeddingStore(tmp_path, "model").put_many(["b", "c"], vectors)
+
+        store = EmbeddingStore(tmp_path, "model")
+        found, missing = store.get_many(["a", "b", "c"])
+        assert missing == []
+        np.testing.assert_array_equal(found[1], vectors[0])
+        np.testing.assert_array_equal(found[2], vectors[1])
+        assert (tmp_path / "model" / "keys.bin").stat().st_size == 3 * 16
+
+    def test_dimension_mismatch_is_rejected(self, tmp_path):
+        store = EmbeddingStore(tmp_path, "model")
+        store.put_many(["a"], random_vectors(1))
+        with pytest.raises(ValueError):
+            store.put_many(["b"], np.zeros((1, DIMENSION * 2), dtype="float32"))
@@ -0,0 +1,106 @@
+"""
+并行目录扫描测试
+"""
+
+import os
+
+import pytest
+
+from core.fs_scanner import scan_files
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "Movies" / "Inception (2010)").mkdir(parents=True)
+    (tmp_path / "TV" / "Show" / "Season 01").mkdir(parents=True)
+    (tmp_path / "Movies" / "Inception (2010)" / "Inception.mkv").write_bytes(b"x" * 10)
+    (tmp_path / "Movies" / "Inception (2010)" / "Inception.STRM").write_text("http://a")
+    (tmp_path / "TV" / "Show" / "Season 01" / "S01E01.mp4").write_bytes(b"y" * 5)
+    (tmp_path / "TV" / "Show" / "Season 01" / "S01E01.strm").write_text("http://b")
+    (tmp_path / "readme.txt").write_text("hello")
+    return tmp_path
+
+
+def _relpaths(root, entries):
+    return sorted(os.path.relpath(entry.path, root) for entry in entries)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_recursive_scan_returns_all_files(tree, workers):
+    entries = list(scan_files(tree, workers=workers))
+    assert _relpaths(tree, entries) == [
+        os.path.join("Movies", "Inception (2010)", "Inception.STRM"),
+        os.path.join("Movies", "Inception (2010)", "Inception.mkv"),
+        os.path.join("TV", "Show", "Season 01", "S01E01.mp4"),
+        os.path.join("TV", "Show", "Season 01", "S01E01.strm"),
+        "readme.txt",
+    ]
+    assert all(not entry.is_dir for entry in entries)
+
+
+def test_entry_metadata_matches_stat(tree):
+    entry = next(scan_files(tree, extensions={"txt"}))
+    st = os.stat(entry.path)
+    assert entry.name == "readme.txt"
+    assert entry.extension == "txt"
+    assert entry.size == st.st_size
+    assert entry.mtime_ns == st.st_mtime_ns
+    assert (entry.device, entry.inode) == (st.st_dev, st.st_ino)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_extension_filter_is_case_insensitive(tree, workers):
+    entries = list(scan_files(tree, extensions={".strm"}, workers=workers))
+    assert sorted(entry.name for entry in entries) == ["Inception.STRM", "S01E01.strm"]
+
+
+def test_non_recursive_with_dirs(tree):
+    entries = list(scan_files(tree, recursive=False, include_dirs=True))
+    assert sorted((entry.name, entry.is_dir) for entry in entries) == [
+        ("Movies", True),
+        ("TV", True),
+        ("readme.txt", False),
+    ]
+
+
+def test_recursive_include_dirs(tree):
+    entries = list(scan_files(tree, include_dirs=True, workers=4))
+    dirs = _relpaths(tree, [entry for entry in entries if entry.is_dir])
+    assert dirs == [
+        "Movies",
+        os.path.join("Movies", "Inception (2010)"),
+        "TV",
+        os.path.join("TV", "Show"),
+        os.path.join("TV", "Show", "Season 01"),
+    ]
+
+
+def test_parallel_matches_sequential_on_wide_tree(tmp_path):
+    for i in range(40):
+        folder = tmp_path / f"dir{i:02d}" / "sub"
+        folder.mkdir(parents=True)
+        for j in range(5):
+            (folder / f"file{j}.mkv").write_bytes(b"")
+    sequential = _relpaths(tmp_path, scan_files(tmp_path, workers=1))
+    parallel = _relpaths(tmp_path, scan_files(tmp_path, workers=8))
+    assert len(parallel) == 200
+    assert parallel == sequential
+
+
+def test_directory_symlinks_are_not_followed(tree):
+    os.symlink(tree / "Movies", tree / "link_to_movies")
+    os.symlink(tree / "readme.txt", tree / "link.txt")
+    names = sorted(entry.name for entry in scan_files(tree, workers=4))
+    assert "link.txt" in names
+    assert names.count("Inception.mkv") == 1
+
+
+def test_missing_root_yields_nothing(tmp_path):
+    assert list(scan_files(tmp_path / "missing", workers=4)) == []
+
+
+def test_early_close_stops_scan(tree):
+    iterator = scan_files(tree, workers=4)
+    first = next(iterator)
+    iterator.close()
+    assert os.path.exists(first.path)
@@ -0,0 +1,61 @@
+import subprocess
+import sys
+
+import pytest
+
+from core import lazy_imports
+from core.lazy_imports import LazyModule, get_import_report, preload
+
+
+class TestLazyModule:
+    """Test cases for lazy dependency loading."""
+
+    def test_imports_on_first_attribute_access(self, monkeypatch):
+        monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+        calls = []
+        module = LazyModule("colorsys", before_import=lambda: calls.append(1))
+
+        assert module.available
+        assert not module.loaded
+        assert "colorsys" not in sys.modules
+
+        assert module.rgb_to_hsv(1.0, 0.0, 0.0)[0] == 0.0
+        assert module.loaded
+        assert calls == [1]
+        assert "colorsys" in get_import_report()
+
+    def test_missing_module(self):
+        module = LazyModule("vabhub_missing_module")
+        assert not module.available
+        with pytest.raises(ImportError):
+            module.anything
+        assert preload([module], background=False) is None
+
+    def test_background_preload(self, monkeypatch, caplog):
+        monkeypatch.delitem(sys.modules, "wave", raising=False)
+        monkeypatch.setattr(lazy_imports, "_import_times", {})
+        module = LazyModule("wave")
+
+        with caplog.at_level("INFO", logger="core.lazy_imports"):
+            thread = preload([module])
+            thread.join(timeout=10)
+
+        assert module.loaded
+        assert list(get_import_report()) == ["wave"]
+        reports = [
+            record.import_times_ms
+            for record in caplog.records
+            if hasattr(record, "import_times_ms")
+        ]
+        assert [list(report) for report in reports] == [["wave"]]
+
+    def test_recommendation_modules_defer_heavy_imports(self):
+        code = (
+            "import sys, core.ai_recommendation_api, core.vector_index;"
+            "print(sorted(m for m in ('torch', 'faiss', 'sklearn',"
+            " 'sentence_transformers') if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout
+        assert output.strip() == "[]"
@@ -0,0 +1,267 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from core.file_organizer import FileOrganizer
+from core.library_index import LibraryIndex, _DirtyHandler
+from core.renamer import MediaOrganizer
+
+
+def write(path, data=b"data"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+def age(root):
+    """把目录修改时间调到一小时前，避开刷新时的“过新”窗口"""
+    old = time.time_ns() - 3600 * 10**9
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, ns=(old, old))
+
+
+def analyze(entry):
+    return "video", {"title": entry.name.rsplit(".", 1)[0]}
+
+
+@pytest.fixture
+def library(tmp_path):
+    root = tmp_path / "library"
+    write(root / "Movies" / "Inception.2010.mkv")
+    write(root / "TV" / "Show" / "Show.S01E01.mkv")
+    write(root / "TV" / "Show" / "Show.S01E02.mkv")
+    age(root)
+    return root
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = LibraryIndex(tmp_path / "index.db")
+    yield index
+    index.close()
+
+
+class TestLibraryIndex:
+    """Test cases for the incremental library index."""
+
+    def test_initial_refresh_indexes_everything(self, library, index):
+        changes = index.refresh(library, analyze)
+        assert len(changes.added) == 3
+        assert changes.scanned_dirs == 4
+
+        files = index.files(library)
+        assert [f.name for f in files] == [
+            "Inception.2010.mkv",
+            "Show.S01E01.mkv",
+            "Show.S01E02.mkv",
+        ]
+        assert files[0].metadata == {"title": "Inception.2010"}
+        assert files[0].media_type == "video"
+
+    def test_unchanged_tree_reads_no_directories(self, library, index):
+        index.refresh(library, analyze)
+        changes = index.refresh(library, analyze)
+        assert not changes
+        assert changes.scanned_dirs == 0
+
+    def test_only_changed_directory_is_read(self, library, index):
+        index.refresh(library, analyze)
+        new = write(library / "TV" / "Show" / "Show.S01E03.mkv")
+        os.remove(library / "Movies" / "Inception.2010.mkv")
+
+        changes = index.refresh(library, analyze)
+        assert changes.added == [new]
+        assert changes.removed == [str(library / "Movies" / "Inception.2010.mkv")]
+        assert changes.scanned_dirs == 2
+
+    def test_removed_directory_drops_subtree(self, library, index):
+        index.refresh(library, analyze)
+        for name in ("Show.S01E01.mkv", "Show.S01E02.mkv"):
+            os.remove(library / "TV" / "Show" / name)
+        os.rmdir(library / "TV" / "Show")
+
+        changes = index.refresh(library, analyze)
+        assert len(changes.removed) == 2
+        assert [f.name for f in index.files(library)] == ["Inception.2010.mkv"]
+        assert index.get_stats()["dirs"] == 3
+
+    def test_in_place_modification_needs_full_refresh(self, library, index):
+        index.refresh(library, analyze)
+        path = library / "Movies" / "Inception.2010.mkv"
+        stat = path.stat()
+        path.write_bytes(b"much longer content")
+        os.utime(path.parent, ns=(stat.st_atime_ns, path.parent.stat().st_mtime_ns))
+
+        assert not index.refresh(library, analyze)
+        changes = index.refresh(library, analyze, full=True)
+        assert changes.modified == [str(path)]
+
+    def test_dirty_only_refresh(self, library, index):
+        index.refresh(library, analyze)
+        new = write(library / "Movies" / "Up.2009.mkv")
+        write(library / "TV" / "Show" / "Show.S01E03.mkv")
+
+        index.mark_dirty(library / "Movies")
+        changes = index.refresh(library, analyze, dirty_only=True)
+        assert changes.added == [new]
+        assert changes.scanned_dirs == 1
+
+    def test_pending_and_processed(self, library, index):
+        index.refresh(library, analyze)
+        assert len(index.files(library, pending_only=True)) == 3
+
+        index.mark_processed(f.path for f in index.files(library / "TV"))
+        pending = index.files(library, pending_only=True)
+        assert [f.name for f in pending] == ["Inception.2010.mkv"]
+        assert index.get_stats()["pending"] == 1
+
+    def test_update_paths(self, library, index, tmp_path):
+        index.refresh(library, analyze)
+        source = library / "Movies" / "Inception.2010.mkv"
+        target = library / "Sorted" / "Inception (2010).mkv"
+        target.parent.mkdir()
+        os.rename(source, target)
+
+        changes = index.update_paths([source, target], analyze, processed=True)
+        assert changes.added == [str(target)]
+        assert changes.removed == [str(source)]
+        assert str(target) not in [
+            f.path for f in index.files(library, pending_only=True)
+        ]
+        # 目标目录随后被完整读取时不会再次报告该文件
+        assert not index.refresh(library, analyze)
+
+    def test_change_journal(self, library, index):
+        index.refresh(library, analyze)
+        seq = index.last_seq
+        new = write(library / "Movies" / "Up.2009.mkv")
+        index.refresh(library, analyze)
+
+        events = index.changes_since(seq)
+        assert [(e["event"], e["path"]) for e in events] == [("added", new)]
+        assert index.prune_journal(index.last_seq) == 3
+
+    def test_index_persists_and_version_change_resets(self, library, tmp_path):
+        db = tmp_path / "persist.db"
+        index = LibraryIndex(db)
+        index.refresh(library, analyze)
+        index.close()
+
+        index = LibraryIndex(db)
+        assert len(index.files()) == 3
+        assert index.refresh(library, analyze).scanned_dirs == 0
+        index.close()
+
+        index = LibraryIndex(db, version="2")
+        assert index.files() == []
+        index.close()
+
+    def test_extension_filter(self, library, tmp_path):
+        write(library / "Movies" / "Inception.2010.nfo")
+        index = LibraryIndex(tmp_path / "ext.db", extensions={"mkv"})
+        index.refresh(library, analyze)
+        assert all(f.name.endswith(".mkv") for f in index.files())
+        index.close()
+
+    def test_watcher_handler_marks_directories(self, index, tmp_path):
+        handler = _DirtyHandler(index)
+        handler.on_any_event(
+            SimpleNamespace(
+                event_type="created",
+                src_path=str(tmp_path / "a" / "new.mkv"),
+                is_directory=False,
+            )
+        )
+        handler.on_any_event(
+            SimpleNamespace(
+                event_type="moved",
+                src_path=str(tmp_path / "b" / "dir"),
+                dest_path=str(tmp_path / "c" / "dir"),
+                is_directory=True,
+            )
+        )
+        assert index._dirty == {
+            str(tmp_path / "a"),
+            str(tmp_path / "b"),
+            str(tmp_path / "b" / "dir"),
+            str(tmp_path / "c"),
+            str(tmp_path / "c" / "dir"),
+        }
+
+
+class TestIndexedOrganizers:
+    """Organizers only process new or changed files when an index is configured."""
+
+    def test_file_organizer_batch_is_incremental(self, tmp_path):
+        base = tmp_path / "base"
+        downloads = base / "downloads"
+        write(downloads / "Inception.2010.1080p.mkv")
+        age(base)
+        organizer = FileOrganizer(str(base), index_path=str(tmp_path / "fo.db"))
+
+        previews = organizer.preview_organization(str(downloads))
+        assert [p["file"] for p in previews] == ["Inception.2010.1080p.mkv"]
+
+        first = organizer.batch_organize(str(base))
+        assert len(first) == 1 and first[0]["success"]
+        assert os.path.exists(first[0]["target_path"])
+
+        assert organizer.batch_organize(str(base)) == []
+
+        new = write(downloads / "Up.2009.720p.mkv")
+        second = organizer.batch_organize(str(base))
+        assert [r["original_path"] for r in second] == [new]
+
+    def test_file_organizer_retries_failed_files(self, tmp_path):
+        base = tmp_path / "base"
+        source = write(base / "downloads" / "Inception.2010.1080p.mkv")
+        # 目标目录的位置被普通文件占用，创建目录失败
+        write(base / "Movies")
+        age(base)
+        organizer = FileOrganizer(str(base), index_path=str(tmp_path / "fo.db"))
+
+        first = organizer.batch_organize(str(base / "downloads"))
+        assert len(first) == 1 and not first[0]["success"]
+        assert os.path.exists(source)
+
+        os.remove(base / "Movies")
+        second = organizer.batch_organize(str(base / "downloads"))
+        assert len(second) == 1 and second[0]["success"]
+        assert second[0]["original_path"] == source
+
+    def test_file_organizer_without_index_unchanged(self, tmp_path):
+        write(tmp_path / "Inception.2010.mkv")
+        organizer = FileOrganizer(str(tmp_path))
+        assert organizer.library_index is None
+        infos = organizer.scan_directory()
+        assert [info.name for info in infos] == ["Inception.2010.mkv"]
+
+    def test_media_organizer_scan_is_incremental(self, tmp_path):
+        source = tmp_path / "source"
+        write(source / "The.Matrix.1999.1080p.BluRay.x264.DTS-GRP.mkv")
+        write(source / "notes.txt")
+        age(source)
+        organizer = MediaOrganizer(str(tmp_path), index_path=str(tmp_path / "mo.db"))
+
+        first = organizer.scan_and_organize(str(source))
+        assert len(first) == 1
+        assert organizer.scan_and_organize(str(source)) == {}
+
+    def test_media_organizer_retries_failed_files(self, tmp_path, monkeypatch):
+        source = tmp_path / "source"
+        path = write(source / "The.Matrix.1999.1080p.BluRay.x264.DTS-GRP.mkv")
+        age(source)
+        organizer = MediaOrganizer(str(tmp_path), index_path=str(tmp_path / "mo.db"))
+
+        def fail(*args, **kwargs):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(organizer, "organize_media_file", fail)
+        assert organizer.scan_and_organize(str(source)) == {}
+        monkeypatch.undo()
+
+        retried = organizer.scan_and_organize(str(source))
+        assert list(retried) == [path]
+        assert "renamed" in retried[path]
@@ -0,0 +1,142 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from core.interaction_writer import InteractionWriter
+from core.media_catalog import (
+    FEATURE_ACTOR,
+    FEATURE_DIRECTOR,
+    FEATURE_GENRE,
+    FeatureVocabulary,
+    MediaCatalog,
+    PreferenceVectors,
+)
+
+
+def make_item(media_id, **fields):
+    item = {"id": media_id, "type": "movie", "genres": ["科幻"], "directors": ["甲"]}
+    item.update(fields)
+    return item
+
+
+class TestMediaCatalog:
+    """Test cases for MediaCatalog."""
+
+    def test_rows_and_columns(self):
+        catalog = MediaCatalog()
+        catalog.add(
+            [make_item(f"m{i}", rating=7 + i, year=2000 + i) for i in range(100)]
+        )
+
+        assert catalog.get_row("m42") == 42
+        assert catalog.get_row("missing") is None
+        assert catalog.ratings[42] == pytest.approx(49)
+        assert catalog.years[3] == 2003
+
+        catalog.update(42, make_item("m42", genres=["剧情", "爱情"], rating=None))
+        assert np.isnan(catalog.ratings[42])
+        learned = [catalog.vocabulary.keys[i] for i in catalog.learned_features(42)]
+        assert learned == ["genre:剧情", "genre:爱情", "director:甲"]
+        assert "media_type:movie" in [
+            catalog.vocabulary.keys[i] for i in catalog.features(42)
+        ]
+
+
+class TestFeatureVocabulary:
+    """Test cases for FeatureVocabulary."""
+
+    def test_kinds_across_growth(self):
+        vocabulary = FeatureVocabulary()
+        kinds = [FEATURE_GENRE, FEATURE_DIRECTOR, FEATURE_ACTOR] * 100
+        ids = [vocabulary.add(kind, f"v{i}") for i, kind in enumerate(kinds)]
+
+        assert ids == list(range(300))
+        assert vocabulary.add(FEATURE_GENRE, "v0") == 0
+        np.testing.assert_array_equal(
+            vocabulary.kinds(np.array([299, 0, 1, 150])),
+            [FEATURE_ACTOR, FEATURE_GENRE, FEATURE_DIRECTOR, FEATURE_GENRE],
+        )
+
+
+class TestPreferenceVectors:
+    """Test cases for PreferenceVectors."""
+
+    def test_incremental_updates(self):
+        catalog = MediaCatalog()
+        catalog.add([make_item("a", genres=["科幻", "科幻"]), make_item("b")])
+        preferences = PreferenceVectors(catalog.vocabulary)
+
+        ids, weights = preferences.update("u", catalog.learned_features(0), 1.0)
+        assert preferences.to_dict("u") == {"genre:科幻": 2.1, "director:甲": 1.1}
+        assert len(ids) == len(weights) == 2
+
+        preferences.update("u", catalog.learned_features(1), -5.0)
+        assert preferences.to_dict("u") == {"genre:科幻": 0.1, "director:甲": 0.1}
+        assert preferences.get_weight("u", "actor:乙") == 0.1
+        assert preferences.get_weight("nobody", "genre:科幻") == 0.1
+
+    def test_weights_lookup_with_unsorted_ids(self):
+        catalog = MediaCatalog()
+        preferences = PreferenceVectors(catalog.vocabulary)
+        for index, key in enumerate(["genre:a", "genre:b", "genre:c"]):
+            preferences.set_weight("u", key, index + 1.0)
+
+        ids = np.array([2, 0, 5, 1, 2])
+        np.testing.assert_allclose(
+            preferences.weights("u", ids), [3.0, 1.0, 0.1, 2.0, 3.0]
+        )
+
+
+class TestInteractionWriter:
+    """Test cases for InteractionWriter."""
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        path = tmp_path / "interactions.db"
+        conn = sqlite3.connect(path)
+        conn.executescript(
+            """
+            CREATE TABLE user_interactions (
+                user_id TEXT, media_id TEXT, interaction_type TEXT,
+                interaction_value REAL, metadata TEXT, timestamp DATETIME
+            );
+            CREATE TABLE user_preferences (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT, preference_type TEXT, preference_value TEXT,
+                preference_weight REAL, last_updated DATETIME
+            );
+            CREATE UNIQUE INDEX idx_key
+            ON user_preferences (user_id, preference_type, preference_value);
+            """
+        )
+        conn.close()
+        return path
+
+    def test_batches_events_into_transactions(self, db_path):
+        writer = InteractionWriter(db_path, batch_size=50, flush_interval=60)
+        for i in range(120):
+            writer.add_interaction(("u", f"m{i}", "view", 1.0, None, "2024-01-01"))
+        for weight in (1.0, 2.0, 3.0):
+            writer.add_preferences([("u", "genre", "科幻", weight)])
+        writer.flush(timeout=5)
+
+        assert writer.transactions == 3
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM user_interactions").fetchone() == (
+            120,
+        )
+        assert conn.execute(
+            "SELECT preference_weight FROM user_preferences"
+        ).fetchall() == [(3.0,)]
+        conn.close()
+        writer.close()
+
+    def test_flushes_after_interval(self, db_path):
+        writer = InteractionWriter(db_path, batch_size=1000, flush_interval=0.05)
+        writer.add_interaction(("u", "m", "like", 1.0, None, "2024-01-01"))
+        writer.close()
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM user_interactions").fetchone() == (1,)
+        conn.close()
@@ -0,0 +1,214 @@
+"""
+发布名称解析器测试
+"""
+
+import pytest
+
+from core.file_organizer import FileOrganizer
+from core.release_parser import (
+    ReleaseNameParser,
+    get_release_parser,
+    parse_release_name,
+)
+from core.renamer import FileRenamer
+from core.rss_engine import DefaultRSSParser, RSSItem
+
+# 黄金语料：名称 -> 期望的媒体信息
+GOLDEN = [
+    (
+        "Test.Movie.2023.1080p.H264.DTS-GROUP.mkv",
+        {
+            "title": "Test Movie",
+            "year": "2023",
+            "resolution": "1080p",
+            "codec": "H264",
+            "audio": "DTS",
+            "release_group": "GROUP",
+        },
+    ),
+    (
+        "Test.Show.S01E02.1080p.H264.mkv",
+        {
+            "title": "Test Show",
+            "season": "1",
+            "episode": "2",
+            "season_episode": "S01E02",
+            "resolution": "1080p",
+            "codec": "H264",
+        },
+    ),
+    (
+        "The.Matrix.1999.1080p.BluRay.x264.DTS-GRP.mkv",
+        {
+            "title": "The Matrix",
+            "year": "1999",
+            "resolution": "1080p",
+            "codec": "H264",
+            "audio": "DTS",
+            "source_type": "BluRay",
+            "release_group": "GRP",
+        },
+    ),
+    (
+        "Breaking.Bad.S05.1080p.BluRay.x265-GRP",
+        {
+            "title": "Breaking Bad",
+            "season": "5",
+            "resolution": "1080p",
+            "codec": "H265",
+            "source_type": "BluRay",
+            "release_group": "GRP",
+        },
+    ),
+    (
+        "Hidden Figures 2016 720p WEB-DL DD5.1 H264-FGT",
+        {
+            "title": "Hidden Figures",
+            "year": "2016",
+            "resolution": "720p",
+            "codec": "H264",
+            "audio": "Dolby Digital",
+            "source_type": "WEB-DL",
+            "release_group": "FGT",
+        },
+    ),
+    (
+        "[SubsPlease] Frieren - 12 (1080p) [ABCD1234].mkv",
+        {
+            "title": "Frieren",
+            "episode": "12",
+            "resolution": "1080p",
+            "release_group": "SubsPlease",
+        },
+    ),
+    (
+        "[Nekomoe] Kimi no Na wa [01][1080p][CHS].mp4",
+        {
+            "title": "Kimi no Na wa",
+            "episode": "1",
+            "resolution": "1080p",
+            "release_group": "Nekomoe",
+        },
+    ),
+    # 片名中的年份与连字符
+    (
+        "2012.2009.1080p.BluRay.mkv",
+        {
+            "title": "2012",
+            "year": "2009",
+            "resolution": "1080p",
+            "source_type": "BluRay",
+        },
+    ),
+    (
+        "Blade.Runner.2049.2017.2160p.UHD.BluRay.x265.mkv",
+        {
+            "title": "Blade Runner",
+            "year": "2017",
+            "resolution": "2160p",
+            "codec": "H265",
+            "source_type": "BluRay",
+        },
+    ),
+    ("Spider-Man.mkv", {"title": "Spider-Man"}),
+    (
+        "Inception (2010) 1080p.mkv",
+        {"title": "Inception", "year": "2010", "resolution": "1080p"},
+    ),
+    ("Show EP05 720p", {"title": "Show", "episode": "5", "resolution": "720p"}),
+    ("song.flac", {"title": "song", "audio": "FLAC"}),
+    (
+        "Dune Part Two 2024 WEB-DL 2160p x265 Atmos 25.3GB-CHD",
+        {
+            "title": "Dune Part Two",
+            "year": "2024",
+            "resolution": "2160p",
+            "codec": "H265",
+            "audio": "Dolby Atmos",
+            "source_type": "WEB-DL",
+            "release_group": "CHD",
+        },
+    ),
+    # 带点的编码写法与 DDP 音频
+    (
+        "The.Mandalorian.S02E05.1080p.WEB-DL.DDP5.1.H.264-NTb.mkv",
+        {
+            "title": "The Mandalorian",
+            "season": "2",
+            "episode": "5",
+            "season_episode": "S02E05",
+            "resolution": "1080p",
+            "codec": "H264",
+            "audio": "Dolby Digital",
+            "source_type": "WEB-DL",
+            "release_group": "NTb",
+        },
+    ),
+    (
+        "Movie.2020.1080p.H.265.mkv",
+        {"title": "Movie", "year": "2020", "resolution": "1080p", "codec": "H265"},
+    ),
+    # 词中间的 “dd” 不是音频标记
+    (
+        "Addams.Family.1991.720p.mkv",
+        {"title": "Addams Family", "year": "1991", "resolution": "720p"},
+    ),
+    (
+        "Daddy.Day.Care.2003.1080p.WEB-DL.mkv",
+        {
+            "title": "Daddy Day Care",
+            "year": "2003",
+            "resolution": "1080p",
+            "source_type": "WEB-DL",
+        },
+    ),
+]
+
+
+@pytest.mark.parametrize("name,expected", GOLDEN, ids=[name for name, _ in GOLDEN])
+def test_golden_corpus(name, expected):
+    assert parse_release_name(name).to_dict() == expected
+
+
+@pytest.mark.parametrize("name,expected", GOLDEN, ids=[name for name, _ in GOLDEN])
+def test_call_sites_agree(name, expected):
+    assert FileRenamer(".").parse_filename(name) == expected
+    assert FileOrganizer(".")._extract_metadata(name) == expected
+
+    item = DefaultRSSParser().parse_item_info(RSSItem(title=name, link="x"))
+    assert item.resolution == expected.get("resolution", "")
+    assert item.codec == expected.get("codec", "")
+    assert item.audio == expected.get("audio", "")
+    assert item.season == int(expected.get("season", 0))
+    assert item.episode == int(expected.get("episode", 0))
+
+
+def test_size_and_priority():
+    info = parse_release_name("Movie 1080p REPACK 4K x264 HEVC AAC AC3 1.2.3 GB")
+    assert info.size_gb == 2.3
+    assert (info.resolution, info.codec, info.audio) == (
+        "2160p",
+        "H265",
+        "Dolby Digital",
+    )
+    assert parse_release_name("Show 700 MB").size_gb == pytest.approx(700 / 1024)
+
+
+def test_results_are_memoized():
+    parser = ReleaseNameParser(cache_size=2)
+    first = parser.parse("The.Matrix.1999.1080p.mkv")
+    assert parser.parse("The.Matrix.1999.1080p.mkv") is first
+    assert parser.cache_info().hits == 1
+
+    parser.parse("a.mkv")
+    parser.parse("b.mkv")
+    assert parser.cache_info().currsize == 2
+
+    # 缓存的结果不可修改，调用方得到的是独立的字典
+    info = first.to_dict()
+    info["title"] = "changed"
+    assert parser.parse("The.Matrix.1999.1080p.mkv").title == "The Matrix"
+
+
+def test_rss_default_parser_shares_memo():
+    assert DefaultRSSParser.get_classifier() is get_release_parser()
@@ -5,8 +5,12 @@ RSS引擎测试模块
 import pytest
 import asyncio
 from datetime import datetime
+from unittest.mock import patch
+
+from aiohttp import web
 
 from core.rss_engine import RSSItem, RSSRule, DefaultRSSParser, RSSFilter, RSSManager
+from core.rss_dedup import BloomDedupStore, SQLiteDedupStore
 
 
 class TestRSSItem:
@@ -112,6 +116,32 @@ class TestDefaultRSSParser:
         assert parsed_item.season == 1
         assert parsed_item.episode == 1
 
+    def test_parse_item_info_priority(self):
+        """测试属性按映射表优先级解析，而非按出现位置"""
+        parser = DefaultRSSParser()
+
+        item = RSSItem(
+            title="Movie 1080p REPACK 4K x264 HEVC AAC AC3 1.2.3 GB",
+            link="http://example.com",
+        )
+
+        parsed_item = parser.parse_item_info(item)
+
+        assert parsed_item.resolution == "2160p"
+        assert parsed_item.codec == "H265"
+        assert parsed_item.audio == "Dolby Digital"
+        assert parsed_item.size == 2.3
+
+    def test_classifier_cached_per_class(self):
+        """测试分类器按解析器类编译一次"""
+
+        class CustomParser(DefaultRSSParser):
+            RESOLUTION_PATTERNS = {"1080p": ["fhd"]}
+
+        assert DefaultRSSParser.get_classifier() is DefaultRSSParser.get_classifier()
+        assert CustomParser.get_classifier() is not DefaultRSSParser.get_classifier()
+        assert CustomParser.get_classifier().classify("Show FHD")[1] == "1080p"
+
 
 class TestRSSFilter:
     """测试RSS过滤器"""
@@ -143,6 +173,49 @@ class TestRSSFilter:
         assert filtered[0].title == "Test Movie 1"
 
 
+class TestDedupStore:
+    """测试去重存储"""
+
+    def test_bloom_store(self):
+        """测试布隆过滤器去重与固定内存"""
+        store = BloomDedupStore(capacity=1000, error_rate=1e-4)
+        memory = store.memory_bytes
+
+        for i in range(500):
+            store.add(f"item-{i}")
+
+        assert all(f"item-{i}" in store for i in range(500))
+        assert sum(f"other-{i}" in store for i in range(1000)) <= 2
+        assert store.memory_bytes == memory
+
+    def test_bloom_store_aging(self):
+        """测试分代老化"""
+        store = BloomDedupStore(capacity=100, max_age=10)
+        store.add("old")
+
+        store._rotated_at -= 6
+        assert "old" in store
+
+        store._rotated_at -= 6
+        assert "old" not in store
+
+    def test_sqlite_store_survives_restart(self, tmp_path):
+        """测试持久化去重在重启后保留"""
+        db_path = tmp_path / "seen.db"
+        item = RSSItem(title="Test Movie", link="http://example.com", guid="g1")
+
+        store = SQLiteDedupStore(db_path)
+        filter = RSSFilter(store)
+        assert len(filter.filter_items([item], [RSSRule(name="test")])) == 1
+        store.close()
+
+        store = SQLiteDedupStore(db_path)
+        filter = RSSFilter(store)
+        assert item.hash_id in store
+        assert filter.filter_items([item], [RSSRule(name="test")]) == []
+        store.close()
+
+
 class TestRSSManager:
     """测试RSS管理器"""
 
@@ -170,6 +243,156 @@ class TestRSSManager:
         assert manager.rules[0].name == "测试规则"
 
 
+SAMPLE_FEED = """<?xml version="1.0"?>
+<rss version="2.0"><channel><title>test</title>
+<item><title>Test Movie 2023 BluRay 1080p x264 10GB</title>
+<link>http://example.com/1</link><guid>1</guid></item>
+</channel></rss>"""
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_skips_unchanged_feed():
+    """测试条件请求：304响应跳过解析"""
+    requests = []
+
+    async def handle(request):
+        requests.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.Response(
+            text=SAMPLE_FEED,
+            content_type="application/rss+xml",
+            headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"},
+        )
+
+    app = web.Application()
+    app.router.add_get("/rss", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    manager = RSSManager()
+    manager.add_feed("test", f"http://127.0.0.1:{port}/rss")
+    try:
+        first = await manager.fetch_feed("test", manager.feeds["test"]["url"])
+        session = manager.session
+        second = await manager.fetch_feed("test", manager.feeds["test"]["url"])
+        assert manager.session is session
+    finally:
+        await manager.close()
+        await runner.cleanup()
+
+    assert len(first) == 1
+    assert first[0].resolution == "1080p"
+    assert second == []
+    assert manager.feeds["test"]["etag"] == '"v1"'
+    assert "If-None-Match" not in requests[0]
+    assert requests[1]["If-None-Match"] == '"v1"'
+    assert requests[1]["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+@pytest.mark.asyncio
+async def test_validators_saved_only_after_successful_parse():
+    """测试解析失败时不保存 ETag，下次请求重新获取完整内容"""
+    requests = []
+
+    async def handle(request):
+        requests.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.Response(
+            text=SAMPLE_FEED,
+            content_type="application/rss+xml",
+            headers={"ETag": '"v1"'},
+        )
+
+    app = web.Application()
+    app.router.add_get("/rss", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    manager = RSSManager()
+    manager.add_feed("test", f"http://127.0.0.1:{port}/rss")
+    try:
+        with patch.object(
+            manager.parser, "parse_content_async", side_effect=RuntimeError("broken")
+        ):
+            first = await manager.fetch_feed("test", manager.feeds["test"]["url"])
+        second = await manager.fetch_feed("test", manager.feeds["test"]["url"])
+    finally:
+        await manager.close()
+        await runner.cleanup()
+
+    assert first == []
+    assert "If-None-Match" not in requests[1]
+    assert len(second) == 1
+    assert manager.feeds["test"]["etag"] == '"v1"'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("parse_mode", ["inline", "thread", "process"])
+async def test_parse_content_offload(parse_mode):
+    """测试在执行器中解析RSS内容"""
+    parser = DefaultRSSParser(parse_mode=parse_mode, offload_threshold=0)
+    try:
+        items = await parser.parse_content_async(SAMPLE_FEED, "http://example.com/rss")
+    finally:
+        parser.close()
+
+    assert len(items) == 1
+    assert items[0].title == "Test Movie 2023 BluRay 1080p x264 10GB"
+    assert items[0].size == 10.0
+    assert items[0].source == "http://example.com/rss"
+
+
+def test_parse_content_skips_seen_items():
+    """测试已见过的条目不再构建 RSSItem"""
+    store = BloomDedupStore(capacity=100)
+    parser = DefaultRSSParser(dedup_store=store)
+
+    items = parser.parse_content(SAMPLE_FEED, "http://example.com/rss")
+    assert len(items) == 1
+
+    store.add(items[0].hash_digest)
+    assert parser.parse_content(SAMPLE_FEED, "http://example.com/rss") == []
+
+
+@pytest.mark.asyncio
+async def test_stream_items_yields_as_feeds_finish():
+    """测试流式抓取：快速源的条目先于慢速源产出，且跨源去重"""
+    manager = RSSManager()
+    manager.scheduler.host_min_interval = 0
+    manager.add_rule(RSSRule(name="all"))
+    manager.add_feed("fast", "http://fast.example/rss")
+    manager.add_feed("slow", "http://slow.example/rss")
+    delays = {"fast": 0, "slow": 0.2}
+    done = []
+
+    async def fake_fetch_feed(name, url):
+        await asyncio.sleep(delays[name])
+        done.append(name)
+        return [
+            RSSItem(title=f"{name} item", link=url, guid=f"{name}-1"),
+            RSSItem(title="shared item", link=url, guid="shared"),
+        ]
+
+    manager.fetch_feed = fake_fetch_feed
+
+    stream = manager.stream_items(queue_size=1)
+    first = await stream.__anext__()
+    assert first.title == "fast item"
+    assert done == ["fast"]
+
+    rest = [item.title async for item in stream]
+    assert rest == ["shared item", "slow item"]
+    await manager.close()
+
+
 @pytest.mark.asyncio
 async def test_rss_integration():
     """集成测试"""
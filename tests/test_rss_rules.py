@@ -0,0 +1,100 @@
+"""
+RSS规则编译测试模块
+"""
+
+import random
+
+from core.rss_engine import RSSFilter, RSSItem, RSSRule
+from core.rss_rules import CompiledRuleSet, KeywordAutomaton
+
+
+class TestKeywordAutomaton:
+    """测试 Aho-Corasick 自动机"""
+
+    def test_find_overlapping_keywords(self):
+        """测试重叠与嵌套关键词"""
+        automaton = KeywordAutomaton(["he", "she", "his", "hers"])
+
+        found = automaton.find("ushers")
+
+        assert {automaton.keywords[i] for i in found} == {"he", "she", "hers"}
+
+    def test_empty_keyword_always_found(self):
+        """测试空关键词与子串语义一致"""
+        automaton = KeywordAutomaton(["", "abc"])
+
+        assert automaton.find("xyz") == {0}
+
+
+class TestCompiledRuleSet:
+    """测试编译规则集"""
+
+    def test_matches_rule_match(self):
+        """测试与逐条 RSSRule.match 结果一致"""
+        rng = random.Random(0)
+        words = ["BluRay", "WEB-DL", "REMUX", "Sample", "HDR", "S01", "x", ""]
+        resolutions = ["2160p", "1080p", "720p", ""]
+        codecs = ["H265", "H264", ""]
+        audios = ["DTS", "AAC", ""]
+
+        rules = [
+            RSSRule(
+                name=f"rule{i}",
+                include_keywords=rng.sample(words, rng.randint(0, 3)),
+                exclude_keywords=rng.sample(words, rng.randint(0, 2)),
+                min_size=rng.choice([0, 1, 5]),
+                max_size=rng.choice([10, 50, 1000]),
+                resolutions=rng.sample(resolutions, rng.randint(0, 2)),
+                codecs=rng.sample(codecs, rng.randint(0, 2)),
+                audio_formats=rng.sample(audios, rng.randint(0, 1)),
+            )
+            for i in range(50)
+        ]
+        rule_set = CompiledRuleSet(rules)
+
+        for _ in range(500):
+            item = RSSItem(
+                title=" ".join(rng.choice(words) for _ in range(5)),
+                link="http://example.com",
+                size=rng.uniform(0, 60),
+                resolution=rng.choice(resolutions),
+                codec=rng.choice(codecs),
+                audio=rng.choice(audios),
+            )
+            expected = [rule.name for rule in rules if rule.match(item)]
+            assert rule_set.match(item) == expected
+
+    def test_filter_records_matched_rules(self):
+        """测试过滤器记录所有匹配的规则"""
+        rules = [
+            RSSRule(name="movies", include_keywords=["BluRay"]),
+            RSSRule(name="uhd", resolutions=["2160p"]),
+            RSSRule(name="tv", include_keywords=["S01"]),
+        ]
+        item = RSSItem(
+            title="Movie 2023 BluRay 2160p",
+            link="http://example.com",
+            resolution="2160p",
+        )
+
+        rss_filter = RSSFilter()
+        filtered = rss_filter.filter_items([item], rules)
+
+        assert filtered[0].matched_rules == ["movies", "uhd"]
+        assert rss_filter.compile_rules(rules) is rss_filter.compile_rules(rules)
+        assert rss_filter.compile_rules(rules[:2]) is not rss_filter.compile_rules(
+            rules
+        )
+
+    def test_recompiles_after_rule_mutated_in_place(self):
+        """规则对象原地修改后重新编译"""
+        rules = [RSSRule(name="movies", include_keywords=["BluRay"])]
+        item = RSSItem(title="Movie 2023 WEB-DL", link="http://example.com")
+        rss_filter = RSSFilter()
+        compiled = rss_filter.compile_rules(rules)
+        assert compiled.match(item) == []
+
+        rules[0].include_keywords.append("WEB-DL")
+
+        assert rss_filter.compile_rules(rules) is not compiled
+        assert rss_filter.compile_rules(rules).match(item) == ["movies"]
@@ -0,0 +1,133 @@
+"""
+RSS调度器测试模块
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from core.rss_engine import RSSItem
+from core.rss_scheduler import FeedScheduler
+
+
+class FakeManager:
+    """模拟RSS管理器"""
+
+    def __init__(self, delay: float = 0.01):
+        self.feeds = {}
+        self.delay = delay
+        self.active = {}
+        self.max_active = {}
+        self.max_total = 0
+        self.fail = set()
+        self.items = {}
+        self.calls = []
+
+    def add_feed(self, name, url, interval=3600):
+        self.feeds[name] = {"url": url, "interval": interval, "last_fetch": None}
+
+    async def fetch_feed(self, name, url):
+        host = url.split("/")[2]
+        self.calls.append(name)
+        self.active[host] = self.active.get(host, 0) + 1
+        self.max_active[host] = max(self.max_active.get(host, 0), self.active[host])
+        self.max_total = max(self.max_total, sum(self.active.values()))
+        await asyncio.sleep(self.delay)
+        self.active[host] -= 1
+        self.feeds[name]["last_error"] = "boom" if name in self.fail else None
+        return self.items.get(name, [])
+
+
+class TestFeedScheduler:
+    """测试RSS源调度器"""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limits(self):
+        """测试全局与单站点并发限制"""
+        manager = FakeManager()
+        for i in range(20):
+            manager.add_feed(f"a{i}", f"http://a.example/{i}")
+            manager.add_feed(f"b{i}", f"http://b.example/{i}")
+
+        scheduler = FeedScheduler(
+            manager, max_concurrency=3, per_host_concurrency=2, host_min_interval=0
+        )
+        results = await scheduler.fetch_many(list(manager.feeds))
+
+        assert len(results) == 40
+        assert manager.max_total <= 3
+        assert max(manager.max_active.values()) <= 2
+        assert all(info["last_fetch"] for info in manager.feeds.values())
+
+    @pytest.mark.asyncio
+    async def test_backoff_and_idle_interval(self):
+        """测试失败退避与未变化源的间隔延长"""
+        manager = FakeManager(delay=0)
+        manager.add_feed("failing", "http://a.example/1", interval=100)
+        manager.add_feed("idle", "http://b.example/1", interval=100)
+        manager.add_feed("busy", "http://c.example/1", interval=100)
+        manager.fail.add("failing")
+
+        scheduler = FeedScheduler(manager, jitter=0, host_min_interval=0)
+        for i in range(3):
+            manager.items["busy"] = [
+                RSSItem(title=f"Item {i}", link="http://example.com", guid=str(i))
+            ]
+            await scheduler.fetch_many(["failing", "idle", "busy"])
+
+        assert scheduler.schedules["failing"].effective_interval == 800
+        assert scheduler.schedules["idle"].effective_interval == 250
+        assert scheduler.schedules["busy"].effective_interval == 100
+
+        manager.fail.clear()
+        await scheduler.fetch("failing")
+        assert scheduler.schedules["failing"].failures == 0
+
+    @pytest.mark.asyncio
+    async def test_run_honours_intervals(self):
+        """测试调度循环按到期时间抓取"""
+        manager = FakeManager(delay=0)
+        manager.add_feed("fast", "http://a.example/1", interval=0.05)
+        manager.add_feed("slow", "http://b.example/1", interval=3600)
+
+        scheduler = FeedScheduler(manager, jitter=0, host_min_interval=0)
+        scheduler.start()
+        await asyncio.sleep(0.3)
+        await scheduler.stop()
+
+        assert manager.calls.count("slow") == 1
+        assert manager.calls.count("fast") >= 2
+        assert scheduler.schedules["slow"].next_fetch > time.time() + 3000
+
+    @pytest.mark.asyncio
+    async def test_direct_fetch_does_not_grow_heap(self):
+        """测试调度循环未运行时直接抓取不会累积堆项"""
+        manager = FakeManager(delay=0)
+        manager.add_feed("a", "http://a.example/1")
+        manager.add_feed("b", "http://b.example/1")
+
+        scheduler = FeedScheduler(manager, host_min_interval=0)
+        for _ in range(5):
+            await scheduler.fetch_many(["a", "b"])
+        assert scheduler._heap == []
+
+        scheduler.start()
+        await asyncio.sleep(0.05)
+        assert len(scheduler._heap) == 2
+        await scheduler.stop()
+
+    @pytest.mark.asyncio
+    async def test_host_spacing_does_not_hold_global_slot(self):
+        """测试等待站点间隔的请求不占用其他站点需要的全局名额"""
+        manager = FakeManager(delay=0.01)
+        manager.add_feed("a1", "http://a.example/1")
+        manager.add_feed("a2", "http://a.example/2")
+        manager.add_feed("b1", "http://b.example/1")
+
+        scheduler = FeedScheduler(
+            manager, max_concurrency=1, per_host_concurrency=2, host_min_interval=0.2
+        )
+        await scheduler.fetch_many(["a1", "a2", "b1"])
+
+        assert manager.calls == ["a1", "b1", "a2"]
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from core.vector_index import VectorIndexManager  # noqa: E402
+
+DIMENSION = 16
+
+
+def random_vectors(count, seed=0):
+    return np.random.default_rng(seed).random((count, DIMENSION)).astype("float32")
+
+
+def make_ids(count, start=0):
+    return [f"item_{i}" for i in range(start, start + count)]
+
+
+class TestVectorIndexManager:
+    """Test cases for VectorIndexManager."""
+
+    def test_index_type_follows_corpus_size(self):
+        manager = VectorIndexManager(DIMENSION, flat_threshold=50, ivf_threshold=200)
+
+        manager.add(random_vectors(40), make_ids(40))
+        assert manager.index_type == "flat"
+
+        manager.add(random_vectors(60, seed=1), make_ids(60, 40))
+        assert manager.index_type == "hnsw"
+
+        manager.add(random_vectors(150, seed=2), make_ids(150, 100))
+        assert manager.index_type == "ivf"
+        assert manager.ntotal == 250
+        assert manager.id_to_row["item_120"] == 120
+
+    def test_search_returns_normalized_scores(self):
+        manager = VectorIndexManager(DIMENSION)
+        vectors = random_vectors(30) * 10
+        manager.add(vectors, make_ids(30))
+
+        scores, rows = manager.search(vectors[7], 3)
+
+        assert rows[0][0] == 7
+        assert scores[0][0] == pytest.approx(1.0, abs=1e-5)
+        assert np.all(scores <= 1.0 + 1e-5)
+        # 调用方的数组不被原地归一化
+        assert np.linalg.norm(vectors[7]) > 2
+
+    def test_search_caps_k_and_handles_empty_index(self):
+        manager = VectorIndexManager(DIMENSION)
+        scores, rows = manager.search(random_vectors(2), 5)
+        assert rows.shape == (2, 0)
+
+        manager.add(random_vectors(3), make_ids(3))
+        scores, rows = manager.search(random_vectors(2), 5)
+        assert rows.shape == (2, 3)
+
+    def test_ivf_is_retrained_after_growth(self):
+        manager = VectorIndexManager(
+            DIMENSION, flat_threshold=10, ivf_threshold=100, retrain_growth=2.0
+        )
+        manager.add(random_vectors(200), make_ids(200))
+        assert manager.trained_size == 200
+
+        manager.add(random_vectors(100, seed=1), make_ids(100, 200))
+        assert manager.trained_size == 200
+
+        manager.add(random_vectors(150, seed=2), make_ids(150, 300))
+        assert manager.trained_size == 450
+        assert manager.ntotal == 450
+
+    def test_save_and_mmap_load(self, tmp_path):
+        manager = VectorIndexManager(DIMENSION, index_dir=tmp_path)
+        vectors = random_vectors(40)
+        manager.add(vectors, make_ids(40))
+        manager.save()
+
+        loaded = VectorIndexManager(DIMENSION, index_dir=tmp_path)
+        assert loaded.load()
+        assert loaded.get_stats()["memory_mapped"]
+        assert loaded.ids == make_ids(40)
+        assert loaded.search(vectors[11], 1)[1][0][0] == 11
+
+        # 内存映射的索引在写入前重新加载为可写副本
+        loaded.add(random_vectors(5, seed=3), make_ids(5, 40))
+        assert loaded.ntotal == 45
+        assert not loaded.get_stats()["memory_mapped"]
+
+    def test_load_rejects_mismatched_dimension(self, tmp_path):
+        manager = VectorIndexManager(DIMENSION, index_dir=tmp_path)
+        manager.add(random_vectors(5), make_ids(5))
+        manager.save()
+
+        assert not VectorIndexManager(DIMENSION * 2, index_dir=tmp_path).load()
+        assert not VectorIndexManager(DIMENSION, index_dir=tmp_path / "none").load()